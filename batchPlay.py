@@ -0,0 +1,158 @@
+import lines
+import numpy as np
+import argparse
+import csv
+import time
+
+# This script plays large numbers of games between simple policies, for gathering statistics such as how often the first
+# player wins and how long games last, e.g., a million games between two random players on a 6x7 board with 4 in a line:
+#
+#     python batchPlay.py 6 7 4 1000000 random.csv
+#
+# Rather than playing one game at a time through board.Board, a BatchGames plays thousands of games in lockstep with
+# NumPy arrays: every move of every game in the batch is chosen, played and checked for a win by a few array operations.
+# As in board.Board, each player's pieces in every winning line are counted (see lines.py), so a move wins if it brings
+# the count of one of the lines through its space up to winNum.
+#
+# The policies are:
+#     random      choose any legal move with equal probability (as randomPlayer.RandomPlayer does)
+#     heuristic   win if possible, otherwise block the opponent's winning move if there is one, otherwise play randomly
+
+POLICIES = ("random", "heuristic")
+
+
+class BatchGames:
+
+	def __init__(self, numGames, rows, columns, winNum, seed=None):
+		self.numGames = numGames
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+		self.numCells = rows * columns
+
+		# cellLines[cell] holds the lines through the cell, padded with an extra line (numLines) that is never counted
+		table = lines.getLineTable(rows, columns, winNum)
+		self.numLines = table.numLines
+		maxLines = max(len(cellLines) for cellLines in table.cellLines)
+		self.cellLines = np.full((self.numCells, maxLines), self.numLines, dtype=np.intp)
+		for cell, cellLines in enumerate(table.cellLines):
+			self.cellLines[cell, :len(cellLines)] = cellLines
+
+		self.rng = np.random.default_rng(seed)
+		self.reset()
+
+
+	# This method starts a new game on every board of the batch
+	def reset(self):
+		# heights[game, column] is the number of pieces in the column (the colFills of each board)
+		self.heights = np.zeros((self.numGames, self.numColumns), dtype=np.intp)
+		# counts[side][game, line] is the number of pieces side (0 for the first player) has in the line
+		self.counts = np.zeros((2, self.numGames, self.numLines + 1), dtype=np.int8)
+		# moves[game, i] is the column of the ith move of the game (-1 after the game ended)
+		self.moves = np.full((self.numGames, self.numCells), -1, dtype=np.int8)
+		# results are from the first player's point of view: 1 for a win, -1 for a loss and 0 for a draw
+		self.results = np.zeros(self.numGames, dtype=np.int8)
+		self.numMoves = np.zeros(self.numGames, dtype=np.int16)
+		self.active = np.ones(self.numGames, dtype=bool)
+
+
+	# This method returns, for each of the given games, which columns side could win in with its next move
+	def winningMoves(self, side, games):
+		heights = self.heights[games]
+		legal = heights < self.numRows
+		cells = np.minimum(heights, self.numRows - 1) * self.numColumns + np.arange(self.numColumns)
+		counts = self.counts[side][games[:, None, None], self.cellLines[cells]]
+		return legal & (counts == self.winNum - 1).any(axis=2)
+
+
+	# This method chooses the move of side in each of the given games with the given policy
+	def chooseMoves(self, policy, side, games):
+		legal = self.heights[games] < self.numRows
+		# every legal move gets a random score below 1, so the highest scoring move is chosen at random among equals
+		scores = self.rng.random(legal.shape)
+		if policy == "heuristic":
+			scores += 4 * self.winningMoves(side, games) + 2 * self.winningMoves(1 - side, games)
+		elif policy != "random":
+			raise ValueError("unknown policy " + str(policy))
+		return np.where(legal, scores, -1).argmax(axis=1)
+
+
+	# This method plays every game of the batch to the end, and returns the results and the number of moves of each game
+	def play(self, policyX="random", policyO="random"):
+		self.reset()
+		for step in range(self.numCells):
+			games = np.flatnonzero(self.active)
+			if games.size == 0:
+				break
+			side = step % 2
+			columns = self.chooseMoves(policyX if side == 0 else policyO, side, games)
+
+			# drop the pieces, and add them to the count of every line through their spaces
+			cells = self.heights[games, columns] * self.numColumns + columns
+			self.heights[games, columns] += 1
+			self.moves[games, step] = columns
+			self.numMoves[games] = step + 1
+			counts = self.counts[side]
+			lineIndex = self.cellLines[cells]
+			counts[games[:, None], lineIndex] += 1
+			counts[:, self.numLines] = 0
+
+			won = (counts[games[:, None], lineIndex] == self.winNum).any(axis=1)
+			winners = games[won]
+			self.results[winners] = 1 if side == 0 else -1
+			self.active[winners] = False
+
+		# any game still going has filled the board without a win, and is a draw (with result 0)
+		self.active[:] = False
+		return self.results.copy(), self.numMoves.copy()
+
+
+# This function plays numGames games in batches of at most batchSize, and returns the results and numbers of moves
+def simulate(numGames, rows, columns, winNum, policyX="random", policyO="random", seed=None, batchSize=10000):
+	rng = np.random.default_rng(seed)
+	results = list()
+	numMoves = list()
+	while numGames > 0:
+		batch = BatchGames(min(numGames, batchSize), rows, columns, winNum, rng.integers(2**63))
+		batchResults, batchMoves = batch.play(policyX, policyO)
+		results.append(batchResults)
+		numMoves.append(batchMoves)
+		numGames -= batch.numGames
+	return np.concatenate(results), np.concatenate(numMoves)
+
+
+# This function writes one row per game to a CSV file, in the same form as testPlay.py
+def writeResults(path, results, numMoves, rows, columns, winNum, policyX, policyO, elapsed):
+	timePerGame = elapsed / max(1, len(results))
+	with open(path, 'w', newline='') as file:
+		writer = csv.writer(file)
+		writer.writerow(["result", "numMoves", "policyX", "policyO", "rows", "columns", "winNum", "time"])
+		for result, moves in zip(results.tolist(), numMoves.tolist()):
+			writer.writerow([result, moves, policyX, policyO, rows, columns, winNum, timePerGame])
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Play many games of Connect between simple policies.")
+	parser.add_argument("rows", type=int)
+	parser.add_argument("columns", type=int)
+	parser.add_argument("winNum", type=int)
+	parser.add_argument("games", type=int, help="the number of games to play")
+	parser.add_argument("output", help="the CSV file to write the results to")
+	parser.add_argument("--x", choices=POLICIES, default="random", help="the policy of the first player")
+	parser.add_argument("--o", choices=POLICIES, default="random", help="the policy of the second player")
+	parser.add_argument("--seed", type=int, default=None)
+	parser.add_argument("--batch", type=int, default=10000, help="the number of games played at once")
+	args = parser.parse_args()
+
+	start = time.time()
+	results, numMoves = simulate(args.games, args.rows, args.columns, args.winNum, args.x, args.o, args.seed, args.batch)
+	elapsed = time.time() - start
+	writeResults(args.output, results, numMoves, args.rows, args.columns, args.winNum, args.x, args.o, elapsed)
+
+	print("Played %d games in %.1f seconds" % (len(results), elapsed))
+	print("X wins %.3f, O wins %.3f, draws %.3f, mean length %.2f moves" % ((results == 1).mean(), (results == -1).mean(),
+		(results == 0).mean(), numMoves.mean()))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,176 @@
+import player
+import evaluation
+import position
+import argparse
+import json
+import os
+import time
+
+# This script benchmarks the search on fixed sets of positions, so that the results are the same from run to run (apart
+# from the times) and can be compared with an earlier run to find regressions. For example, to run the benchmark and
+# compare it with the stored baseline:
+#
+#     python benchmark.py run results.json
+#     python benchmark.py compare results.json benchmarks/baseline.json
+#
+# The positions are in the text files in the benchmarks folder, one position per line:
+#
+#     name rows columns winNum moves
+#
+# where moves is the move string of the columns played so far (X first, see position.py), or '-' for the empty board.
+# The next move is X's if an even number of moves have been played, and O's otherwise. Lines starting with '#' are
+# comments.
+#
+# Each position is searched with each mode in MODES by a new Player (so no transposition table is kept between
+# positions), and the chosen move, the numbers of nodes expanded and pruned, the time and the nodes per second are saved
+# as JSON. Comparing two runs flags every position where the chosen move changed or more nodes were expanded, and (if
+# a time tolerance is given) where the search took that fraction longer.
+
+POSITION_FILES = ("openings.txt", "midgame.txt", "endgames.txt")
+
+# The modes that can be benchmarked: the name of the Player method used, and the arguments to create the Player with
+# (apart from its name and depth). evaluator=True is replaced by a HeuristicEvaluator for the position's board.
+MODES = {
+	"minimax": ("getMove", dict()),
+	"alphabeta": ("getMoveAlphaBeta", dict()),
+	"alphabeta-tt": ("getMoveAlphaBeta", dict(transpositionSize=2**16)),
+	"alphabeta-dynamic": ("getMoveAlphaBeta", dict(transpositionSize=2**16, moveOrdering="dynamic")),
+	"pvs": ("getMoveAlphaBeta", dict(searchMode="pvs", transpositionSize=2**16, moveOrdering="dynamic", evaluator=True)),
+	"alphabeta-tactics": ("getMoveAlphaBeta", dict(transpositionSize=2**16, moveOrdering="dynamic", tactics=True)),
+	"pvs-tactics": ("getMoveAlphaBeta", dict(searchMode="pvs", transpositionSize=2**16, moveOrdering="dynamic",
+		evaluator=True, tactics=True)),
+}
+
+DEFAULT_MODES = ("minimax", "alphabeta", "alphabeta-tt", "pvs")
+
+
+# This function reads the positions in a file, and returns a list of (name, rows, columns, winNum, moves) tuples
+def readPositions(path):
+	positions = list()
+	with open(path) as file:
+		for line in file:
+			line = line.strip()
+			if line == "" or line.startswith("#"):
+				continue
+			name, rows, columns, winNum, moves = line.split()
+			moves = [] if moves == "-" else position.stringToMoves(moves)
+			positions.append((name, int(rows), int(columns), int(winNum), moves))
+	return positions
+
+
+# This function returns the board for a position, and the name of the player to move
+def makeBoard(rows, columns, winNum, moves):
+	gameBoard = position.boardFromMoves(rows, columns, winNum, moves)
+	return gameBoard, "X" if len(moves) % 2 == 0 else "O"
+
+
+# This function searches one position with one mode, and returns the result as a dictionary
+def runPosition(position, mode, depth):
+	name, rows, columns, winNum, moves = position
+	methodName, settings = MODES[mode]
+	settings = dict(settings)
+	if settings.get("evaluator") is True:
+		settings["evaluator"] = evaluation.HeuristicEvaluator(rows, columns, winNum)
+
+	gameBoard, playerName = makeBoard(rows, columns, winNum, moves)
+	searcher = player.Player(playerName, depth=depth, **settings)
+	start = time.perf_counter()
+	move = getattr(searcher, methodName)(gameBoard)
+	elapsed = time.perf_counter() - start
+	return {
+		"position": name,
+		"mode": mode,
+		"depth": depth,
+		"move": move,
+		"nodes": searcher.numExpanded,
+		"pruned": searcher.numPruned,
+		"time": elapsed,
+		"nodesPerSecond": searcher.numExpanded / elapsed if elapsed > 0 else 0.0,
+	}
+
+
+# This function runs the benchmark on every position in the given files with every given mode, and returns the results
+def runBenchmark(paths, modes, depth, progress=False):
+	results = list()
+	for path in paths:
+		for position in readPositions(path):
+			for mode in modes:
+				results.append(runPosition(position, mode, depth))
+				if progress:
+					print("\r%d searches" % len(results), end='')
+	if progress:
+		print()
+
+	totals = dict()
+	for mode in modes:
+		nodes = sum(result["nodes"] for result in results if result["mode"] == mode)
+		totalTime = sum(result["time"] for result in results if result["mode"] == mode)
+		totals[mode] = {"nodes": nodes, "time": totalTime, "nodesPerSecond": nodes / totalTime if totalTime > 0 else 0.0}
+	return {"depth": depth, "modes": list(modes), "results": results, "totals": totals}
+
+
+# This function compares a run with a baseline, and returns a list of regressions, each a description of the position,
+# the mode and what got worse. Positions and modes that are only in one of the two runs are not compared.
+def compareResults(current, baseline, timeTolerance=None):
+	baselineResults = dict()
+	for result in baseline["results"]:
+		baselineResults[(result["position"], result["mode"], result["depth"])] = result
+
+	regressions = list()
+	for result in current["results"]:
+		old = baselineResults.get((result["position"], result["mode"], result["depth"]))
+		if old is None:
+			continue
+		where = "%s (%s, depth %d)" % (result["position"], result["mode"], result["depth"])
+		if result["move"] != old["move"]:
+			regressions.append("%s: move changed from %s to %s" % (where, old["move"], result["move"]))
+		if result["nodes"] > old["nodes"]:
+			regressions.append("%s: nodes increased from %d to %d" % (where, old["nodes"], result["nodes"]))
+		if timeTolerance is not None and result["time"] > old["time"] * (1 + timeTolerance):
+			regressions.append("%s: time increased from %.4fs to %.4fs" % (where, old["time"], result["time"]))
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the Connect search on fixed positions.")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	run = commands.add_parser("run", help="run the benchmark and save the results as JSON")
+	run.add_argument("output", help="the JSON file to write the results to")
+	run.add_argument("--depth", type=int, default=4)
+	run.add_argument("--modes", default=",".join(DEFAULT_MODES),
+		help="comma separated modes, from: " + ", ".join(MODES))
+	run.add_argument("--positions", nargs="*", help="position files (by default every file in the benchmarks folder)")
+
+	compare = commands.add_parser("compare", help="compare saved results with a baseline")
+	compare.add_argument("results")
+	compare.add_argument("baseline")
+	compare.add_argument("--time-tolerance", type=float, default=None,
+		help="also flag searches that took more than this fraction longer, e.g., 0.25")
+	args = parser.parse_args()
+
+	if args.command == "run":
+		paths = args.positions
+		if not paths:
+			folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+			paths = [os.path.join(folder, name) for name in POSITION_FILES]
+		results = runBenchmark(paths, args.modes.split(","), args.depth, progress=True)
+		with open(args.output, "w") as file:
+			json.dump(results, file, indent=1)
+		for mode, totals in results["totals"].items():
+			print("%-18s %10d nodes %8.2fs %10.0f nodes/s" % (mode, totals["nodes"], totals["time"], totals["nodesPerSecond"]))
+	else:
+		with open(args.results) as file:
+			current = json.load(file)
+		with open(args.baseline) as file:
+			baseline = json.load(file)
+		regressions = compareResults(current, baseline, args.time_tolerance)
+		for regression in regressions:
+			print(regression)
+		print("%d regressions" % len(regressions))
+		if regressions:
+			raise SystemExit(1)
+
+
+if __name__ == "__main__":
+	main()
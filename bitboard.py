@@ -0,0 +1,268 @@
+# The BitBoard class is an alternative representation of the Connect board that provides the same public
+# methods as board.Board (addPiece, removePiece, checkWin, checkFull, checkSpace, copy, snapshot, restore,
+# printBoard) and the same colFills and lastPlay attributes, so it can be used anywhere a Board is used.
+#
+# Each player's pieces are stored as the set bits of a single integer. The bits are laid out column by
+# column, with one extra (always empty) sentinel bit at the top of every column:
+#
+#     bit index of (row, column) = column * (numRows + 1) + row
+#
+# The sentinel bit stops lines from wrapping from the top of one column into the bottom of the next, so a
+# line of pieces in any direction can be found by shifting and AND-ing the whole mask, rather than by walking
+# the board one Space at a time.
+import zobrist
+
+class BitBoard:
+
+	# The arguments are the same as for board.Board. The players argument gives the names of the two players,
+	# and the order in which they are given fixes which of the two masks each player's pieces are stored in.
+	def __init__(self, rows, columns, winNum, players=("X", "O")):
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+
+		# The number of bits used per column, including the sentinel bit
+		self.colHeight = rows + 1
+
+		# masks[i] holds the pieces of the player named players[i]
+		self.masks = [0, 0]
+		self.players = tuple(players)
+		self.pieceIndex = {players[0]: 0, players[1]: 1}
+
+		# We use colFills to track the lowest numbered row that is empty for each column (the height array),
+		# exactly as board.Board does.
+		self.colFills = [0] * columns
+
+		# cellBits[column][row] is the bit used for the space (row, column), and fullMask has the bit of every
+		# space on the board set
+		self.cellBits = [[1 << (column * self.colHeight + row) for row in range(rows)] for column in range(columns)]
+		self.fullMask = 0
+		for bits in self.cellBits:
+			for bit in bits:
+				self.fullMask |= bit
+
+		# We store the location of the last piece added to the game, and the player who made the move.
+		self.lastPlay = [-1, -1, ""]
+
+		# The Zobrist hash of the position and of its mirror image (see zobrist.py), which are updated as pieces are
+		# added and removed. pieceKeys[i] and mirrorPieceKeys[i] hold the keys for the pieces of players[i].
+		self.zobrist = zobrist.getZobristKeys(rows, columns)
+		self.pieceKeys = [self.zobrist.getPieceKeys(players[0]), self.zobrist.getPieceKeys(players[1])]
+		self.mirrorPieceKeys = [self.zobrist.getMirrorPieceKeys(players[0]), self.zobrist.getMirrorPieceKeys(players[1])]
+		self.hash = 0
+		self.mirrorHash = 0
+
+		# An optional evaluator (see evaluation.py) that scores positions, and its state for the current position,
+		# which is updated as pieces are added and removed
+		self.evaluator = None
+		self.evalState = None
+
+		# For each direction (vertical, horizontal and the two diagonals) we store the shifts used by checkWin().
+		# After line &= line >> (length * direction), each set bit of line marks the start of a run of pieces
+		# twice as long as before, so a run of winNum pieces is found with about log2(winNum) shifts.
+		self.winShifts = list()
+		for direction in (1, self.colHeight, self.colHeight - 1, self.colHeight + 1):
+			shifts = list()
+			length = 1
+			while length * 2 <= winNum:
+				shifts.append(length * direction)
+				length = length * 2
+			if length < winNum:
+				# the last shift overlaps two runs of the current length to cover exactly winNum pieces
+				shifts.append((winNum - length) * direction)
+			self.winShifts.append(shifts)
+
+
+	# Build a BitBoard holding the same position as the given board (which may be a board.Board)
+	@staticmethod
+	def fromBoard(other, players=("X", "O")):
+		b = BitBoard(other.numRows, other.numColumns, other.winNum, players)
+		for column in range(other.numColumns):
+			for row in range(other.colFills[column]):
+				value = str(other.checkSpace(row, column))
+				b.masks[b.pieceIndex[value]] |= b.cellBits[column][row]
+				b.hash ^= b.pieceKeys[b.pieceIndex[value]][row * b.numColumns + column]
+				b.mirrorHash ^= b.mirrorPieceKeys[b.pieceIndex[value]][row * b.numColumns + column]
+			b.colFills[column] = other.colFills[column]
+		b.lastPlay = list(other.lastPlay)
+		return b
+
+
+	# Return the position packed into an integer, in the same form as board.Board.encode(), whichever order the players
+	# were given in. X's pieces are already in the layout of the code, so only the top markers need adding.
+	def encode(self):
+		index = self.pieceIndex.get("X")
+		code = self.masks[index] if index is not None else 0
+		colHeight = self.colHeight
+		for column in range(self.numColumns):
+			code |= 1 << (column * colHeight + self.colFills[column])
+		return code
+
+
+	# Set the evaluator used to score the position on this board (or None to remove it)
+	def setEvaluator(self, evaluator):
+		self.evaluator = evaluator
+		self.evalState = evaluator.newState(self) if evaluator is not None else None
+
+
+	# This method adds a piece for the specified player to the specified column
+	def addPiece(self, column, player):
+		if column >= self.numColumns or column < 0:
+			print("Column does not exist")
+			return False
+
+		row = self.colFills[column]
+		if row >= self.numRows:
+			return False
+
+		# set the bit for the new piece in the player's mask, update the hashes and record the last move
+		index = self.pieceIndex[player]
+		self.masks[index] |= self.cellBits[column][row]
+		self.hash ^= self.pieceKeys[index][row * self.numColumns + column]
+		self.mirrorHash ^= self.mirrorPieceKeys[index][row * self.numColumns + column]
+		self.lastPlay = [row, column, player]
+		self.colFills[column] = row + 1
+
+		if self.evaluator is not None:
+			self.evaluator.pieceAdded(self.evalState, row * self.numColumns + column, player)
+		return True
+
+
+	# This method removes a piece from the specified column
+	# Note this can be used in your search, and not as a move in the game.
+	def removePiece(self, column):
+		if column >= self.numColumns or column < 0:
+			print("Column does not exist")
+			return False
+
+		if self.colFills[column] == 0:
+			print("Column is empty, pick another column")
+			return False
+
+		# the highest piece in the column belongs to exactly one of the players, so flip its bit in that mask
+		row = self.colFills[column] - 1
+		bit = self.cellBits[column][row]
+		masks = self.masks
+		index = 0 if masks[0] & bit else 1
+		masks[index] ^= bit
+		self.hash ^= self.pieceKeys[index][row * self.numColumns + column]
+		self.mirrorHash ^= self.mirrorPieceKeys[index][row * self.numColumns + column]
+		if self.evaluator is not None:
+			self.evaluator.pieceRemoved(self.evalState, row * self.numColumns + column, self.players[index])
+		self.lastPlay = [row, column, ' ']
+		self.colFills[column] = row
+		return True
+
+
+	# This method returns True if the player who made the last play has a winning number of pieces in a line.
+	# As pieces are only ever added to a game that has not been won, this is the same as checking whether
+	# the last move was a winning move.
+	def checkWin(self):
+		lastPlayer = self.lastPlay[2]
+		if lastPlayer == ' ' or lastPlayer == "":
+			return False
+
+		mask = self.masks[self.pieceIndex[lastPlayer]]
+		for shifts in self.winShifts:
+			line = mask
+			for shift in shifts:
+				line &= line >> shift
+			if line:
+				return True
+		return False
+
+
+	# This method returns True if the specified player would win by adding a piece to the specified column, without
+	# changing the board
+	def isWinningMove(self, column, player):
+		row = self.colFills[column]
+		if row >= self.numRows:
+			return False
+		mask = self.masks[self.pieceIndex[player]] | self.cellBits[column][row]
+		for shifts in self.winShifts:
+			line = mask
+			for shift in shifts:
+				line &= line >> shift
+			if line:
+				return True
+		return False
+
+
+	# This method returns True if the specified player would complete a line by having a piece in the specified empty
+	# space, which need not be playable yet (e.g., it may be above the next space in its column)
+	def isWinningCell(self, row, column, player):
+		mask = self.masks[self.pieceIndex[player]] | self.cellBits[column][row]
+		for shifts in self.winShifts:
+			line = mask
+			for shift in shifts:
+				line &= line >> shift
+			if line:
+				return True
+		return False
+
+
+	# Check whether the board is full, i.e., if it is possible to make a move
+	def checkFull(self):
+		return self.masks[0] | self.masks[1] == self.fullMask
+
+
+	# Check what is in the specified location (i.e., return the player name or ' ')
+	def checkSpace(self, row, column):
+		bit = self.cellBits[column][row]
+		if self.masks[0] & bit:
+			return self.players[0]
+		if self.masks[1] & bit:
+			return self.players[1]
+		return ' '
+
+
+	# Print a simple visualisation of the current board (where 0,0 is bottom left)
+	def printBoard(self):
+		for row in reversed(range(self.numRows)):
+			print("| ", end='')
+			for column in range(self.numColumns):
+				print(self.checkSpace(row, column), " ", end='')
+			print("|")
+		for i in range(self.numColumns):
+			print("---", end='')
+		print("---")
+
+
+	# Copy the current board. The masks are integers, so only the two small lists need to be copied.
+	def copy(self):
+		b = BitBoard.__new__(BitBoard)
+		b.numRows = self.numRows
+		b.numColumns = self.numColumns
+		b.winNum = self.winNum
+		b.colHeight = self.colHeight
+		b.masks = list(self.masks)
+		b.players = self.players
+		b.pieceIndex = self.pieceIndex
+		b.colFills = list(self.colFills)
+		b.cellBits = self.cellBits
+		b.fullMask = self.fullMask
+		b.lastPlay = list(self.lastPlay)
+		b.winShifts = self.winShifts
+		b.zobrist = self.zobrist
+		b.pieceKeys = self.pieceKeys
+		b.mirrorPieceKeys = self.mirrorPieceKeys
+		b.hash = self.hash
+		b.mirrorHash = self.mirrorHash
+		b.evaluator = self.evaluator
+		b.evalState = self.evaluator.copyState(self.evalState) if self.evaluator is not None else None
+		return b
+
+
+	# Return a snapshot of the position, which restore() can later return the board to (see Board.snapshot())
+	def snapshot(self):
+		return (tuple(self.masks), tuple(self.colFills), tuple(self.lastPlay), self.hash, self.mirrorHash)
+
+
+	# Return the board to the position in a snapshot taken from this board (or another BitBoard of the same size)
+	def restore(self, snapshot):
+		masks, colFills, lastPlay, self.hash, self.mirrorHash = snapshot
+		self.masks = list(masks)
+		self.colFills = list(colFills)
+		self.lastPlay = list(lastPlay)
+		if self.evaluator is not None:
+			self.evalState = self.evaluator.newState(self)
@@ -1,8 +1,9 @@
-import copy
+import lines
+import zobrist
 
 # The Space class is a simple wrapper around a string representing the content of a space.
 # If a space is unused it has the value ' ', otherwise it has the name of the player whose piece occupies that space. 
-# To fill a space, simply set its value to the name of the player whose piece occupies the space. 
+# The board itself stores plain strings (see Board.cells); Spaces are only built for the gameBoard property.
 class Space:
 
 	def __init__(self):
@@ -15,6 +16,25 @@ class Space:
 		return str(self)
 
 
+# A BoardSpace is a Space that reads and writes a space of a Board, as returned by the gameBoard property. Setting its
+# value changes the board, and recomputes the line counts and hashes from the new contents (colFills and lastPlay are
+# not changed, as they never were when gameBoard was written directly).
+class BoardSpace(Space):
+
+	def __init__(self, board, cell):
+		self.board = board
+		self.cell = cell
+
+	@property
+	def value(self):
+		return self.board.cells[self.cell]
+
+	@value.setter
+	def value(self, value):
+		self.board.cells[self.cell] = value
+		self.board.recompute()
+
+
 # This class represents the Connect board, and tracks various useful pieces of information and provides utility 
 # methods, e.g., for checking whether the board is full or the last move is a winning moves. 
 class Board:
@@ -22,19 +42,15 @@ class Board:
 	# When defining the board, you should provide the number of rows and columns, and the number of
 	# pieces in a line required to win (winNum). 
 	def __init__(self, rows, columns, winNum):
-		# The game board is represented as a list of lists of Space objects.
-		self.gameBoard = list()
-
-		# We store the number of rows, columns, and pieces in a line needed to win,
-		# and initialise the board to contain empty Space objects
+		# We store the number of rows, columns, and pieces in a line needed to win
 		self.numRows = rows
 		self.numColumns = columns
 		self.winNum = winNum
-		for i in range(self.numRows):
-			currRow = list()
-			for i in range(self.numColumns):
-				currRow.append(Space())
-			self.gameBoard.append(currRow)
+
+		# The game board is represented as a single flat list holding the name of the player in each space, or ' ' if
+		# it is empty, indexed by the cell index row * columns + column (the same index used by lines.py and zobrist.py).
+		# Being a list of strings, it can be copied with a single list() call.
+		self.cells = [' '] * (rows * columns)
 
 		# We use colFills to track the lowest numbered row that is empty for each column.
 		# When a piece is placed in a column, the corresponding number in this list will be incremented.
@@ -46,6 +62,142 @@ class Board:
 		# The first element is the row, the second is the column and the last element is the name of the player.
 		self.lastPlay = [-1,-1, ""]
 
+		# The winning lines through each space are precomputed (see lines.py). For each player we count how many
+		# of their pieces are in every line, so a move wins if it brings the count of any of its lines up to winNum.
+		# lineCounts maps a player's name to a list holding the count for every line.
+		self.lineTable = lines.getLineTable(rows, columns, winNum)
+		self.lineCounts = dict()
+		# lastWin records whether the last piece added completed a line
+		self.lastWin = False
+
+		# The Zobrist hash of the position (see zobrist.py), which is updated as pieces are added and removed
+		self.zobrist = zobrist.getZobristKeys(rows, columns)
+		self.hash = 0
+		# the hash of the mirror image of the position, so that a position and its mirror can be treated as one
+		self.mirrorHash = 0
+
+		# An optional evaluator (see evaluation.py) that scores positions, and its state for the current position,
+		# which is updated as pieces are added and removed
+		self.evaluator = None
+		self.evalState = None
+
+
+	# Build a Board holding the same position as the given board (which may be a bitboard.BitBoard)
+	@staticmethod
+	def fromBoard(other):
+		b = Board(other.numRows, other.numColumns, other.winNum)
+		for column in range(other.numColumns):
+			for row in range(other.colFills[column]):
+				b.cells[row * b.numColumns + column] = str(other.checkSpace(row, column))
+		b.colFills = list(other.colFills)
+		b.lastPlay = list(other.lastPlay)
+		b.recompute()
+		return b
+
+
+	# Build a Board holding the position packed into an integer by encode(), with X's pieces where the code has a 1. As
+	# the code does not record the order of the moves, lastPlay is set to the top piece of a column belonging to the
+	# player who moved last (X if X has more pieces, otherwise O), choosing one that completes a line if there is one,
+	# so checkWin() is True for a won position.
+	@staticmethod
+	def fromCode(rows, columns, winNum, code):
+		b = Board(rows, columns, winNum)
+		height = rows + 1
+		if code < 0 or code >> (columns * height):
+			raise ValueError("invalid position code for a board of this size")
+		numPieces = [0, 0]
+		for column in range(columns):
+			bits = (code >> (column * height)) & ((1 << height) - 1)
+			fill = bits.bit_length() - 1
+			if fill < 0:
+				raise ValueError("invalid position code: column %d has no height marker" % column)
+			for row in range(fill):
+				isX = (bits >> row) & 1
+				b.cells[row * columns + column] = "X" if isX else "O"
+				numPieces[0 if isX else 1] += 1
+			b.colFills[column] = fill
+		b.recompute()
+
+		lastPlayer = "X" if numPieces[0] > numPieces[1] else "O"
+		if numPieces[0] + numPieces[1] > 0:
+			counts = b.getLineCounts(lastPlayer)
+			numComplete = sum(1 for count in counts if count >= winNum)
+			for column in range(columns):
+				row = b.colFills[column] - 1
+				if row < 0 or b.cells[row * columns + column] != lastPlayer:
+					continue
+				# in a game every complete line goes through the winning move
+				numThrough = sum(1 for line in b.lineTable.cellLines[row * columns + column] if counts[line] >= winNum)
+				if b.lastPlay[2] == "" or numThrough == numComplete:
+					b.lastPlay = [row, column, lastPlayer]
+					b.lastWin = numThrough > 0
+					if numThrough == numComplete:
+						break
+		return b
+
+
+	# Return the position packed into an integer. Each column uses numRows + 1 bits, starting at bit column * (numRows + 1)
+	# (the same layout as bitboard.BitBoard): the bits below the column's height are 1 for X's pieces and 0 for O's, and
+	# the bit at the height is 1 to mark the top. Every position has exactly one code, whatever order the moves were
+	# played in, and the code fits in numColumns * (numRows + 1) bits (see position.py for the packed bytes).
+	def encode(self):
+		code = 0
+		height = self.numRows + 1
+		cells = self.cells
+		numColumns = self.numColumns
+		for column in range(numColumns):
+			fill = self.colFills[column]
+			base = column * height
+			code |= 1 << (base + fill)
+			for row in range(fill):
+				if cells[row * numColumns + column] == "X":
+					code |= 1 << (base + row)
+		return code
+
+
+	# Recompute the line counts and the hashes from the contents of the board. This is only needed if cells has been
+	# changed directly rather than through addPiece() and removePiece().
+	def recompute(self):
+		self.lineCounts = dict()
+		self.hash = 0
+		self.mirrorHash = 0
+		for row in range(self.numRows):
+			for column in range(self.numColumns):
+				player = self.cells[row * self.numColumns + column]
+				if player != ' ':
+					counts = self.getLineCounts(player)
+					for line in self.lineTable.cellLines[row * self.numColumns + column]:
+						counts[line] += 1
+					self.hash ^= self.zobrist.getPieceKeys(player)[row * self.numColumns + column]
+					self.mirrorHash ^= self.zobrist.getMirrorPieceKeys(player)[row * self.numColumns + column]
+
+		if self.evaluator is not None:
+			self.evalState = self.evaluator.newState(self)
+
+		# the last move is a win if any line through it is complete
+		self.lastWin = False
+		lastRow, lastColumn, lastPlayer = self.lastPlay
+		if lastPlayer in self.lineCounts and lastRow >= 0:
+			counts = self.lineCounts[lastPlayer]
+			for line in self.lineTable.cellLines[lastRow * self.numColumns + lastColumn]:
+				if counts[line] >= self.winNum:
+					self.lastWin = True
+
+
+	# Set the evaluator used to score the position on this board (or None to remove it)
+	def setEvaluator(self, evaluator):
+		self.evaluator = evaluator
+		self.evalState = evaluator.newState(self) if evaluator is not None else None
+
+
+	# Return the list of line counts for the given player, creating it when the player is first seen
+	def getLineCounts(self, player):
+		counts = self.lineCounts.get(player)
+		if counts is None:
+			counts = [0] * self.lineTable.numLines
+			self.lineCounts[player] = counts
+		return counts
+
 
 	# This method adds a piece for the specified player to the specified column
 	def addPiece(self, column, player):
@@ -60,10 +212,27 @@ class Board:
 		# get the row to fill from the fill tracker
 		row = self.colFills[column]
 		# assign the space to the player and record the last move
-		self.gameBoard[row][column].value = player
+		cell = row * self.numColumns + column
+		self.cells[cell] = player
 		self.lastPlay = [row, column, player]
 		# increment the fill tracker to account for this move
 		self.colFills[column] = self.colFills[column] + 1
+
+		# add the piece to the hashes, and to the count of every line through its space, noting whether any line is now complete
+		self.hash ^= self.zobrist.getPieceKeys(player)[cell]
+		self.mirrorHash ^= self.zobrist.getMirrorPieceKeys(player)[cell]
+		counts = self.lineCounts.get(player)
+		if counts is None:
+			counts = self.getLineCounts(player)
+		won = False
+		for line in self.lineTable.cellLines[cell]:
+			counts[line] += 1
+			if counts[line] == self.winNum:
+				won = True
+		self.lastWin = won
+
+		if self.evaluator is not None:
+			self.evaluator.pieceAdded(self.evalState, cell, player)
 		return True
 
 
@@ -80,8 +249,19 @@ class Board:
 
 		# get the row containing the highest piece
 		row = self.colFills[column] - 1
+		# remove the piece from the hashes, and from the count of every line through its space
+		cell = row * self.numColumns + column
+		player = self.cells[cell]
+		self.hash ^= self.zobrist.getPieceKeys(player)[cell]
+		self.mirrorHash ^= self.zobrist.getMirrorPieceKeys(player)[cell]
+		counts = self.lineCounts[player]
+		for line in self.lineTable.cellLines[cell]:
+			counts[line] -= 1
+		self.lastWin = False
+		if self.evaluator is not None:
+			self.evaluator.pieceRemoved(self.evalState, cell, player)
 		# set the space to empty
-		self.gameBoard[row][column].value = ' '
+		self.cells[cell] = ' '
 		self.lastPlay = [row, column, ' ']
 		# decrement the fill tracker to account for this move
 		self.colFills[column] = self.colFills[column] - 1
@@ -91,180 +271,36 @@ class Board:
 	# This method returns True if the last play resulted in a win for that player, and returns False.
 	# Note that this only checks whether the last move was a winning move, and not whether there is already
 	# a winning number of pieces in a line.
+	# Whether the last move completed a line is worked out by addPiece(), so this is just a lookup.
 	def checkWin(self):
 		if self.lastPlay[2] == ' ':
 			return False
+		return self.lastWin
 
-		# get the details of the last move
-		lastRow = self.lastPlay[0]
-		lastColumn = self.lastPlay[1]
-		lastPlayer = self.lastPlay[2]
-
-		# Check whether there is a winning number of pieces in a column. 
-		# Track how many pieces in a line have been found so far (initially 1 from the last move)
-		rowCounter = 1
-		foundRow = 1
-		# Record whether should check upwards and downwards in the current column
-		uCount = True
-		dCount = True
-		# Check upwards and downwards to see if there is a winning number of pieces in a line
-		while foundRow < self.winNum:
-
-			if not uCount and not dCount:
-				break
-
-			if lastRow - rowCounter < 0:
-				dCount = False
-
-			if lastRow + rowCounter >= self.numRows:
-				uCount = False
-
-			change = False
-			if dCount:
-				if self.gameBoard[lastRow - rowCounter][lastColumn].value == lastPlayer:
-					change = True
-					foundRow = foundRow + 1
-				else:
-					dCount = False
-
-			if uCount:
-				if self.gameBoard[lastRow + rowCounter][lastColumn].value == lastPlayer:
-					change = True
-					foundRow = foundRow + 1
-				else:
-					uCount = False
-
-			if change:
-				rowCounter = rowCounter + 1
-
-		if foundRow >= self.winNum:
-			return True
-
-		# Check whether there is a winning number of pieces in a row. 
-		# Track how many pieces in a line have been found so far (initially 1 from the last move)
-		colCounter = 1
-		foundCol = 1
-		# Record whether should check forwards and backwards in the current column
-		bCount = True
-		fCount = True
-
-		# Check forwards and backwards to see if there is a winning number of pieces in a line
-		while foundCol < self.winNum:
-
-			if not bCount and not fCount:
-				break
-
-			if lastColumn - colCounter < 0:
-				bCount = False
-
-			if lastColumn + colCounter >= self.numColumns:
-				fCount = False
-
-			change = False
-			if bCount:
-				if self.gameBoard[lastRow][lastColumn - colCounter].value == lastPlayer:
-					change = True
-					foundCol = foundCol + 1
-				else:
-					bCount = False
-
-			if fCount:
-				if self.gameBoard[lastRow][lastColumn + colCounter].value == lastPlayer:
-					change = True
-					foundCol = foundCol + 1
-				else:
-					fCount = False
-
-			if change:
-				colCounter = colCounter + 1	
-
-		if foundCol >= self.winNum:
-			return True
-
-		# Check whether there is a winning number of pieces in a upper left to lower right diagonal. 
-		# Track how many pieces in a line have been found so far (initially 1 from the last move)
-		diagCounter = 1
-		foundDiag = 1
-		# Record whether should check upwards left and downwards right from the last move
-		ulCount = True
-		drCount = True
-
-		# Check each diagonal to see if there is a winning number of pieces in a line
-		while foundDiag < self.winNum:
-			if not ulCount and not drCount:
-				# return False
-				break
-
-			if lastRow + diagCounter >= self.numRows or lastColumn - diagCounter < 0:
-				ulCount = False
-
-			if lastRow - diagCounter < 0 or lastColumn + diagCounter >= self.numColumns:
-				drCount = False
-
-			change = False
-
-			if ulCount:
-				if self.gameBoard[lastRow + diagCounter][lastColumn - diagCounter].value == lastPlayer:
-					change = True
-					foundDiag = foundDiag + 1
-				else:
-					ulCount = False
-
-			if drCount:
-				if self.gameBoard[lastRow - diagCounter][lastColumn + diagCounter].value == lastPlayer:
-					change = True
-					foundDiag = foundDiag + 1
-				else:
-					drCount = False
-
-			if change:
-				diagCounter = diagCounter + 1
-
-		if foundDiag >= self.winNum:
-			return True
-
-		# Check whether there is a winning number of pieces in a upper right to lower left diagonal. 
-		# Track how many pieces in a line have been found so far (initially 1 from the last move)
-		diagCounter = 1
-		foundDiag = 1
-		# Record whether should check upwards right and downwards left from the last move
-		urCount = True
-		dlCount = True
-		# Check each diagonal to see if there is a winning number of pieces in a line
-		while foundDiag < self.winNum:
-			if not urCount and not dlCount:
-				return False
-
-			if lastRow + diagCounter >= self.numRows or lastColumn + diagCounter >= self.numColumns:
-				urCount = False
-
-			if lastRow - diagCounter < 0 or lastColumn - diagCounter < 0:
-				dlCount = False
-
-			change = False
 
-			if urCount:
-				if self.gameBoard[lastRow + diagCounter][lastColumn + diagCounter].value == lastPlayer:
-					change = True
-					foundDiag = foundDiag + 1
-				else:
-					urCount = False
-
-			if dlCount:
-				if self.gameBoard[lastRow - diagCounter][lastColumn - diagCounter].value == lastPlayer:
-					change = True
-					foundDiag = foundDiag + 1
-				else:
-					dlCount = False
-
-			if change:
-				diagCounter = diagCounter + 1
+	# This method returns True if the specified player would win by adding a piece to the specified column, without
+	# changing the board. The move wins if one of the lines through the space it fills already has winNum - 1 of the
+	# player's pieces.
+	def isWinningMove(self, column, player):
+		row = self.colFills[column]
+		if row >= self.numRows:
+			return False
+		counts = self.getLineCounts(player)
+		for line in self.lineTable.cellLines[row * self.numColumns + column]:
+			if counts[line] == self.winNum - 1:
+				return True
+		return False
 
-		if foundDiag >= self.winNum:
-			return True
 
+	# This method returns True if the specified player would complete a line by having a piece in the specified empty
+	# space, which need not be playable yet (e.g., it may be above the next space in its column)
+	def isWinningCell(self, row, column, player):
+		counts = self.getLineCounts(player)
+		for line in self.lineTable.cellLines[row * self.numColumns + column]:
+			if counts[line] == self.winNum - 1:
+				return True
 		return False
-	
+
 
 	# Check whether the board is full, i.e., if it is possible to make a move 
 	def checkFull(self):
@@ -274,27 +310,71 @@ class Board:
 		return True
 
 
-	# Check what is in the specified location (i.e., return the player name or ' ')
+	# Check what is in the specified location (i.e., return the player name or ' '). This is the string itself rather
+	# than a Space, so use str(board.checkSpace(row, column)) or board.checkSpace(row, column) rather than .value.
 	def checkSpace(self, row, column):
-		return self.gameBoard[row][column]
+		return self.cells[row * self.numColumns + column]
+
+
+	# The board as a list of rows of Spaces, for code that uses board.gameBoard[row][column]. The lists are built on
+	# demand, but each Space is a BoardSpace that reads and writes the board, so board.gameBoard[row][column].value = name
+	# still changes the board.
+	@property
+	def gameBoard(self):
+		rows = list()
+		for row in range(self.numRows):
+			rows.append([BoardSpace(self, row * self.numColumns + column) for column in range(self.numColumns)])
+		return rows
 
 
 	# Print a simple visualisation of the current board (where 0,0 is bottom left)
 	def printBoard(self):
-		for row in reversed(self.gameBoard):
+		for row in reversed(range(self.numRows)):
 			print("| ", end='')
-			for col in row:
-				print(col, " ", end='')
+			for column in range(self.numColumns):
+				print(self.cells[row * self.numColumns + column], " ", end='')
 			print("|")
 		for i in range(self.numColumns):
 			print("---", end='')
 		print("---")
 
 
-	# Copy the current board
+	# Copy the current board. Nothing is rebuilt: the lists holding the position are copied with list(), and the tables
+	# that only depend on the size of the board are shared.
 	def copy(self):
-		b = Board(self.numRows, self.numColumns, self.winNum)
-		b.gameBoard = copy.deepcopy(self.gameBoard)
-		b.lastPlay = copy.deepcopy(self.lastPlay)
-		b.colFills = copy.deepcopy(self.colFills)
+		b = Board.__new__(Board)
+		b.numRows = self.numRows
+		b.numColumns = self.numColumns
+		b.winNum = self.winNum
+		b.cells = list(self.cells)
+		b.colFills = list(self.colFills)
+		b.lastPlay = list(self.lastPlay)
+		b.lineTable = self.lineTable
+		b.lineCounts = {player: list(counts) for player, counts in self.lineCounts.items()}
+		b.lastWin = self.lastWin
+		b.zobrist = self.zobrist
+		b.hash = self.hash
+		b.mirrorHash = self.mirrorHash
+		b.evaluator = self.evaluator
+		b.evalState = self.evaluator.copyState(self.evalState) if self.evaluator is not None else None
 		return b
+
+
+	# Return a snapshot of the position, which restore() can later return the board to. The snapshot only holds tuples
+	# and numbers, so it cannot be changed, and can be kept or handed out without copying the board. (The evaluator's
+	# state is not included; restore() rebuilds it.)
+	def snapshot(self):
+		lineCounts = tuple((player, tuple(counts)) for player, counts in self.lineCounts.items())
+		return (tuple(self.cells), tuple(self.colFills), tuple(self.lastPlay), lineCounts, self.lastWin, self.hash,
+			self.mirrorHash)
+
+
+	# Return the board to the position in a snapshot taken from this board (or another board of the same size)
+	def restore(self, snapshot):
+		cells, colFills, lastPlay, lineCounts, self.lastWin, self.hash, self.mirrorHash = snapshot
+		self.cells = list(cells)
+		self.colFills = list(colFills)
+		self.lastPlay = list(lastPlay)
+		self.lineCounts = {player: list(counts) for player, counts in lineCounts}
+		if self.evaluator is not None:
+			self.evalState = self.evaluator.newState(self)
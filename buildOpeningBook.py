@@ -0,0 +1,81 @@
+import board
+import player
+import evaluation
+import openingBook
+import argparse
+
+# This script builds an opening book (see openingBook.py), e.g., for every position in the first 6 moves on a 6x7
+# board with 4 in a line to win, searched to depth 8:
+#
+#     python buildOpeningBook.py 6 7 4 6 book674.bin --depth 8
+
+
+# This function works out the best move for every position reached in the first plies moves of a game on a board with
+# the given size, and writes them to an opening book at path. The moves are chosen by searcherX and searcherO (Players
+# for X and O), by default PVS with the heuristic evaluator and a transposition table at depth 8. It returns the number
+# of positions in the book.
+def buildBook(rows, columns, winNum, plies, path, searcherX=None, searcherO=None, progress=False):
+	if searcherX is None:
+		searcherX = player.Player("X", depth=8, transpositionSize=2**20, searchMode="pvs", moveOrdering="dynamic",
+			evaluator=evaluation.HeuristicEvaluator(rows, columns, winNum))
+	if searcherO is None:
+		searcherO = player.Player("O", depth=searcherX.depth, transpositionSize=searcherX.transpositionSize,
+			searchMode=searcherX.searchMode, moveOrdering=searcherX.moveOrdering, evaluator=searcherX.evaluator)
+
+	# collect every position (that is not already won or drawn) in the first plies moves, with its key
+	positions = dict()
+	collectPositions(board.Board(rows, columns, winNum), "X", plies, positions)
+
+	moves = dict()
+	for i, (key, (gameBoard, name)) in enumerate(sorted(positions.items())):
+		searcher = searcherX if name == "X" else searcherO
+		moves[key] = openingBook.mirrorMove(gameBoard, searcher.getMoveAlphaBeta(gameBoard.copy()))
+		if progress:
+			print("\rSearched %d of %d positions" % (i + 1, len(positions)), end='')
+	if progress:
+		print()
+
+	with open(path, "wb") as file:
+		file.write(openingBook.HEADER.pack(openingBook.MAGIC, rows, columns, winNum, plies, len(moves)))
+		for key in sorted(moves):
+			file.write(openingBook.RECORD.pack(key, moves[key]))
+	return len(moves)
+
+
+# This function adds the position on the board, and every position reachable from it in the given number of moves, to
+# positions (a dictionary from key to a copy of the board and the name of the player to move). Positions are keyed by
+# their canonical hash, so only one of each position and its mirror image is kept.
+def collectPositions(gameBoard, name, plies, positions):
+	key = openingBook.getKey(gameBoard, name == "X")
+	if key in positions or plies < 0:
+		return
+	positions[key] = (gameBoard.copy(), name)
+	if plies == 0:
+		return
+
+	nextName = "O" if name == "X" else "X"
+	for col in range(gameBoard.numColumns):
+		if gameBoard.addPiece(col, name):
+			if not gameBoard.checkWin() and not gameBoard.checkFull():
+				collectPositions(gameBoard, nextName, plies - 1, positions)
+			gameBoard.removePiece(col)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Build an opening book for Connect.")
+	parser.add_argument("rows", type=int)
+	parser.add_argument("columns", type=int)
+	parser.add_argument("winNum", type=int)
+	parser.add_argument("plies", type=int, help="the book covers every position in the first plies moves")
+	parser.add_argument("output", help="the file to write the book to")
+	parser.add_argument("--depth", type=int, default=8, help="the depth searched for each position")
+	args = parser.parse_args()
+
+	searcherX = player.Player("X", depth=args.depth, transpositionSize=2**20, searchMode="pvs", moveOrdering="dynamic",
+		evaluator=evaluation.HeuristicEvaluator(args.rows, args.columns, args.winNum))
+	count = buildBook(args.rows, args.columns, args.winNum, args.plies, args.output, searcherX, progress=True)
+	print("Wrote", count, "positions to", args.output)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,194 @@
+import tablebase
+import argparse
+import array
+import math
+
+# This script builds a tablebase (see tablebase.py) by retrograde analysis, e.g., for every position on a 4x5 board
+# with 3 in a line to win, or only the positions with at least 12 pieces on a 5x6 board:
+#
+#     python buildTablebase.py 4 5 3 tb453.bin
+#     python buildTablebase.py 5 6 3 tb563.bin --min-pieces 12
+#
+# It first finds every position reachable from the empty board, one layer (number of pieces) at a time, and then works
+# out their results from the last layer back to the first: a position's result is the best of the results of its
+# moves, which either end the game or lead to a position in the next layer, whose result is already known. The small
+# configurations in the testPlay.py notes have 20 (3x3, 2 in a line), 11978 (4x4, 3 in a line), 154491 (4x5, 3 in a
+# line) and 15246091 (5x6, 3 in a line) positions, counting a position and its mirror image once. The last takes
+# about a quarter of an hour to build, and a 122MB file.
+#
+# Positions are handled as position codes (see position.py), and the moves are made on the codes with the same bit
+# operations as bitboard.BitBoard, which is much faster than making them on a board.
+
+
+# A TablebaseBuilder finds the positions and results for a tablebase on a board of the given size
+class TablebaseBuilder:
+
+	def __init__(self, rows, columns, winNum):
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+		self.numCells = rows * columns
+		self.colHeight = rows + 1
+		if self.numCells > tablebase.DISTANCE_MASK or columns * (rows + 1) > 56:
+			raise ValueError("the board is too large for a tablebase")
+
+		height = self.colHeight
+		# the bottom space of each column, and every space of each column (without the space above the top, where the
+		# code of a position marks the top of the column)
+		self.bottomBits = [1 << (column * height) for column in range(columns)]
+		self.columnBits = [((1 << rows) - 1) << (column * height) for column in range(columns)]
+		self.bottomMask = sum(self.bottomBits)
+		self.columnMask = (1 << height) - 1
+		# belowMasks[k] has the spaces of each column that have at least k spaces above them in the column, so that
+		# (code >> k) & belowMasks[k] moves each bit of a code k spaces down without leaving its column
+		self.belowMasks = [sum(((1 << (height - k)) - 1) << (column * height) for column in range(columns))
+			for k in range(height)]
+		# the steps between neighbouring bits along each kind of line: upwards, across, and the two diagonals
+		self.steps = (1, height, height + 1, height - 1)
+
+
+	# This method returns whether the pieces (bits) include a line of winNum
+	def isWin(self, pieces):
+		for step in self.steps:
+			line = pieces
+			for k in range(1, self.winNum):
+				line &= pieces >> (k * step)
+			if line:
+				return True
+		return False
+
+
+	# This method returns the X pieces and all the pieces (as bits) of the position with the given code. The top bit
+	# of each column of a code marks the top of the column, so it is the set bit with no set bits above it.
+	def splitCode(self, code):
+		above = 0
+		for k in range(1, self.colHeight):
+			above |= (code >> k) & self.belowMasks[k]
+		markers = code & ~above
+		return code ^ markers, markers - self.bottomMask
+
+
+	# This method returns the canonical code (see position.canonicalCode()) of the position with the given pieces
+	def canonicalCode(self, xPieces, pieces):
+		code = xPieces | (pieces + self.bottomMask)
+		height = self.colHeight
+		mirrored = 0
+		shift = (self.numColumns - 1) * height
+		for column in range(self.numColumns):
+			mirrored |= ((code >> (column * height)) & self.columnMask) << (shift - column * height)
+		return min(code, mirrored)
+
+
+	# This method returns the moves from the position with the given code and number of pieces, as a list of
+	# (outcome, code) in column order: outcome is "win" if the move wins, "draw" if it fills the board and None
+	# otherwise, when code is the canonical code of the position it leads to
+	def moves(self, code, numPieces):
+		xPieces, pieces = self.splitCode(code)
+		xToMove = numPieces % 2 == 0
+		mover = xPieces if xToMove else xPieces ^ pieces
+		full = numPieces + 1 == self.numCells
+		found = list()
+		for column in range(self.numColumns):
+			bit = (pieces + self.bottomBits[column]) & self.columnBits[column]
+			if not bit:
+				continue
+			if self.isWin(mover | bit):
+				found.append(("win", None))
+			elif full:
+				found.append(("draw", None))
+			else:
+				found.append((None, self.canonicalCode(xPieces | bit if xToMove else xPieces, pieces | bit)))
+		return found
+
+
+	# This method returns the layers of positions reachable from the empty board where the game is not over, as a list
+	# indexed by the number of pieces of arrays of canonical codes
+	def findPositions(self, progress=False):
+		layers = [array.array('Q', [self.canonicalCode(0, 0)])]
+		for numPieces in range(self.numCells - 1):
+			found = set()
+			for code in layers[-1]:
+				for outcome, childCode in self.moves(code, numPieces):
+					if outcome is None:
+						found.add(childCode)
+			layers.append(array.array('Q', sorted(found)))
+			if progress:
+				print("\rFound %d positions with %d pieces" % (len(found), numPieces + 1), end='')
+		if progress:
+			print()
+		return layers
+
+
+# This function builds a tablebase for a board of the given size, with every reachable position that has at least
+# minPieces pieces, and writes it to path. It returns the number of positions in the tablebase.
+def buildTablebase(rows, columns, winNum, path, minPieces=0, progress=False):
+	builder = TablebaseBuilder(rows, columns, winNum)
+	layers = builder.findPositions(progress)
+	numPositions = sum(len(layer) for layer in layers[minPieces:])
+
+	size = tablebase.slotSize(rows, columns)
+	numSlots = max(1, math.ceil(numPositions / tablebase.LOAD_FACTOR))
+	slots = bytearray(numSlots * size)
+
+	# Solve the layers from the last back, storing each position's result in its slot, where the positions of the
+	# layer before can find it
+	for numPieces in range(len(layers) - 1, minPieces - 1, -1):
+		for code in layers[numPieces]:
+			best = None
+			for outcome, childCode in builder.moves(code, numPieces):
+				if outcome == "win":
+					result, distance = 1, 1
+				elif outcome == "draw":
+					result, distance = 0, 1
+				else:
+					childResult, childDistance = tablebase.unpackResult(findSlot(slots, size, numSlots, childCode)[1])
+					result, distance = -childResult, childDistance + 1
+				if best is None or tablebase.resultScore(result, distance) > tablebase.resultScore(*best):
+					best = (result, distance)
+
+			slot, byte = findSlot(slots, size, numSlots, code)
+			offset = slot * size
+			slots[offset:offset + size] = ((code << 8) | tablebase.packResult(*best)).to_bytes(size, "little")
+		if progress:
+			print("\rSolved the positions with %d pieces" % numPieces, end='')
+	if progress:
+		print()
+
+	with open(path, "wb") as file:
+		file.write(tablebase.HEADER.pack(tablebase.MAGIC, rows, columns, winNum, minPieces, size, numPositions,
+			numSlots))
+		file.write(slots)
+	return numPositions
+
+
+# This function returns the slot holding the position with the given code in the slots being built, or the empty slot
+# where it should go, with the position's result byte (None for an empty slot)
+def findSlot(slots, size, numSlots, code):
+	slot = tablebase.homeSlot(code, numSlots)
+	while True:
+		word = int.from_bytes(slots[slot * size:(slot + 1) * size], "little")
+		if word == 0:
+			return slot, None
+		if word >> 8 == code:
+			return slot, word & 0xFF
+		slot += 1
+		if slot == numSlots:
+			slot = 0
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Build a tablebase of exact results by retrograde analysis.")
+	parser.add_argument("rows", type=int)
+	parser.add_argument("columns", type=int)
+	parser.add_argument("winNum", type=int)
+	parser.add_argument("path", help="the file to write the tablebase to")
+	parser.add_argument("--min-pieces", dest="minPieces", type=int, default=0,
+		help="only store the positions with at least this many pieces")
+	args = parser.parse_args()
+
+	numPositions = buildTablebase(args.rows, args.columns, args.winNum, args.path, args.minPieces, progress=True)
+	print("Wrote %d positions to %s" % (numPositions, args.path))
+
+
+if __name__ == "__main__":
+	main()
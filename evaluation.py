@@ -0,0 +1,149 @@
+import lines
+
+# An evaluator gives a score to positions that are not won or drawn, so that a search that stops at its maximum
+# depth can still tell good positions from bad ones. Scores are from the point of view of the first player ("X"):
+# positive scores are good for the first player and negative scores are good for the second player.
+#
+# Evaluators are kept up to date incrementally by the board. A board with an evaluator (see Board.setEvaluator())
+# holds the evaluator's state for that position in board.evalState, and calls pieceAdded() and pieceRemoved() as
+# pieces are added and removed, so score() never needs to look at the whole board. Any evaluator must provide:
+#
+#     newState(board)                       return the state for the position on the given board
+#     copyState(state)                      return a copy of a state
+#     pieceAdded(state, cell, player)       update a state after player's piece is added to the cell
+#     pieceRemoved(state, cell, player)     update a state after player's piece is removed from the cell
+#     score(state)                          return the score of the position
+#
+# where a cell is row * columns + column. winScore is the value the search gives to a won position, which must be
+# more than any score the evaluator returns.
+
+
+# The state of a HeuristicEvaluator for one position
+class HeuristicState:
+
+	def __init__(self, numLines):
+		# counts[side][line] is the number of pieces that side has in the line, and sums[side][line] is the sum of
+		# the cells of those pieces
+		self.counts = [[0] * numLines, [0] * numLines]
+		self.sums = [[0] * numLines, [0] * numLines]
+		self.score = 0
+
+
+# The HeuristicEvaluator scores every window of winNum spaces that could still become a winning line (see lines.py).
+# A window that holds pieces of only one player is worth windowWeights[n] to that player, where n is the number of
+# their pieces in it. Each piece is also worth more the closer it is to the middle column, as more windows pass
+# through the middle of the board.
+#
+# A window missing just one piece is a threat. Threats are worth an extra threatBonus if the empty space is on a row
+# that suits the player: counting rows from 1 at the bottom, the first player wants threats on odd rows and the second
+# player on even rows, because when the board fills up those are the spaces each player will be able to claim.
+class HeuristicEvaluator:
+
+	winScore = 1000000
+
+	def __init__(self, rows, columns, winNum, players=("X", "O"), windowWeights=None, centerWeight=1, threatBonus=None):
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+		self.lineTable = lines.getLineTable(rows, columns, winNum)
+
+		# side 0 is the first player (positive scores) and side 1 the second player (negative scores)
+		self.sides = {players[0]: 0, players[1]: 1}
+
+		# By default a window with n pieces is worth 4 times as much as one with n - 1. A full window is a win, which
+		# the search scores itself, so it is worth nothing here.
+		if windowWeights is None:
+			windowWeights = [0] + [4 ** (count - 1) for count in range(1, winNum)]
+		self.windowWeights = list(windowWeights) + [0]
+		if threatBonus is None:
+			threatBonus = self.windowWeights[winNum - 1]
+
+		# the value of each cell for being near the middle column, and whether each cell is a good threat for each side
+		self.cellScores = list()
+		self.threatScores = [list(), list()]
+		for row in range(rows):
+			for column in range(columns):
+				self.cellScores.append(centerWeight * ((columns - 1 - abs(2 * column - (columns - 1))) // 2))
+				self.threatScores[0].append(threatBonus if row % 2 == 0 else 0)
+				self.threatScores[1].append(threatBonus if row % 2 == 1 else 0)
+
+		# the sum of all the cells of each line, so the empty cell of a threat is lineSums[line] - sums[side][line]
+		self.lineSums = [sum(cells) for cells in self.lineTable.lines]
+
+
+	# Return the state for the position on the given board
+	def newState(self, board):
+		state = HeuristicState(self.lineTable.numLines)
+		for row in range(board.numRows):
+			for column in range(board.numColumns):
+				player = str(board.checkSpace(row, column))
+				if player != ' ':
+					self.pieceAdded(state, row * board.numColumns + column, player)
+		return state
+
+
+	# Return a copy of a state
+	def copyState(self, state):
+		copied = HeuristicState.__new__(HeuristicState)
+		copied.counts = [list(state.counts[0]), list(state.counts[1])]
+		copied.sums = [list(state.sums[0]), list(state.sums[1])]
+		copied.score = state.score
+		return copied
+
+
+	# This method returns how much the score changes, from the point of view of the given side, when that side adds a
+	# piece to the cell. The counts and sums must be those from before the piece is added.
+	def addedValue(self, state, cell, side):
+		ownCounts = state.counts[side]
+		otherCounts = state.counts[1 - side]
+		weights = self.windowWeights
+		threatCount = self.winNum - 1
+
+		change = self.cellScores[cell]
+		for line in self.lineTable.cellLines[cell]:
+			own = ownCounts[line]
+			other = otherCounts[line]
+			if other == 0:
+				# the window is still open for this side, and now holds one more of its pieces
+				change += weights[own + 1] - weights[own]
+				if own + 1 == threatCount:
+					change += self.threatScores[side][self.lineSums[line] - state.sums[side][line] - cell]
+				elif own == threatCount:
+					change -= self.threatScores[side][self.lineSums[line] - state.sums[side][line]]
+			elif own == 0:
+				# the window was open for the other side, and is now blocked
+				change += weights[other]
+				if other == threatCount:
+					change += self.threatScores[1 - side][self.lineSums[line] - state.sums[1 - side][line]]
+		return change
+
+
+	# Update a state after the player's piece is added to the cell
+	def pieceAdded(self, state, cell, player):
+		side = self.sides[player]
+		change = self.addedValue(state, cell, side)
+		state.score += change if side == 0 else -change
+
+		counts = state.counts[side]
+		sums = state.sums[side]
+		for line in self.lineTable.cellLines[cell]:
+			counts[line] += 1
+			sums[line] += cell
+
+
+	# Update a state after the player's piece is removed from the cell
+	def pieceRemoved(self, state, cell, player):
+		side = self.sides[player]
+		counts = state.counts[side]
+		sums = state.sums[side]
+		for line in self.lineTable.cellLines[cell]:
+			counts[line] -= 1
+			sums[line] -= cell
+
+		change = self.addedValue(state, cell, side)
+		state.score -= change if side == 0 else -change
+
+
+	# Return the score of the position
+	def score(self, state):
+		return state.score
@@ -1,19 +1,36 @@
 import board
+import bitboard
+import position
 
 # The game class stores the board and players and plays the game
 class Game:
 
     # Store the players and create a board with the given specification
     # IMPORTANT: Note that the coursework player is always player 1 (and so always goes first)
-	def __init__(self, cwPlayer, player2, rows, columns, winNum):
+    # The board used for the game can be changed with boardClass, e.g., bitboard.BitBoard for faster copies.
+    # If ponder is True, players that ponder (see player.Player.startPondering()) search while the other player chooses
+    # their move. This is off by default, as the pondering thread shares the process (and the GIL) with the game, so it
+    # slows down an opponent searching in the same process, e.g., in tournament.py or testPlay.py. It is meant for games
+    # against a person (see humanPlayer.py) or another program.
+	def __init__(self, cwPlayer, player2, rows, columns, winNum, boardClass=board.Board, ponder=False):
 		self.player1 = cwPlayer
 		self.player2 = player2
-		self.gameBoard = board.Board(rows, columns, winNum)
+		if boardClass is bitboard.BitBoard:
+			self.gameBoard = bitboard.BitBoard(rows, columns, winNum, (cwPlayer.name, player2.name))
+		else:
+			self.gameBoard = boardClass(rows, columns, winNum)
 		self.listOfPlayers = (cwPlayer, player2)
+		# Each player is handed its own board, which is returned to the game's position with restore() before each of
+		# its moves, so the game board cannot be changed by a player and no board is built during the game
+		self.playerBoards = (self.gameBoard.copy(), self.gameBoard.copy())
+		# the columns played so far, with None for a turn lost to an illegal move
+		self.moves = list()
+		self.ponder = ponder
 
     # Play the game itself, with or without alpha-beta pruning according to whether the pruning 
     # argument is true or false respectively.
-	def playGame(self, pruning, oppPruning=False):
+    # If recordPath is given, the record of the game is appended to that file at the end (see position.py).
+	def playGame(self, pruning, oppPruning=False, recordPath=None):
 		# Keep track of whether the game is won or the board is full
 		won = False
 		full = False
@@ -27,24 +44,41 @@ class Game:
 
 
 
+			playerBoard = self.playerBoards[index]
+			playerBoard.restore(self.gameBoard.snapshot())
 			if index == 0 and pruning:
-				move = currPlayer.getMoveAlphaBeta(self.gameBoard.copy())
+				move = currPlayer.getMoveAlphaBeta(playerBoard)
 			elif index == 1 and oppPruning:
-				move = currPlayer.getMoveAlphaBeta(self.gameBoard.copy())
+				move = currPlayer.getMoveAlphaBeta(playerBoard)
 			else:
-				move = currPlayer.getMove(self.gameBoard.copy())
+				move = currPlayer.getMove(playerBoard)
 				
 			moveDone = self.gameBoard.addPiece(move, currPlayer.name)
 			if moveDone == True:
+				self.moves.append(move)
 				won = self.gameBoard.checkWin()
 				full = self.gameBoard.checkFull()
+				# let players that ponder (see player.Player.startPondering()) search while the other player thinks
+				if self.ponder:
+					for p in self.listOfPlayers:
+						if hasattr(p, "startPondering"):
+							p.startPondering(self.gameBoard)
 				# Uncomment the following line to print each move
 				#self.gameBoard.printBoard()
 			else:
+				self.moves.append(None)
 				print("Player made illegal move. Turn lost.")
 
 			index = (index + 1) % 2
 
+		if won:
+			result = 1 if currPlayer == self.player1 else -1
+		else:
+			result = 0
+		if recordPath is not None:
+			position.writeRecord(recordPath, self.gameBoard.numRows, self.gameBoard.numColumns, self.gameBoard.winNum,
+				result, self.moves)
+
 		if won and currPlayer == self.player1:
 			#print("You Win!")
 			#print("Nodes expanded:", self.player1.numExpanded)
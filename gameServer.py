@@ -0,0 +1,417 @@
+import board
+import player
+import mctsPlayer
+import evaluation
+import argparse
+import asyncio
+import concurrent.futures
+import sys
+import time
+
+# This script runs a server that hosts many games at once between clients and the engine (the players in player.py and
+# mctsPlayer.py). It is built on asyncio, so a single process handles every connection and game, and the engine's
+# searches run in a pool of worker processes, so the server keeps answering other games while the engine is thinking.
+#
+# Clients talk to the server with one command per line, either over TCP:
+#
+#     python gameServer.py --tcp 127.0.0.1:8765
+#
+# or over stdin and stdout (the default), which lets a local program, or a person at a terminal, play directly:
+#
+#     python gameServer.py
+#
+# The commands are (columns are numbered from 0, as in the rest of the code):
+#
+#     NEW rows columns winNum first|second [depth=N] [mode=alphabeta|pvs|mcts|solve] [playouts=N] [clock=S]
+#         Start a game, with the client moving first or second. The engine searches to the given depth (or with mcts, the
+#         given number of playouts). If clock is given, each side has S seconds for the whole game: a client that runs
+#         out of time loses, and the engine uses part of its remaining time for each move rather than a fixed depth.
+#         The solve mode has no time limit (it searches until it has solved the position), so it cannot have a clock,
+#         and it is only allowed on boards of up to --max-solve-cells spaces. The depth and playouts are capped at the
+#         server's --max-depth and --max-playouts, so a single game cannot keep the engine processes busy indefinitely.
+#         The reply is "GAME id", followed by the engine's first move if it moves first.
+#     PLAY id column
+#         Play a move. The reply is "OK id column", then "MOVE id column" with the engine's reply.
+#     BOARD id
+#         The reply is "BOARD id moves clockX clockO", where moves lists the columns played so far (or '-' if none), and
+#         the clocks are the seconds each side has left (or '-' without a clock).
+#     RESIGN id
+#     QUIT
+#
+# When a game ends the server sends "RESULT id win|loss|draw reason", from the client's point of view, where the
+# reason is "line", "full", "time" or "resign", and the server forgets the game, so its id can no longer be used. If
+# the engine's search fails, the server sends "ERROR id message" and then "RESULT id aborted engine".
+# Errors are reported as "ERROR message".
+
+ENGINE_MODES = ("alphabeta", "pvs", "mcts", "solve")
+
+# The default limits on the engine settings a client can ask for, which keep a move on the 6x7 board to a few seconds
+# (about 2s at depth 10, and 3s for 20000 playouts, from the empty board). Solving the empty board takes about 4s with
+# 20 spaces (4x5, 4 in a line), and about 45s with 25 (5x5, 4 in a line).
+MAX_DEPTH = 10
+MAX_PLAYOUTS = 20000
+MAX_SOLVE_CELLS = 20
+
+
+# This function finds the engine's move in a worker process. The board is rebuilt from the moves played so far, and the
+# player is created with the game's engine settings (and the time limit for the move, if the game has a clock).
+def searchMove(engine, rows, columns, winNum, moves, timeLimit):
+	gameBoard = board.Board(rows, columns, winNum)
+	name = "X"
+	for move in moves:
+		gameBoard.addPiece(move, name)
+		name = "O" if name == "X" else "X"
+
+	mode = engine["mode"]
+	if mode == "mcts":
+		searcher = mctsPlayer.MCTSPlayer(name, playouts=engine["playouts"], timeLimit=timeLimit)
+	else:
+		settings = dict(transpositionSize=2**16, moveOrdering="dynamic", timeLimit=timeLimit)
+		if mode == "pvs":
+			settings["searchMode"] = "pvs"
+			settings["evaluator"] = evaluation.HeuristicEvaluator(rows, columns, winNum)
+		elif mode == "solve":
+			settings["searchMode"] = "solve"
+		searcher = player.Player(name, depth=engine["depth"], **settings)
+	return searcher.getMoveAlphaBeta(gameBoard)
+
+
+# A game being played on the server between a client and the engine
+class ServerGame:
+
+	def __init__(self, gameId, rows, columns, winNum, clientName, engine, clock, send):
+		self.gameId = gameId
+		self.board = board.Board(rows, columns, winNum)
+		self.moves = list()
+		self.clientName = clientName
+		self.engineName = "O" if clientName == "X" else "X"
+		self.engine = engine
+		# the function that sends a line to the client that owns the game
+		self.send = send
+
+		# The seconds each side has left (if the game has a clock), when the current turn started, and the timer that
+		# ends the game if the client runs out of time
+		self.clock = {"X": clock, "O": clock} if clock is not None else None
+		self.turnStart = time.time()
+		self.timer = None
+
+		# the result from the client's point of view and the reason, once the game is over
+		self.result = None
+
+
+	# Return the name of the player to move
+	def toMove(self):
+		return "X" if len(self.moves) % 2 == 0 else "O"
+
+
+	# Take the time since the turn started off the clock of the player who was to move, and start the next turn. Returns
+	# False if the player ran out of time.
+	def stopClock(self):
+		now = time.time()
+		if self.clock is None:
+			self.turnStart = now
+			return True
+		name = self.toMove()
+		self.clock[name] -= now - self.turnStart
+		self.turnStart = now
+		return self.clock[name] > 0
+
+
+	# Play a legal move for the player to move, and work out whether it ended the game
+	def play(self, column):
+		name = self.toMove()
+		self.board.addPiece(column, name)
+		self.moves.append(column)
+		if self.board.checkWin():
+			self.result = ("win" if name == self.clientName else "loss", "line")
+		elif self.board.checkFull():
+			self.result = ("draw", "full")
+
+
+# The server holds the games, and handles the commands from every client
+class GameServer:
+
+	def __init__(self, workers=None, executor=None, maxDepth=MAX_DEPTH, maxPlayouts=MAX_PLAYOUTS,
+			maxSolveCells=MAX_SOLVE_CELLS):
+		# the pool the engine searches run in (by default a pool of processes)
+		self.executor = executor if executor is not None else concurrent.futures.ProcessPoolExecutor(workers)
+		# the largest depth and number of playouts a game's engine uses, and the largest board it may solve
+		self.maxDepth = maxDepth
+		self.maxPlayouts = maxPlayouts
+		self.maxSolveCells = maxSolveCells
+		self.games = dict()
+		self.nextId = 1
+		# the engine searches in progress, so they can be waited for before the server stops
+		self.searches = set()
+
+
+	# This method handles one line from a client, where send is an async function that sends a line back to the client.
+	# It returns False if the client has quit.
+	async def handleLine(self, line, send):
+		words = line.split()
+		if not words:
+			return True
+		command = words[0].upper()
+		try:
+			if command == "NEW":
+				await self.newGame(words[1:], send)
+			elif command == "PLAY":
+				await self.playMove(self.findGame(words, send), int(words[2]))
+			elif command == "BOARD":
+				await self.sendBoard(self.findGame(words, send))
+			elif command == "RESIGN":
+				game = self.findGame(words, send)
+				if game.result is None:
+					await self.endGame(game, ("loss", "resign"))
+			elif command == "QUIT":
+				return False
+			else:
+				await send("ERROR unknown command " + words[0])
+		except KeyError as error:
+			await send("ERROR " + error.args[0])
+		except ValueError as error:
+			await send("ERROR " + str(error))
+		except IndexError:
+			await send("ERROR bad command: " + line)
+		return True
+
+
+	# This method returns the game named by the second word of a command, if it belongs to the client
+	def findGame(self, words, send):
+		game = self.games.get(int(words[1]))
+		if game is None or game.send is not send:
+			raise KeyError("no game " + words[1])
+		return game
+
+
+	# This method starts a new game, with the settings given by the words of a NEW command
+	async def newGame(self, words, send):
+		rows, columns, winNum = int(words[0]), int(words[1]), int(words[2])
+		if words[3] not in ("first", "second"):
+			raise ValueError("expected first or second")
+		if rows < 1 or columns < 1 or winNum < 1 or rows * columns > 200:
+			raise ValueError("bad board size")
+
+		engine = {"mode": "alphabeta", "depth": 4, "playouts": 1000}
+		clock = None
+		for option in words[4:]:
+			key, value = option.split("=")
+			if key == "clock":
+				clock = float(value)
+			elif key == "mode":
+				if value not in ENGINE_MODES:
+					raise ValueError("unknown mode " + value)
+				engine["mode"] = value
+			elif key == "depth":
+				engine[key] = max(1, min(int(value), self.maxDepth))
+			elif key == "playouts":
+				engine[key] = max(1, min(int(value), self.maxPlayouts))
+			else:
+				raise ValueError("unknown option " + key)
+		if engine["mode"] == "solve":
+			if clock is not None:
+				raise ValueError("mode solve cannot be used with a clock")
+			if rows * columns > self.maxSolveCells:
+				raise ValueError("mode solve is only allowed on boards of up to %d spaces" % self.maxSolveCells)
+
+		gameId = self.nextId
+		self.nextId += 1
+		game = ServerGame(gameId, rows, columns, winNum, "X" if words[3] == "first" else "O", engine, clock, send)
+		self.games[gameId] = game
+		await send("GAME %d" % gameId)
+		if game.toMove() == game.engineName:
+			self.startEngineTurn(game)
+		else:
+			self.startClientTurn(game)
+
+
+	# This method plays the client's move in the game, and then starts the engine's turn
+	async def playMove(self, game, column):
+		if game.result is not None:
+			await game.send("ERROR game %d is over" % game.gameId)
+			return
+		if game.toMove() != game.clientName:
+			await game.send("ERROR game %d: not your move" % game.gameId)
+			return
+		if column < 0 or column >= game.board.numColumns or game.board.colFills[column] >= game.board.numRows:
+			await game.send("ERROR game %d: illegal move %d" % (game.gameId, column))
+			return
+		if not game.stopClock():
+			await self.endGame(game, ("loss", "time"))
+			return
+		game.play(column)
+
+		if game.timer is not None:
+			game.timer.cancel()
+			game.timer = None
+		await game.send("OK %d %d" % (game.gameId, column))
+		if game.result is not None:
+			await self.endGame(game, game.result)
+		else:
+			self.startEngineTurn(game)
+
+
+	# This method starts the timer that ends the game if the client runs out of time for their move
+	def startClientTurn(self, game):
+		if game.clock is not None:
+			loop = asyncio.get_running_loop()
+			game.timer = loop.call_later(max(0.0, game.clock[game.clientName]),
+				lambda: self.track(loop.create_task(self.clientTimeout(game))))
+
+
+	# This method ends the game when the client has run out of time
+	async def clientTimeout(self, game):
+		game.timer = None
+		if game.result is None and game.toMove() == game.clientName:
+			await self.endGame(game, ("loss", "time"))
+
+
+	# This method starts the engine's search in the worker pool without waiting for it
+	def startEngineTurn(self, game):
+		self.track(asyncio.get_running_loop().create_task(self.engineTurn(game)))
+
+
+	# This method keeps a task until it finishes, so it is not lost, and so the server can wait for it when it stops
+	def track(self, task):
+		self.searches.add(task)
+		task.add_done_callback(self.searches.discard)
+
+
+	# This method finds and plays the engine's move. With a clock, the engine's time limit is most of its remaining time
+	# divided by the number of moves it may still have to make, leaving the rest for passing the search to the pool.
+	async def engineTurn(self, game):
+		timeLimit = None
+		if game.clock is not None:
+			remaining = game.clock[game.engineName]
+			movesLeft = (game.board.numRows * game.board.numColumns - len(game.moves) + 1) // 2
+			timeLimit = max(0.01, 0.8 * remaining / max(1, movesLeft))
+
+		loop = asyncio.get_running_loop()
+		gameBoard = game.board
+		try:
+			move = await loop.run_in_executor(self.executor, searchMove, game.engine, gameBoard.numRows,
+				gameBoard.numColumns, gameBoard.winNum, list(game.moves), timeLimit)
+		except Exception as error:
+			# the search failed (or the pool broke), so the game cannot go on
+			if game.result is None:
+				await game.send("ERROR %d engine failed: %s" % (game.gameId, error))
+				await self.endGame(game, ("aborted", "engine"))
+			return
+
+		if game.result is not None:
+			return
+		if not game.stopClock():
+			await self.endGame(game, ("win", "time"))
+			return
+		game.play(move)
+		await game.send("MOVE %d %d" % (game.gameId, move))
+		if game.result is not None:
+			await self.endGame(game, game.result)
+		else:
+			self.startClientTurn(game)
+
+
+	# This method ends the game with the given result (from the client's point of view) and reason, and forgets it
+	async def endGame(self, game, result):
+		game.result = result
+		self.games.pop(game.gameId, None)
+		if game.timer is not None:
+			game.timer.cancel()
+			game.timer = None
+		await game.send("RESULT %d %s %s" % (game.gameId, result[0], result[1]))
+
+
+	# This method sends the moves and clocks of a game to its client
+	async def sendBoard(self, game):
+		moves = "".join(str(move) for move in game.moves) if game.board.numColumns <= 10 else \
+			",".join(str(move) for move in game.moves)
+		if game.clock is None:
+			clocks = "- -"
+		else:
+			clocks = "%.2f %.2f" % (game.clock["X"], game.clock["O"])
+		await game.send("BOARD %d %s %s" % (game.gameId, moves or "-", clocks))
+
+
+	# This method handles one client, reading lines until the client quits or disconnects, and then forgets its unfinished games
+	async def serveClient(self, reader, send):
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				if not await self.handleLine(line.decode().strip(), send):
+					break
+		finally:
+			for gameId in [gameId for gameId, game in self.games.items() if game.send is send]:
+				game = self.games.pop(gameId)
+				game.result = game.result or ("loss", "resign")
+				if game.timer is not None:
+					game.timer.cancel()
+
+
+	# This method serves clients over TCP until it is cancelled
+	async def serveTCP(self, host, port):
+		async def handleConnection(reader, writer):
+			async def send(line):
+				writer.write((line + "\n").encode())
+				await writer.drain()
+			try:
+				await self.serveClient(reader, send)
+			except ConnectionError:
+				pass
+			finally:
+				writer.close()
+
+		server = await asyncio.start_server(handleConnection, host, port)
+		async with server:
+			await server.serve_forever()
+
+
+	# This method serves a single client over stdin and stdout, until it quits or stdin is closed
+	async def serveStdio(self):
+		loop = asyncio.get_running_loop()
+		reader = asyncio.StreamReader()
+		await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+		async def send(line):
+			sys.stdout.write(line + "\n")
+			sys.stdout.flush()
+
+		await self.serveClient(reader, send)
+		if self.searches:
+			await asyncio.wait(list(self.searches))
+
+
+	# This method shuts down the worker pool
+	def close(self):
+		self.executor.shutdown()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Host games of Connect against the engine.")
+	parser.add_argument("--tcp", metavar="HOST:PORT", help="serve over TCP rather than stdin and stdout")
+	parser.add_argument("--workers", type=int, default=None, help="the number of engine processes")
+	parser.add_argument("--max-depth", dest="maxDepth", type=int, default=MAX_DEPTH,
+		help="the largest search depth a client can ask for")
+	parser.add_argument("--max-playouts", dest="maxPlayouts", type=int, default=MAX_PLAYOUTS,
+		help="the largest number of mcts playouts a client can ask for")
+	parser.add_argument("--max-solve-cells", dest="maxSolveCells", type=int, default=MAX_SOLVE_CELLS,
+		help="the largest board (in spaces) the solve mode can be used on")
+	args = parser.parse_args()
+
+	server = GameServer(args.workers, maxDepth=args.maxDepth, maxPlayouts=args.maxPlayouts,
+		maxSolveCells=args.maxSolveCells)
+	try:
+		if args.tcp:
+			host, port = args.tcp.rsplit(":", 1)
+			asyncio.run(server.serveTCP(host, int(port)))
+		else:
+			asyncio.run(server.serveStdio())
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.close()
+
+
+if __name__ == "__main__":
+	main()
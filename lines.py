@@ -0,0 +1,47 @@
+# A LineTable lists every possible winning line on a board with the given number of rows, columns and pieces in
+# a line needed to win (winNum), and, for every space on the board, which of those lines pass through it.
+#
+# Spaces are identified by a single cell index, row * columns + column, and each line is a tuple of the cell
+# indices it covers. The tables only depend on (rows, columns, winNum), so they are built once by getLineTable()
+# and shared between all boards of the same size.
+class LineTable:
+
+	def __init__(self, rows, columns, winNum):
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+
+		# lines[i] is a tuple of the cell indices covered by line i
+		self.lines = list()
+		# cellLines[cell] is a tuple of the indices of all lines that pass through that cell
+		cellLines = [list() for i in range(rows * columns)]
+
+		# A line is described by its first space and a direction: upwards, rightwards, and the two upward diagonals.
+		for row in range(rows):
+			for column in range(columns):
+				for rowStep, colStep in ((1, 0), (0, 1), (1, 1), (1, -1)):
+					lastRow = row + rowStep * (winNum - 1)
+					lastColumn = column + colStep * (winNum - 1)
+					if lastRow >= rows or lastColumn < 0 or lastColumn >= columns:
+						continue
+
+					cells = tuple((row + rowStep * i) * columns + column + colStep * i for i in range(winNum))
+					for cell in cells:
+						cellLines[cell].append(len(self.lines))
+					self.lines.append(cells)
+
+		self.cellLines = [tuple(cellLine) for cellLine in cellLines]
+		self.numLines = len(self.lines)
+
+
+# LineTables that have already been built, keyed by (rows, columns, winNum)
+lineTables = dict()
+
+# Return the LineTable for the given board specification, building it the first time it is needed
+def getLineTable(rows, columns, winNum):
+	key = (rows, columns, winNum)
+	table = lineTables.get(key)
+	if table is None:
+		table = LineTable(rows, columns, winNum)
+		lineTables[key] = table
+	return table
@@ -0,0 +1,291 @@
+import bitboard
+import random
+import math
+import time
+
+# A player that chooses moves with Monte Carlo Tree Search (MCTS) using UCT, rather than a depth-limited minimax search.
+# Each move is found by repeating the following until the budget (a number of playouts, or a time limit) runs out:
+#
+#     selection       from the root, repeatedly go to the child with the highest UCT score,
+#                         wins / visits + exploration * sqrt(ln(parent visits) / visits)
+#                     until reaching a node that has not been expanded, or the end of a game
+#     expansion       add a child for every legal move to the node (once it has been visited), and go to one of them
+#     simulation      play random moves from that position to the end of the game (a playout)
+#     backpropagation add the result to every node on the path (a win counts 1 and a draw 1/2 for the player who made
+#                     the move into the node)
+#
+# and then playing the most visited move at the root. The cost of a move depends on the budget rather than on the depth
+# of the search or the number of columns.
+#
+# The nodes are kept in a pool of preallocated lists (one list for each field, indexed by node) rather than as separate
+# objects, and nodes that are no longer needed are returned to the pool. After each move the tree is kept: the node for
+# the position after this player's move and the opponent's reply becomes the new root, so the playouts made through it
+# are not wasted, and the rest of the tree is returned to the pool.
+#
+# Playouts are played on integer masks with the same bit layout as bitboard.BitBoard, without any method calls.
+class MCTSPlayer:
+
+	def __init__(self, name, playouts=1000, timeLimit=None, exploration=math.sqrt(2), poolSize=2**18, seed=0):
+		self.name = name
+		self.opponent = "O" if self.name == "X" else "X"
+
+		# Each move uses the given number of playouts or, if a time limit (in seconds) is given, as many as fit in the time
+		self.playouts = playouts
+		self.timeLimit = timeLimit
+		self.exploration = exploration
+		self.randomGenerator = random.Random(seed)
+
+		# numExpanded counts the nodes added to the tree (numPruned is always 0), alongside player.Player's counters
+		self.numExpanded = 0
+		self.numPruned = 0
+		self.numPlayouts = 0
+
+		# The node pool. For node i: visits[i] and wins[i] are the number of playouts through the node and the wins (for
+		# the player who made the move into the node) among them, moves[i] is that move, children[i] is the list of child
+		# nodes (or None if the node has not been expanded), and results[i] is the result of the game for the player
+		# who made the move if it ended the game (1 for a win, 0.5 for a draw), or None.
+		self.poolSize = poolSize
+		self.visits = [0] * poolSize
+		self.wins = [0.0] * poolSize
+		self.moves = [-1] * poolSize
+		self.children = [None] * poolSize
+		self.results = [None] * poolSize
+		self.freeNodes = list(range(poolSize - 1, -1, -1))
+
+		# The root of the tree, the position at the root (the masks of X and O and the height of each column) and the move
+		# played from it, which are used to find the new root after the opponent's reply
+		self.root = None
+		self.rootMasks = None
+		self.rootHeights = None
+		self.lastMove = None
+
+		# a BitBoard of the size being played, for its bit layout (see bitboard.py)
+		self.layout = None
+
+
+	# This method takes a node from the pool, or returns None if the pool is empty
+	def newNode(self, move, result):
+		if not self.freeNodes:
+			return None
+		node = self.freeNodes.pop()
+		self.visits[node] = 0
+		self.wins[node] = 0.0
+		self.moves[node] = move
+		self.children[node] = None
+		self.results[node] = result
+		self.numExpanded += 1
+		return node
+
+
+	# This method returns a node and all the nodes below it to the pool
+	def freeTree(self, node):
+		stack = [node]
+		while stack:
+			node = stack.pop()
+			if self.children[node] is not None:
+				stack.extend(self.children[node])
+				self.children[node] = None
+			self.freeNodes.append(node)
+
+
+	# This method returns True if the pieces in the mask include winNum in a line (see BitBoard.checkWin())
+	def isWin(self, mask):
+		for shifts in self.layout.winShifts:
+			line = mask
+			for shift in shifts:
+				line &= line >> shift
+			if line:
+				return True
+		return False
+
+
+	# This method returns the masks of X and O and the column heights for the position on the board
+	def readBoard(self, gameBoard):
+		if self.layout is None or (self.layout.numRows, self.layout.numColumns, self.layout.winNum) != \
+				(gameBoard.numRows, gameBoard.numColumns, gameBoard.winNum):
+			self.layout = bitboard.BitBoard(gameBoard.numRows, gameBoard.numColumns, gameBoard.winNum)
+			self.resetTree()
+
+		masks = [0, 0]
+		for column in range(gameBoard.numColumns):
+			for row in range(gameBoard.colFills[column]):
+				index = 0 if str(gameBoard.checkSpace(row, column)) == "X" else 1
+				masks[index] |= self.layout.cellBits[column][row]
+		return masks, list(gameBoard.colFills)
+
+
+	# This method returns the whole tree to the pool
+	def resetTree(self):
+		if self.root is not None:
+			self.freeTree(self.root)
+		self.root = None
+		self.lastMove = None
+
+
+	# This method makes the node for the given position the root, reusing the tree from the last move if the position is
+	# the one reached by the last move and one of the replies to it, and discarding the rest of the tree
+	def findRoot(self, masks, heights, side):
+		found = False
+		if self.root is not None and self.lastMove is not None and self.children[self.root] is not None:
+			for child in self.children[self.root]:
+				if self.moves[child] != self.lastMove:
+					continue
+				for grandchild in self.children[child] or ():
+					# play the last move and the reply on the old root position, and compare with the new position
+					afterMasks = list(self.rootMasks)
+					afterHeights = list(self.rootHeights)
+					self.playMove(afterMasks, afterHeights, self.lastMove, side)
+					self.playMove(afterMasks, afterHeights, self.moves[grandchild], 1 - side)
+					if afterMasks == masks and afterHeights == heights:
+						self.children[child].remove(grandchild)
+						self.resetTree()
+						self.root = grandchild
+						found = True
+						break
+				break
+
+		if not found:
+			self.resetTree()
+			self.root = self.newNode(-1, None)
+		self.rootMasks = masks
+		self.rootHeights = heights
+
+
+	# This method adds a piece for side (0 for X, 1 for O) to the column of the position given by masks and heights
+	def playMove(self, masks, heights, column, side):
+		masks[side] |= self.layout.cellBits[column][heights[column]]
+		heights[column] += 1
+
+
+	# This method adds a child for every legal move to the node, for the position given by masks and heights with side to
+	# move, if there are enough nodes left in the pool
+	def expand(self, node, masks, heights, side):
+		numRows = self.layout.numRows
+		legal = [column for column in range(self.layout.numColumns) if heights[column] < numRows]
+		if len(legal) > len(self.freeNodes):
+			return
+		full = sum(heights) + 1 == numRows * self.layout.numColumns
+		children = list()
+		for column in legal:
+			bit = self.layout.cellBits[column][heights[column]]
+			if self.isWin(masks[side] | bit):
+				result = 1.0
+			elif full:
+				result = 0.5
+			else:
+				result = None
+			children.append(self.newNode(column, result))
+		self.children[node] = children
+
+
+	# This method returns the child of the node with the highest UCT score. Children that have not been visited are chosen
+	# first, in the order they were added.
+	def selectChild(self, node):
+		visits = self.visits
+		wins = self.wins
+		logVisits = math.log(max(1, visits[node]))
+		exploration = self.exploration
+		bestChild = None
+		bestScore = float('-inf')
+		for child in self.children[node]:
+			childVisits = visits[child]
+			if childVisits == 0:
+				return child
+			score = wins[child] / childVisits + exploration * math.sqrt(logVisits / childVisits)
+			if score > bestScore:
+				bestScore = score
+				bestChild = child
+		return bestChild
+
+
+	# This method plays random moves from the position (with side to move) to the end of the game, and returns the result
+	# for the player who is not to move: 1 for a win, 0.5 for a draw and 0 for a loss
+	def playout(self, masks, heights, side):
+		self.numPlayouts += 1
+		numRows = self.layout.numRows
+		cellBits = self.layout.cellBits
+		randomValue = self.randomGenerator.random
+		lastMover = 1 - side
+		legal = [column for column in range(self.layout.numColumns) if heights[column] < numRows]
+		while legal:
+			column = legal[int(randomValue() * len(legal))]
+			row = heights[column]
+			masks[side] |= cellBits[column][row]
+			heights[column] = row + 1
+			if row + 1 == numRows:
+				legal.remove(column)
+			if self.isWin(masks[side]):
+				return 1.0 if side == lastMover else 0.0
+			side = 1 - side
+		return 0.5
+
+
+	# This method runs one iteration of selection, expansion, simulation and backpropagation from the root
+	def runIteration(self, side):
+		masks = list(self.rootMasks)
+		heights = list(self.rootHeights)
+		node = self.root
+		path = [node]
+
+		# selection
+		while self.children[node] is not None and self.results[node] is None:
+			node = self.selectChild(node)
+			self.playMove(masks, heights, self.moves[node], side)
+			side = 1 - side
+			path.append(node)
+
+		# expansion, once the node has been visited (the root is always expanded)
+		if self.results[node] is None and (self.visits[node] > 0 or node == self.root):
+			self.expand(node, masks, heights, side)
+			if self.children[node]:
+				node = self.selectChild(node)
+				self.playMove(masks, heights, self.moves[node], side)
+				side = 1 - side
+				path.append(node)
+
+		# simulation, unless the game is already over
+		value = self.results[node]
+		if value is None:
+			value = self.playout(masks, heights, side)
+
+		# backpropagation, where the value is for the player who made the move into each node in turn
+		for node in reversed(path):
+			self.visits[node] += 1
+			self.wins[node] += value
+			value = 1.0 - value
+
+
+	# This method gets the move with Monte Carlo Tree Search. It returns the most visited move at the root.
+	def getMove(self, gameBoard):
+		side = 0 if self.name == "X" else 1
+		masks, heights = self.readBoard(gameBoard)
+		self.findRoot(masks, heights, side)
+
+		if self.timeLimit is not None:
+			deadline = time.time() + self.timeLimit
+			count = 0
+			while count == 0 or time.time() < deadline:
+				self.runIteration(side)
+				count += 1
+		else:
+			for i in range(self.playouts):
+				self.runIteration(side)
+
+		bestMove = None
+		bestVisits = -1
+		for child in self.children[self.root] or ():
+			if self.visits[child] > bestVisits:
+				bestVisits = self.visits[child]
+				bestMove = self.moves[child]
+
+		# if the pool was too full to expand the root, play the first legal move
+		if bestMove is None:
+			bestMove = heights.index(min(heights))
+		self.lastMove = bestMove
+		return bestMove
+
+
+	# MCTS does not use alpha-beta pruning, so this is the same as getMove(), which lets the player be used with either
+	# argument of game.Game.playGame()
+	def getMoveAlphaBeta(self, gameBoard):
+		return self.getMove(gameBoard)
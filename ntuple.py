@@ -0,0 +1,375 @@
+import game
+import argparse
+import array
+import random
+import struct
+import sys
+
+# An N-tuple evaluator scores positions with lookup tables learnt from self-play, rather than with rules written by hand
+# like evaluation.HeuristicEvaluator. It has the same methods (see evaluation.py), so a Player can use either.
+#
+# Each tuple is a fixed group of cells (found by a random walk over neighbouring cells), and has a table with a weight
+# for every way the cells can be filled: each cell is empty, empty and playable (the lowest empty cell of its column),
+# X or O, so a tuple of n cells has 4 ** n weights. (Telling the playable cells apart lets a tuple see whether a threat
+# can be played at once, or only once its column has filled up to it.) The score of a position is the sum, over the
+# tuples, of the weight for the contents of the tuple's cells. Each tuple is also read on the mirror image of the
+# board, with the same table, so a position and its mirror image score the same.
+#
+# All the tables are held in one flat array of weights, and the state of a position is, for each lookup (a tuple or its
+# mirror image), the index in that array of the weight for the lookup's current contents. Adding or removing a piece
+# only changes the lookups through its cell and the cell above it, by a fixed step each, so the board keeps the score
+# up to date at the cost of a few additions per lookup through the two cells.
+#
+# The weights are learnt by temporal-difference learning, TD(lambda), over games that the evaluator plays against
+# itself through game.Game (see train()). Each player chooses the move leading to the position the evaluator scores
+# best for it (or, some of the time, a random move). At the end of each game, the score of each position reached is
+# moved towards its lambda-return: the result of the game (+-WIN_VALUE, or 0 for a draw) for the last position, and
+# otherwise a mix of the score of the next position (weighted 1 - lambda) and the next position's lambda-return.
+#
+# The weights are saved to a binary file (see save() and load()):
+#
+#     header: magic (4 bytes), rows, columns, winNum, tuple length (1 byte each), number of tuples (4 bytes)
+#     tuples: the cells of each tuple (1 byte each)
+#     weights: the table of each tuple in turn (4 ** length signed 4-byte integers each, little-endian)
+#
+# Saved weights are rounded to integers, so searches (and transposition tables, including sharedTable.py's, which
+# packs values into 32 bits) only ever see integer scores. A win scores WIN_VALUE after training, so the weights are
+# learnt in units of 1 / WIN_VALUE of a win, which keeps the rounding small.
+
+MAGIC = b"CNT1"
+HEADER = struct.Struct("<4sBBBBI")
+WIN_VALUE = 10000
+
+# the contents of a cell: empty, empty and playable, the first player's piece or the second player's piece
+EMPTY = 0
+PLAYABLE = 1
+FIRST = 2
+SECOND = 3
+NUM_CONTENTS = 4
+
+
+# The state of an NTupleEvaluator for one position
+class NTupleState:
+
+	def __init__(self, indices):
+		# indices[lookup] is the index in the weights of the weight for the current contents of the lookup's cells
+		self.indices = indices
+		self.score = 0
+
+
+# This function returns numTuples different tuples of length cells each, for a board of the given size, as tuples of
+# cells (row * columns + column) in increasing order. Each is found by a random walk that starts from a random cell and
+# moves to any of the (up to 8) neighbouring cells, until it has visited length cells. A tuple that is the same as
+# another tuple, or its mirror image, is not used, so on a small board there may be fewer than numTuples.
+def randomTuples(rows, columns, numTuples, length, seed=0):
+	generator = random.Random(seed)
+	length = min(length, rows * columns)
+	tuples = list()
+	seen = set()
+	for attempt in range(100 * numTuples):
+		if len(tuples) == numTuples:
+			break
+		row = generator.randrange(rows)
+		column = generator.randrange(columns)
+		cells = {row * columns + column}
+		while len(cells) < length:
+			rowStep = generator.randint(-1, 1)
+			colStep = generator.randint(-1, 1)
+			if 0 <= row + rowStep < rows and 0 <= column + colStep < columns:
+				row += rowStep
+				column += colStep
+				cells.add(row * columns + column)
+
+		cells = tuple(sorted(cells))
+		mirrored = tuple(sorted(mirrorCell(cell, columns) for cell in cells))
+		if cells not in seen and mirrored not in seen:
+			seen.add(cells)
+			tuples.append(cells)
+	return tuples
+
+
+# This function returns the cell at the other side of the board to the given cell
+def mirrorCell(cell, columns):
+	return cell - cell % columns + columns - 1 - cell % columns
+
+
+# The NTupleEvaluator scores positions with the weights of its tuples (see above). By default it has 70 tuples of 6
+# cells with all weights 0, ready for training. The weights can be any array (an array('d') of floats while training,
+# and an array('i') of integers once loaded), of len(tuples) * 4 ** length weights.
+class NTupleEvaluator:
+
+	winScore = 1000000
+
+	def __init__(self, rows, columns, winNum, tuples=None, weights=None, players=("X", "O"), numTuples=70, length=6,
+			seed=0):
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+		if tuples is None:
+			tuples = randomTuples(rows, columns, numTuples, length, seed)
+		self.tuples = [tuple(cells) for cells in tuples]
+		self.length = len(self.tuples[0])
+		if any(len(cells) != self.length for cells in self.tuples):
+			raise ValueError("every tuple must have the same number of cells")
+
+		self.tableSize = NUM_CONTENTS ** self.length
+		if weights is None:
+			weights = array.array('d', bytes(8 * len(self.tuples) * self.tableSize))
+		if len(weights) != len(self.tuples) * self.tableSize:
+			raise ValueError("expected %d weights, not %d" % (len(self.tuples) * self.tableSize, len(weights)))
+		self.weights = weights
+
+		# the contents of a cell holding each player's piece
+		self.contents = {players[0]: FIRST, players[1]: SECOND}
+
+		# Every tuple is looked up twice, as it is and mirrored. A cell with contents c adds step * c to the index of
+		# each lookup through it, where cellSteps[cell] lists those lookups as (lookup, step). emptyIndices[lookup] is
+		# the lookup's index on the empty board, where the cells of the bottom row are playable.
+		self.emptyIndices = list()
+		cellSteps = [list() for cell in range(rows * columns)]
+		for number, cells in enumerate(self.tuples):
+			for lookupCells in (cells, [mirrorCell(cell, columns) for cell in cells]):
+				lookup = len(self.emptyIndices)
+				index = number * self.tableSize
+				for position, cell in enumerate(lookupCells):
+					cellSteps[cell].append((lookup, NUM_CONTENTS ** position))
+					if cell < columns:
+						index += PLAYABLE * NUM_CONTENTS ** position
+				self.emptyIndices.append(index)
+
+		# addedSteps[contents][cell] lists the changes to the lookups' indices, as (lookup, change), when a piece with
+		# those contents is added to the cell (which was playable), so that the cell above it becomes playable
+		self.addedSteps = dict()
+		for contents in self.contents.values():
+			self.addedSteps[contents] = list()
+			for cell in range(rows * columns):
+				changes = dict()
+				for lookup, step in cellSteps[cell]:
+					changes[lookup] = changes.get(lookup, 0) + step * (contents - PLAYABLE)
+				if cell + columns < rows * columns:
+					for lookup, step in cellSteps[cell + columns]:
+						changes[lookup] = changes.get(lookup, 0) + step * (PLAYABLE - EMPTY)
+				self.addedSteps[contents].append(tuple(changes.items()))
+
+
+	# Return the state for the position on the given board, adding the pieces in each column from the bottom up
+	def newState(self, board):
+		state = NTupleState(list(self.emptyIndices))
+		for column in range(board.numColumns):
+			for row in range(board.numRows):
+				player = str(board.checkSpace(row, column))
+				if player == ' ':
+					break
+				self.pieceAdded(state, row * board.numColumns + column, player)
+		return state
+
+
+	# Return a copy of a state
+	def copyState(self, state):
+		copied = NTupleState(list(state.indices))
+		copied.score = state.score
+		return copied
+
+
+	# Update a state after the player's piece is added to the cell
+	def pieceAdded(self, state, cell, player):
+		weights = self.weights
+		indices = state.indices
+		change = 0
+		for lookup, step in self.addedSteps[self.contents[player]][cell]:
+			index = indices[lookup]
+			indices[lookup] = index + step
+			change += weights[index + step] - weights[index]
+		state.score += change
+
+
+	# Update a state after the player's piece is removed from the cell
+	def pieceRemoved(self, state, cell, player):
+		weights = self.weights
+		indices = state.indices
+		change = 0
+		for lookup, step in self.addedSteps[self.contents[player]][cell]:
+			index = indices[lookup]
+			indices[lookup] = index - step
+			change += weights[index - step] - weights[index]
+		state.score += change
+
+
+	# Return the score of the position, which is kept below winScore (see evaluation.py) whatever the weights
+	def score(self, state):
+		return max(1 - self.winScore, min(self.winScore - 1, state.score))
+
+
+# This function writes the evaluator's tuples and weights (rounded to integers) to a binary file (see above)
+def save(evaluator, path):
+	weights = array.array('i', (round(weight) for weight in evaluator.weights))
+	if sys.byteorder != "little":
+		weights.byteswap()
+	with open(path, "wb") as file:
+		file.write(HEADER.pack(MAGIC, evaluator.numRows, evaluator.numColumns, evaluator.winNum, evaluator.length,
+			len(evaluator.tuples)))
+		for cells in evaluator.tuples:
+			file.write(bytes(cells))
+		file.write(weights.tobytes())
+
+
+# This function returns an NTupleEvaluator with the tuples and weights saved in the file at path. The weights are read
+# into an array of integers in one go, rather than one at a time.
+def load(path, players=("X", "O")):
+	with open(path, "rb") as file:
+		data = file.read()
+	magic, rows, columns, winNum, length, numTuples = HEADER.unpack_from(data, 0)
+	if magic != MAGIC:
+		raise ValueError(path + " is not an N-tuple evaluator")
+
+	offset = HEADER.size
+	tuples = [tuple(data[offset + i * length:offset + (i + 1) * length]) for i in range(numTuples)]
+	offset += numTuples * length
+	weights = array.array('i')
+	weights.frombytes(data[offset:offset + 4 * numTuples * NUM_CONTENTS ** length])
+	if sys.byteorder != "little":
+		weights.byteswap()
+	return NTupleEvaluator(rows, columns, winNum, tuples, weights, players)
+
+
+# A TDLearner trains an evaluator's weights (see above) while choosing the moves of both players in self-play games
+class TDLearner:
+
+	# alpha is the fraction of the error in a position's score that each update corrects (shared between its lookups),
+	# lambda_ how much each position's target depends on the later positions rather than just the next one, and epsilon
+	# the fraction of moves that are chosen at random rather than by the evaluator
+	def __init__(self, evaluator, alpha=0.1, lambda_=0.5, epsilon=0.1, seed=0):
+		self.evaluator = evaluator
+		self.alpha = alpha
+		self.lambda_ = lambda_
+		self.epsilon = epsilon
+		self.random = random.Random(seed)
+		# the indices of each position reached in the game so far
+		self.history = list()
+		self.numUpdates = 0
+
+
+	# Forget the positions of the last game at the start of a new game
+	def newGame(self):
+		self.history = list()
+
+
+	# This method moves the score of each position of the game towards its lambda-return (see above), from the last
+	# position back, given the result of the game (from the first player's point of view)
+	def learnGame(self, result):
+		weights = self.evaluator.weights
+		target = result
+		for indices in reversed(self.history):
+			value = sum(weights[index] for index in indices)
+			step = self.alpha * (target - value) / len(indices)
+			for index in indices:
+				weights[index] += step
+			target = (1 - self.lambda_) * value + self.lambda_ * target
+			self.numUpdates += 1
+		self.history = list()
+
+
+	# This method returns the name's move on the board (a copy of the game's board), and remembers the position it
+	# leads to, or learns from the game if the move ends it
+	def chooseMove(self, gameBoard, name):
+		evaluator = self.evaluator
+		gameBoard.setEvaluator(evaluator)
+		state = gameBoard.evalState
+		sign = 1 if evaluator.contents[name] == FIRST else -1
+
+		# the score of each move for the player, and whether it ends the game
+		options = list()
+		for column in range(gameBoard.numColumns):
+			if gameBoard.addPiece(column, name):
+				if gameBoard.checkWin():
+					options.append((WIN_VALUE, True, column))
+				elif gameBoard.checkFull():
+					options.append((0, True, column))
+				else:
+					options.append((sign * state.score, False, column))
+				gameBoard.removePiece(column)
+
+		if self.random.random() < self.epsilon:
+			value, finished, move = self.random.choice(options)
+		else:
+			best = max(option[0] for option in options)
+			value, finished, move = self.random.choice([option for option in options if option[0] == best])
+
+		if finished:
+			self.learnGame(sign * value)
+		else:
+			gameBoard.addPiece(move, name)
+			self.history.append(list(state.indices))
+		return move
+
+
+# A TDPlayer plays one side of a self-play game for a TDLearner, like any other player passed to game.Game
+class TDPlayer:
+
+	def __init__(self, name, learner):
+		self.name = name
+		self.learner = learner
+
+
+	def getMove(self, gameBoard):
+		return self.learner.chooseMove(gameBoard, self.name)
+
+
+	def getMoveAlphaBeta(self, gameBoard):
+		return self.learner.chooseMove(gameBoard, self.name)
+
+
+# This function trains the evaluator's weights (which must be floats, see NTupleEvaluator) over the given number of
+# self-play games, and returns the number of games won by the first player, drawn and won by the second player
+def train(evaluator, games, alpha=0.1, lambda_=0.5, epsilon=0.1, seed=0, progress=False):
+	learner = TDLearner(evaluator, alpha, lambda_, epsilon, seed)
+	results = {1: 0, 0: 0, -1: 0}
+	for i in range(games):
+		learner.newGame()
+		g = game.Game(TDPlayer("X", learner), TDPlayer("O", learner), evaluator.numRows, evaluator.numColumns,
+			evaluator.winNum)
+		results[g.playGame(False)] += 1
+		if progress and (i + 1) % 100 == 0:
+			print("\rPlayed %d of %d games (X won %d, drew %d, O won %d)" % (i + 1, games, results[1], results[0],
+				results[-1]), end='')
+	if progress:
+		print()
+	return results[1], results[0], results[-1]
+
+
+# This script trains an evaluator by self-play and saves it, e.g., 100000 games on a 6x7 board with 4 in a line:
+#
+#     python ntuple.py 6 7 4 100000 ntuple674.bin
+#     python ntuple.py 6 7 4 100000 ntuple674.bin --start ntuple674.bin
+#
+# and a player can then use it with player.Player("X", depth=4, evaluator=ntuple.load("ntuple674.bin")).
+def main():
+	parser = argparse.ArgumentParser(description="Train an N-tuple evaluator by self-play.")
+	parser.add_argument("rows", type=int)
+	parser.add_argument("columns", type=int)
+	parser.add_argument("winNum", type=int)
+	parser.add_argument("games", type=int)
+	parser.add_argument("path", help="the file to save the evaluator to")
+	parser.add_argument("--start", help="an evaluator file to carry on training from, rather than new tuples")
+	parser.add_argument("--tuples", type=int, default=70, help="the number of tuples")
+	parser.add_argument("--length", type=int, default=6, help="the number of cells in each tuple")
+	parser.add_argument("--alpha", type=float, default=0.1)
+	parser.add_argument("--lambda", dest="lambda_", type=float, default=0.5)
+	parser.add_argument("--epsilon", type=float, default=0.1)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	if args.start is not None:
+		evaluator = load(args.start)
+		if (evaluator.numRows, evaluator.numColumns, evaluator.winNum) != (args.rows, args.columns, args.winNum):
+			raise SystemExit(args.start + " is for a different board")
+		evaluator.weights = array.array('d', evaluator.weights)
+	else:
+		evaluator = NTupleEvaluator(args.rows, args.columns, args.winNum, numTuples=args.tuples, length=args.length,
+			seed=args.seed)
+	train(evaluator, args.games, args.alpha, args.lambda_, args.epsilon, args.seed, progress=True)
+	save(evaluator, args.path)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,78 @@
+import mmap
+import struct
+
+# An opening book holds the best move for every position that can occur in the first few moves of a game, worked out
+# in advance, so that a Player using the book does not need to search these positions during a game.
+#
+# The book is a binary file made of a header followed by fixed-size records sorted by key:
+#
+#     header: magic (4 bytes), rows, columns, winNum, plies (1 byte each), number of records (4 bytes)
+#     record: position key (8 bytes), best move (1 byte)
+#
+# The key of a position is its canonical Zobrist hash (the smaller of its hash and the hash of its mirror image), with
+# the side key XOR-ed in when O is to move (the same key as Player.getTableKey()). A position and its mirror image
+# therefore share a record, whose move is for the canonical position, and is mirrored when the board holds the other. Because the records are sorted, a position is found by binary search, which only reads the
+# few records it needs. The file is memory-mapped rather than read, so opening a book is fast whatever its size, and
+# processes using the same book share the memory it uses.
+
+MAGIC = b"CBK2"
+HEADER = struct.Struct("<4sBBBBI")
+RECORD = struct.Struct("<QB")
+
+
+# This function returns the key of the position on the board, where xToMove is True if X is the next to move
+def getKey(gameBoard, xToMove):
+	key = min(gameBoard.hash, gameBoard.mirrorHash)
+	if xToMove:
+		return key
+	return key ^ gameBoard.zobrist.sideKey
+
+
+# This function converts a move on the board to the move for the canonical position, or back again
+def mirrorMove(gameBoard, move):
+	if gameBoard.mirrorHash < gameBoard.hash:
+		return gameBoard.numColumns - 1 - move
+	return move
+
+
+# An OpeningBook gives access to a book written by buildOpeningBook.buildBook()
+class OpeningBook:
+
+	def __init__(self, path):
+		self.path = path
+		with open(path, "rb") as file:
+			self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, self.numRows, self.numColumns, self.winNum, self.plies, self.numRecords = HEADER.unpack_from(self.data, 0)
+		if magic != MAGIC:
+			raise ValueError(path + " is not an opening book")
+
+		# the number of probes that found a move, and that did not
+		self.hits = 0
+		self.misses = 0
+
+
+	# Return the best move stored for the position on the board, or None if the position is not in the book
+	def lookup(self, gameBoard, xToMove):
+		if (gameBoard.numRows, gameBoard.numColumns, gameBoard.winNum) != (self.numRows, self.numColumns, self.winNum):
+			return None
+
+		key = getKey(gameBoard, xToMove)
+		low = 0
+		high = self.numRecords - 1
+		while low <= high:
+			middle = (low + high) // 2
+			recordKey, move = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+			if recordKey == key:
+				self.hits += 1
+				return mirrorMove(gameBoard, move)
+			if recordKey < key:
+				low = middle + 1
+			else:
+				high = middle - 1
+		self.misses += 1
+		return None
+
+
+	# Release the memory map
+	def close(self):
+		self.data.close()
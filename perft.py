@@ -0,0 +1,109 @@
+import board
+import bitboard
+import position
+import argparse
+import time
+
+# This script counts the positions reachable from a position in a given number of moves (a "perft" count, as used for
+# chess move generators), to measure how fast a board implementation plays and takes back moves on its own, apart from
+# any search, and to check that implementations agree. For example,
+#
+#     python perft.py 6 7 4 7
+#     python perft.py 6 7 4 6 --moves 3344 --boards board
+#
+# For every ply k up to the depth, it reports the number of positions reached after k moves, and how many of those
+# games were won by the move just played or ended in a draw (a full board). A game that has ended is not played on.
+# The counts for the empty 6x7 board with 4 in a line are 7, 49, 343, 2401, 16807, 117649, 823536 (with 13032 wins at
+# ply 7), ...
+#
+# Only the methods every board has (addPiece, removePiece, checkWin, checkFull and colFills) are used, so any board
+# class can be counted, and with more than one board class the counts are compared, and any difference reported.
+
+BOARD_CLASSES = {"board": board.Board, "bitboard": bitboard.BitBoard}
+
+
+# This function adds the counts for every position reachable from the position on the board, with name to move, in up to
+# depth more moves, to the lists positions, wins and draws, which are indexed by the ply (counted from the start)
+def countPositions(gameBoard, name, depth, ply, positions, wins, draws):
+	other = "O" if name == "X" else "X"
+	for column in range(gameBoard.numColumns):
+		if gameBoard.colFills[column] < gameBoard.numRows:
+			gameBoard.addPiece(column, name)
+			positions[ply] += 1
+			if gameBoard.checkWin():
+				wins[ply] += 1
+			elif gameBoard.checkFull():
+				draws[ply] += 1
+			elif depth > 1:
+				countPositions(gameBoard, other, depth - 1, ply + 1, positions, wins, draws)
+			gameBoard.removePiece(column)
+
+
+# This function counts the positions reachable from the position on the board in up to depth moves, and returns the
+# lists of positions, wins and draws by ply (from 1 to depth), and the time taken. The board is left as it was.
+def perft(gameBoard, depth):
+	name = "X" if sum(gameBoard.colFills) % 2 == 0 else "O"
+	positions = [0] * (depth + 1)
+	wins = [0] * (depth + 1)
+	draws = [0] * (depth + 1)
+	start = time.perf_counter()
+	if depth > 0 and not gameBoard.checkWin() and not gameBoard.checkFull():
+		countPositions(gameBoard, name, depth, 1, positions, wins, draws)
+	elapsed = time.perf_counter() - start
+	return positions[1:], wins[1:], draws[1:], elapsed
+
+
+# This function runs perft with each board class on the position reached by the moves, prints the counts and speed of
+# each, and returns the list of differences between the classes' counts (empty if they all agree)
+def comparePerft(rows, columns, winNum, depth, moves, classNames):
+	results = dict()
+	for className in classNames:
+		gameBoard = position.boardFromMoves(rows, columns, winNum, moves, BOARD_CLASSES[className])
+		code = gameBoard.encode()
+		positions, wins, draws, elapsed = perft(gameBoard, depth)
+		# making and taking back every move must leave the board exactly as it was
+		if gameBoard.encode() != code:
+			raise RuntimeError("%s was changed by perft" % className)
+		results[className] = (positions, wins, draws)
+
+		total = sum(positions)
+		print("%s: %d positions in %.3fs (%.0f positions/s)" % (className, total, elapsed,
+			total / elapsed if elapsed > 0 else 0.0))
+		print("%6s %14s %12s %12s" % ("ply", "positions", "wins", "draws"))
+		for ply in range(depth):
+			print("%6d %14d %12d %12d" % (ply + 1, positions[ply], wins[ply], draws[ply]))
+
+	differences = list()
+	first = classNames[0]
+	for className in classNames[1:]:
+		for label, index in (("positions", 0), ("wins", 1), ("draws", 2)):
+			for ply in range(depth):
+				expected = results[first][index][ply]
+				found = results[className][index][ply]
+				if expected != found:
+					differences.append("ply %d %s: %s has %d, %s has %d" % (ply + 1, label, first, expected, className,
+						found))
+	return differences
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Count the positions reachable on a Connect board (perft).")
+	parser.add_argument("rows", type=int)
+	parser.add_argument("columns", type=int)
+	parser.add_argument("winNum", type=int)
+	parser.add_argument("depth", type=int)
+	parser.add_argument("--moves", default="", help="the moves to the starting position, as a move string (see "
+		"position.py)")
+	parser.add_argument("--boards", default="board,bitboard",
+		help="comma separated board classes, from: " + ", ".join(BOARD_CLASSES))
+	args = parser.parse_args()
+
+	differences = comparePerft(args.rows, args.columns, args.winNum, args.depth, args.moves, args.boards.split(","))
+	for difference in differences:
+		print(difference)
+	if differences:
+		raise SystemExit(1)
+
+
+if __name__ == "__main__":
+	main()
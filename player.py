@@ -1,6 +1,13 @@
 import board
+import transposition
+import openingBook
+import tablebase
+import solver
 import random
 import math
+import time
+import threading
+import multiprocessing as mp
 
 # The aim of this coursework is to implement the minimax algorithm to determine the next move for a game of Connect.
 # The goal in Connect is for a player to create a line of the specified number of pieces, either horizontally, vertically or diagonally.
@@ -31,27 +38,146 @@ import math
 #
 # IMPORTANT: You MUST TRACK how many nodes you expand in your minimax and minimax with alpha-beta implementations.
 # IMPORTANT: In your minimax with alpha-beta implementation, when pruning you MUST TRACK the number of times you prune.
+
+
+# This exception is raised inside the search when a Player with a time limit runs out of time
+class SearchTimeout(Exception):
+	pass
+
+
 class Player:
 	
-	def __init__(self, name, depth = 6):
+	def __init__(self, name, depth = 6, boardClass = None, transpositionSize = 0, timeLimit = None, evaluator = None,
+			searchMode = "alphabeta", moveOrdering = "static", workers = 0, bookPath = None, stats = None, tactics = False,
+			ponder = False, transpositionTable = None, tablebasePath = None):
 		# If name is X, then it is a maximising player, otherwise it is a minimising player
 		self.name = name
 
 		self.depth = depth
 
+		# If a time limit (in seconds) is given, each move is found by iterative deepening: the search is repeated with
+		# increasing depth until the time runs out, and the move from the deepest search that finished is played. In this
+		# mode depth is not used. lastSearchDepth records the depth reached for the last move.
+		self.timeLimit = timeLimit
+		self.deadline = None
+		self.lastSearchDepth = None
+
+		# The search used by getMoveAlphaBeta(): "alphabeta" for minimaxAlphaBeta(), "pvs" for negamax with principal
+		# variation search and aspiration windows (see getMovePVS()), or "solve" to play perfectly using an exact solver
+		# (see getMoveSolve()). aspirationWindow is the half-width of the window.
+		self.searchMode = searchMode
+		self.aspirationWindow = 50
+		# the solver used in "solve" mode, created for the first move, and the (result, distance, nodes) of the last move
+		self.solver = None
+		self.lastSolveResult = None
+
+		# How moves are ordered in minimaxAlphaBeta() and negamax(): "static" searches from the middle column outwards,
+		# "dynamic" also uses immediate wins and blocks, killer moves and history scores (see orderMovesDynamic())
+		self.moveOrdering = moveOrdering
+		self.killers = dict()
+		self.history = [list(), list()]
+		# the static middle-outwards orders, by board width (see getColumnOrder())
+		self.columnOrders = dict()
+
+		# If tactics is True, minimaxAlphaBeta() and negamax() look for immediate wins and threats at every node before
+		# searching its moves (see findTactics()), which decides some positions without searching them and cuts the
+		# moves searched at others. The values found are the same as without it.
+		self.tactics = tactics
+
+		# The board class to search with, e.g., bitboard.BitBoard. If the board passed to getMove() or
+		# getMoveAlphaBeta() is of a different class it is converted before searching. None searches the given board.
+		self.boardClass = boardClass
+
+		# An optional evaluator (see evaluation.py), e.g., evaluation.HeuristicEvaluator(6, 7, 4), used to score the
+		# positions where the search stops without the game being over. Without an evaluator these all score 0.
+		# When an evaluator is used, wins score evaluator.winScore plus the depth remaining, so they are always
+		# worth more than any position the evaluator scores.
+		self.evaluator = evaluator
+		self.winValue = evaluator.winScore if evaluator is not None else 0
+
 		# track the opponent's name
 		self.opponent = "O" if self.name == "X" else "X"
 	
 		self.numExpanded = 0 # Use this to track the number of nodes you expand
 		self.numPruned = 0 # Use this to track the number of times you prune 
 
+		# If transpositionSize is more than 0, minimaxAlphaBeta() stores the results of the positions it searches in a
+		# transposition table with that many entries. The table is kept between moves, so it lasts for a whole game.
+		# Alternatively, an existing table can be given as transpositionTable, e.g., a sharedTable.SharedTranspositionTable
+		# shared with players in other processes.
+		self.transpositionSize = transpositionSize
+		self.transpositionTable = None
+		if transpositionTable is not None:
+			self.transpositionTable = transpositionTable
+			self.transpositionSize = transpositionTable.size
+		elif transpositionSize > 0:
+			self.transpositionTable = transposition.TranspositionTable(transpositionSize)
+
+		# If workers is more than 1, getMoveAlphaBeta() splits the moves at the root between that many worker processes
+		# (see getMoveParallel()). The pool of processes is created for the first move, and kept until close() is called.
+		# Workers are only used by the "alphabeta" search mode, so they cannot be combined with the others.
+		if workers > 1 and searchMode != "alphabeta":
+			raise ValueError("workers can only be used with searchMode \"alphabeta\", not \"%s\"" % searchMode)
+		self.workers = workers
+		self.youngerBrothersWait = True
+		self.pool = None
+		self.sharedBound = None
+
+		# An optional opening book file (see openingBook.py). Positions in the book are played from it without searching.
+		# The book is memory-mapped when it is first needed.
+		self.bookPath = bookPath
+		self.book = None
+
+		# An optional tablebase file (see tablebase.py), memory-mapped when the first search starts. Positions in the
+		# tablebase are played perfectly from it without searching, and the search scores any position it reaches that
+		# is in the tablebase from its exact result, rather than searching it. Other positions are searched as usual.
+		self.tablebasePath = tablebasePath
+		self.tablebase = None
+
+		# An optional searchStats.SearchStats, which records statistics about the search for every move (nodes per ply,
+		# cutoffs by move index, timing and so on). Without one, the search only keeps numExpanded and numPruned.
+		self.stats = stats
+
+		# If ponder is True, the player keeps searching in a background thread while the opponent chooses their move
+		# (see startPondering()). ponderKey identifies the position being searched (the hash and the column heights),
+		# ponderResult holds the (move, depth) of the deepest search finished, and ponderStart and ponderEnd are the times
+		# the thread started and stopped searching. numPonderHits and numPonderMisses count the moves where the opponent
+		# did, or did not, play the predicted reply.
+		self.ponder = ponder
+		self.ponderThread = None
+		self.ponderKey = None
+		self.ponderResult = None
+		self.ponderStart = None
+		self.ponderEnd = None
+		self.numPonderHits = 0
+		self.numPonderMisses = 0
+
+
+	# The number of transposition table probes that found an entry, the number that did not, and the number of
+	# entries stored, which are tracked alongside numExpanded and numPruned
+	@property
+	def numTTHits(self):
+		return self.transpositionTable.hits if self.transpositionTable is not None else 0
+
+
+	@property
+	def numTTMisses(self):
+		return self.transpositionTable.misses if self.transpositionTable is not None else 0
+
+
+	@property
+	def numTTStores(self):
+		return self.transpositionTable.stores if self.transpositionTable is not None else 0
+
 
 	# This method evaluates the board and returns a value for the board.
 	def evaluate(self, board):
 		if board.lastPlay[2] == "X" and board.checkWin():
-			return 1
+			return 1 + self.winValue
 		elif board.lastPlay[2] == "O" and board.checkWin():
-			return -1
+			return -1 - self.winValue
+		elif self.evaluator is not None:
+			return self.evaluator.score(board.evalState)
 		else:
 			return 0
 		
@@ -60,14 +186,148 @@ class Player:
 	# choose the best move earlier on in the search when using alpha-beta pruning.
 	def evaluateWithDepth(self, board, depth):
 		if board.lastPlay[2] == "X" and board.checkWin():
-			return depth
+			return self.winValue + depth
 		elif board.lastPlay[2] == "O" and board.checkWin():
-			return -depth
+			return -self.winValue - depth
+		elif self.evaluator is not None:
+			return self.evaluator.score(board.evalState)
 		else:
 			return 0
-		
+
+
+	# This method converts a value stored in the transposition table by a search with storedDepth moves remaining into
+	# the value a search with depth moves remaining (where depth <= storedDepth) would find. Wins are scored by the
+	# depth remaining when they happen (see evaluateWithDepth()), so with less depth remaining the same win scores
+	# lower, and a win that is too deep to be seen at all scores winValue (i.e., 0 without an evaluator). Other values
+	# are used as they are.
+	def adjustStoredValue(self, value, storedDepth, depth):
+		if value > self.winValue:
+			return self.winValue + max(0, value - self.winValue - (storedDepth - depth))
+		if value < -self.winValue:
+			return -self.winValue - max(0, -value - self.winValue - (storedDepth - depth))
+		return value
+
+
+	# This method returns the key used for the board in the transposition table, which includes whose move it is. The key
+	# is made from the canonical hash (the smaller of the hash and the mirror hash, see zobrist.py), so a position and its
+	# mirror image share an entry.
+	def getTableKey(self, board, maxPlayer):
+		key = min(board.hash, board.mirrorHash)
+		if maxPlayer:
+			return key
+		return key ^ board.zobrist.sideKey
+
+
+	# The moves in the transposition table are stored for the canonical position, so when the board holds the mirror image
+	# of the canonical position a move is mirrored on the way into and out of the table. This method does either.
+	def mirrorTableMove(self, board, move):
+		if move is not None and board.mirrorHash < board.hash:
+			return board.numColumns - 1 - move
+		return move
+
+
+	# At a symmetric position (one that is its own mirror image, e.g., the empty board) each move has the same value as the
+	# mirrored move, so only one move of each mirrored pair needs to be searched. This method removes the later move of each
+	# pair from a list of moves, so the move that would have been chosen from a pair with equal values is still chosen.
+	def removeMirroredMoves(self, board, columnOrder):
+		if board.hash != board.mirrorHash:
+			return columnOrder
+		kept = list()
+		for col in columnOrder:
+			if board.numColumns - 1 - col not in kept:
+				kept.append(col)
+		return kept
+
+
+	# This method returns the move stored in the opening book or the tablebase for the position on the board, or None if
+	# the position is in neither
+	def getStoredMove(self, gameBoard):
+		move = self.getBookMove(gameBoard)
+		if move is None:
+			move = self.getTablebaseMove(gameBoard)
+		return move
+
+
+	# This method returns the move stored in the opening book for the position on the board, or None if there is no book
+	# or the position is not in it
+	def getBookMove(self, gameBoard):
+		if self.bookPath is None:
+			return None
+		if self.book is None:
+			self.book = openingBook.OpeningBook(self.bookPath)
+		move = self.book.lookup(gameBoard, self.name == "X")
+		if move is not None and gameBoard.colFills[move] < gameBoard.numRows:
+			return move
+		return None
+
+
+	# This method returns the best move for the position on the board according to the tablebase, or None if there is no
+	# tablebase or a move leads to a position that is not in it. The best move wins as quickly as possible, or failing
+	# that draws, or failing that loses as slowly as possible, and moves that are as good are chosen from the middle out.
+	def getTablebaseMove(self, gameBoard):
+		if self.tablebasePath is None:
+			return None
+		if self.tablebase is None:
+			self.tablebase = tablebase.Tablebase(self.tablebasePath)
+		if gameBoard.checkWin() or gameBoard.checkFull():
+			return None
+
+		bestMove = None
+		bestScore = None
+		for col in self.getColumnOrder(gameBoard):
+			if gameBoard.addPiece(col, self.name):
+				if gameBoard.checkWin():
+					result, distance = 1, 1
+				elif gameBoard.checkFull():
+					result, distance = 0, 1
+				else:
+					entry = self.tablebase.probe(gameBoard)
+					if entry is None:
+						gameBoard.removePiece(col)
+						return None
+					# the result is for the opponent, who is to move after this move
+					result, distance = -entry[0], entry[1] + 1
+				gameBoard.removePiece(col)
+				score = tablebase.resultScore(result, distance)
+				if bestScore is None or score > bestScore:
+					bestMove = col
+					bestScore = score
+		return bestMove
+
+
+	# This method returns the value of the position on the board from the tablebase, from X's point of view, where side
+	# (1 for X, -1 for O) is to move and the search has depth moves remaining, or None if the position is not in the
+	# tablebase. Wins are scored as the search would score them when they happen (see evaluateWithDepth()), except that
+	# wins too deep for the search to reach score as if they happened just before its last move, so that they still score
+	# more than a draw (even without an evaluator, when winValue is 0).
+	def getTablebaseValue(self, board, depth, side):
+		entry = self.tablebase.probe(board)
+		if entry is None:
+			return None
+		result, distance = entry
+		if result == 0:
+			return 0
+		return side * result * (self.winValue + max(1, depth - distance))
+
+
+	# This method returns the board that the search should be performed on, with this player's evaluator attached
+	def prepareBoard(self, gameBoard):
+		if self.boardClass is not None and not isinstance(gameBoard, self.boardClass):
+			gameBoard = self.boardClass.fromBoard(gameBoard)
+		if gameBoard.evaluator is not self.evaluator:
+			gameBoard.setEvaluator(self.evaluator)
+		if self.tablebasePath is not None and self.tablebase is None:
+			self.tablebase = tablebase.Tablebase(self.tablebasePath)
+		return gameBoard
+
+
 	#this method returns an array that holds which columns to check in minimax by ordering of the middle of the board then moving outwards
+	#the order only depends on the number of columns, so it is worked out once per board width and a copy is returned
 	def getColumnOrder(self, board):
+			columnOrder = self.columnOrders.get(board.numColumns)
+			if columnOrder is not None:
+				return list(columnOrder)
+
 			middleColumn = board.numColumns // 2
 
 			columnOrder = [middleColumn]  # Start with the middle column
@@ -81,12 +341,101 @@ class Player:
 				if rightColumn < board.numColumns and rightColumn != leftColumn:
 					columnOrder.append(rightColumn)
 
-			return columnOrder
+			self.columnOrders[board.numColumns] = columnOrder
+			return list(columnOrder)
+
+
+	# This method returns the order in which to search the moves at a node, where side is 1 if X is to move and -1 for O.
+	# With static ordering the moves are searched from the middle outwards, after the best move stored in the transposition
+	# table (tableMove). With dynamic ordering (see orderMovesDynamic()) the order also learns from earlier cutoffs.
+	def getMoveOrder(self, board, depth, tableMove, side):
+		if self.moveOrdering == "dynamic":
+			return self.orderMovesDynamic(board, depth, tableMove, side)
+
+		columnOrder = self.getColumnOrder(board)
+		if tableMove is not None:
+			columnOrder.remove(tableMove)
+			columnOrder.insert(0, tableMove)
+		return columnOrder
+
+
+	# This method orders the legal moves at a node as follows:
+	#   1. moves that win immediately
+	#   2. moves that block a square where the opponent would win immediately
+	#   3. the best move stored in the transposition table
+	#   4. the killer moves for this depth, i.e., the last two moves that caused a cutoff at the same depth, which often
+	#      cause a cutoff again in the sibling positions
+	#   5. the remaining moves, by their history score (how much the move has caused cutoffs anywhere in the search),
+	#      with ties broken by the static middle-outwards order
+	def orderMovesDynamic(self, board, depth, tableMove, side):
+		piece = "X" if side == 1 else "O"
+		opponentPiece = "O" if side == 1 else "X"
+		if len(self.history[0]) != board.numRows * board.numColumns:
+			self.resetMoveOrdering(board)
+		history = self.history[0 if side == 1 else 1]
+
+		# findTactics() has already dealt with the immediate wins and blocks when it is used at this depth
+		checkThreats = not (self.tactics and depth >= 2)
+
+		wins = list()
+		blocks = list()
+		others = list()
+		for col in self.getColumnOrder(board):
+			if board.colFills[col] < board.numRows:
+				if not checkThreats:
+					others.append(col)
+				elif board.isWinningMove(col, piece):
+					wins.append(col)
+				elif board.isWinningMove(col, opponentPiece):
+					blocks.append(col)
+				else:
+					others.append(col)
+
+		preferred = [tableMove] + self.killers.get(depth, [])
+		ordered = list()
+		for col in preferred:
+			if col in others and col not in ordered:
+				ordered.append(col)
+		rest = [col for col in others if col not in ordered]
+		# sorted() is stable, so moves with the same history score stay in the middle-outwards order
+		rest = sorted(rest, key=lambda col: -history[board.colFills[col] * board.numColumns + col])
+		return wins + blocks + ordered + rest
+
+
+	# This method records that a move by side (1 for X, -1 for O) caused a cutoff at the given depth. The move becomes the
+	# first killer move at that depth, and its history score is increased by depth squared, so cutoffs found near the root
+	# (which prune larger subtrees) count for more.
+	def recordCutoff(self, board, col, depth, side):
+		killers = self.killers.get(depth)
+		if killers is None:
+			self.killers[depth] = [col]
+		elif killers[0] != col:
+			self.killers[depth] = [col, killers[0]]
+		history = self.history[0 if side == 1 else 1]
+		history[board.colFills[col] * board.numColumns + col] += depth * depth
+
+
+	# This method prepares the dynamic move ordering for a new search: killer moves are forgotten and history scores are
+	# halved, so that what was learned in the last search still counts but new cutoffs soon count for more
+	def resetMoveOrdering(self, gameBoard):
+		self.killers = dict()
+		numCells = gameBoard.numRows * gameBoard.numColumns
+		for side in (0, 1):
+			if len(self.history[side]) != numCells:
+				self.history[side] = [0] * numCells
+			else:
+				self.history[side] = [score // 2 for score in self.history[side]]
 	
 
 	# This method implements the minimax algorithm. It should return the evaluation of the board.
 	def minimax(self, board, depth, maxPlayer):
 		self.numExpanded += 1
+		stats = self.stats
+		if stats is not None:
+			stats.nodeCounts[depth] += 1
+		# When searching with a time limit, check the clock every 1024 nodes
+		if self.deadline is not None and self.numExpanded % 1024 == 0 and time.time() > self.deadline:
+			raise SearchTimeout()
 
 		# If the game is over, or we have reached the maximum depth, or there is winner (a terminal node), return the evaluation of the board
 		if depth == 0 or board.checkFull() or board.checkWin():
@@ -95,7 +444,7 @@ class Player:
 		# If it is the maximising player's turn, return the maximum evaluation of the possible moves
 		if maxPlayer:
 			maxEval = float('-inf')
-			for col in range(board.numColumns):
+			for col in self.removeMirroredMoves(board, range(board.numColumns)):
 				if board.addPiece(col, "X"):
 					eval = self.minimax(board, depth - 1, not(maxPlayer))
 					board.removePiece(col)
@@ -104,7 +453,7 @@ class Player:
 		# If it is the minimising player's turn, return the minimum evaluation of the possible moves
 		else:
 			minEval = float('inf')
-			for col in range(board.numColumns):
+			for col in self.removeMirroredMoves(board, range(board.numColumns)):
 				if board.addPiece(col, "O"):
 					eval = self.minimax(board, depth - 1, not(maxPlayer))
 					board.removePiece(col)
@@ -112,74 +461,351 @@ class Player:
 			return minEval
 		
 
+	# This method looks for tactics at a node where side (1 for X, -1 for O) is to move, with depth moves remaining. It
+	# returns (value, moves), where value is the value of the node from X's point of view if the tactics decide it
+	# (otherwise None), and moves is the list of the only moves that need to be searched (or None to search them all):
+	#   1. if the player to move can win immediately, the node is a win one move below it
+	#   2. if the opponent has two or more spaces where they would win immediately, only one can be blocked, so the node
+	#      is a loss two moves below it
+	#   3. if the opponent has one such space, it must be blocked, so it is the only move searched
+	#   4. otherwise, a move directly below a space where the opponent would win lets the opponent win there at once, so
+	#      it is not searched, and if every move is like that the node is a loss two moves below it
+	# The last three need at least 2 moves remaining, as otherwise the opponent's win would not be seen by the search
+	# either. Each gives the same value as searching every move, since a win (or loss) sooner scores more (or less).
+	def findTactics(self, board, depth, side):
+		if depth < 2:
+			return None, None
+		piece = "X" if side == 1 else "O"
+		opponentPiece = "O" if side == 1 else "X"
+		legal = [col for col in range(board.numColumns) if board.colFills[col] < board.numRows]
+		for col in legal:
+			if board.isWinningMove(col, piece):
+				return side * (self.winValue + depth - 1), None
+
+		loss = -side * (self.winValue + depth - 2)
+		threats = [col for col in legal if board.isWinningMove(col, opponentPiece)]
+		if len(threats) > 1:
+			return loss, None
+		if threats:
+			return None, threats
+
+		safe = list()
+		for col in legal:
+			row = board.colFills[col] + 1
+			if row >= board.numRows or not board.isWinningCell(row, col, opponentPiece):
+				safe.append(col)
+		if not safe:
+			return loss, None
+		if len(safe) == len(legal):
+			return None, None
+		return None, safe
+
+
 	# This method implements the minimax algorithm with alpha-beta pruning. It should return the evaluation of the board.
 	def minimaxAlphaBeta(self, board, depth, alpha, beta, maxPlayer):
 		self.numExpanded += 1
+		stats = self.stats
+		if stats is not None:
+			stats.nodeCounts[depth] += 1
+		# When searching with a time limit, check the clock every 1024 nodes
+		if self.deadline is not None and self.numExpanded % 1024 == 0 and time.time() > self.deadline:
+			raise SearchTimeout()
 
 		# If the game is over, or we have reached the maximum depth, or there is winner (a terminal node), return the evaluation of the board
 		if depth == 0 or board.checkFull() or board.checkWin():
 			return self.evaluateWithDepth(board, depth)
 
-		#start considering moves from the middle of the board outwards
-		columnOrder = self.getColumnOrder(board)
+		# If this position has been searched before, use the stored result. A result searched to at least the same depth
+		# either gives the value directly or narrows the alpha-beta window; otherwise its best move is just searched first.
+		table = self.transpositionTable
+		tableMove = None
+		if table is not None:
+			key = self.getTableKey(board, maxPlayer)
+			entry = table.probe(key)
+			if entry is not None:
+				tableMove = self.mirrorTableMove(board, entry[transposition.MOVE])
+				if entry[transposition.DEPTH] >= depth:
+					value = self.adjustStoredValue(entry[transposition.VALUE], entry[transposition.DEPTH], depth)
+					flag = entry[transposition.FLAG]
+					if flag == transposition.EXACT:
+						return value
+					elif flag == transposition.LOWER:
+						alpha = max(alpha, value)
+					else:
+						beta = min(beta, value)
+					if beta <= alpha:
+						return value
+			originalAlpha = alpha
+			originalBeta = beta
+
+		# A position in the tablebase has an exact value, so it does not need searching
+		if self.tablebase is not None:
+			value = self.getTablebaseValue(board, depth, 1 if maxPlayer else -1)
+			if value is not None:
+				return value
+
+		# Decide the position without searching it if the tactics allow, or search only the moves they leave
+		tacticMoves = None
+		if self.tactics:
+			value, tacticMoves = self.findTactics(board, depth, 1 if maxPlayer else -1)
+			if value is not None:
+				return value
+
+		#start considering moves from the middle of the board outwards (after the stored best move)
+		columnOrder = self.removeMirroredMoves(board, self.getMoveOrder(board, depth, tableMove, 1 if maxPlayer else -1))
+		if tacticMoves is not None:
+			columnOrder = [col for col in columnOrder if col in tacticMoves]
+
+		bestMove = None
+		# the number of moves searched so far (columnOrder can include full columns, which are skipped)
+		searched = 0
 		# If it is the maximising player's turn, return the maximum evaluation of the possible moves
 		if maxPlayer:
-			maxEval = float('-inf')
+			bestEval = float('-inf')
 			for col in columnOrder:
 				if board.addPiece(col, "X"):
+					searched += 1
 					eval = self.minimaxAlphaBeta(board, depth - 1, alpha, beta, not(maxPlayer))
 					board.removePiece(col)
-					maxEval = max(maxEval, eval)
+					if eval > bestEval:
+						bestEval = eval
+						bestMove = col
 					alpha = max(alpha, eval)
 					if beta <= alpha:
 						self.numPruned += 1
+						if self.moveOrdering == "dynamic":
+							self.recordCutoff(board, col, depth, 1)
+						if stats is not None:
+							stats.recordCutoff(searched - 1)
 						break
-			return maxEval
 		# If it is the minimising player's turn, return the minimum evaluation of the possible moves
 		else:
-			minEval = float('inf')
+			bestEval = float('inf')
 			for col in columnOrder:
 				if board.addPiece(col, "O"):
+					searched += 1
 					eval = self.minimaxAlphaBeta(board, depth - 1, alpha, beta, not(maxPlayer))
 					board.removePiece(col)
-					minEval = min(minEval, eval)
+					if eval < bestEval:
+						bestEval = eval
+						bestMove = col
 					beta = min(beta, eval)
 					if beta <= alpha:
 						self.numPruned += 1
+						if self.moveOrdering == "dynamic":
+							self.recordCutoff(board, col, depth, -1)
+						if stats is not None:
+							stats.recordCutoff(searched - 1)
 						break
-			return minEval
+
+		# Store the result, recording whether it is the exact value or only a bound because the search was cut off
+		if table is not None:
+			if bestEval <= originalAlpha:
+				flag = transposition.UPPER
+			elif bestEval >= originalBeta:
+				flag = transposition.LOWER
+			else:
+				flag = transposition.EXACT
+			table.store(key, depth, bestEval, flag, self.mirrorTableMove(board, bestMove))
+		return bestEval
+
+
+	# This method implements negamax with principal variation search (PVS). Rather than separate maximising and minimising
+	# branches, every node maximises the value from the point of view of the player to move, which is side (1 for X and
+	# -1 for O) times the usual value, and a child's value is the negation of its own.
+	# The first move is searched with the full (alpha, beta) window. Assuming it is the best move, each later move is
+	# searched with a null window (alpha, alpha + 1), which only tests whether it is better and prunes far more. Only if
+	# it turns out to be better is it searched again with the full window. Values are integers, so a null window of
+	# width 1 is enough.
+	def negamax(self, board, depth, alpha, beta, side):
+		self.numExpanded += 1
+		stats = self.stats
+		if stats is not None:
+			stats.nodeCounts[depth] += 1
+		# When searching with a time limit, check the clock every 1024 nodes
+		if self.deadline is not None and self.numExpanded % 1024 == 0 and time.time() > self.deadline:
+			raise SearchTimeout()
+
+		# If the game is over, or we have reached the maximum depth, or there is winner (a terminal node), return the evaluation of the board
+		if depth == 0 or board.checkFull() or board.checkWin():
+			return side * self.evaluateWithDepth(board, depth)
+
+		# Use the transposition table as in minimaxAlphaBeta(). The table always holds values from X's point of view, so
+		# for O the value is negated and a lower bound for X is an upper bound for O.
+		table = self.transpositionTable
+		tableMove = None
+		if table is not None:
+			key = self.getTableKey(board, side == 1)
+			entry = table.probe(key)
+			if entry is not None:
+				tableMove = self.mirrorTableMove(board, entry[transposition.MOVE])
+				if entry[transposition.DEPTH] >= depth:
+					value = side * self.adjustStoredValue(entry[transposition.VALUE], entry[transposition.DEPTH], depth)
+					flag = entry[transposition.FLAG]
+					if flag == transposition.EXACT:
+						return value
+					elif (flag == transposition.LOWER) == (side == 1):
+						alpha = max(alpha, value)
+					else:
+						beta = min(beta, value)
+					if beta <= alpha:
+						return value
+			originalAlpha = alpha
+			originalBeta = beta
+
+		# Use the tablebase and the tactics as in minimaxAlphaBeta()
+		if self.tablebase is not None:
+			value = self.getTablebaseValue(board, depth, side)
+			if value is not None:
+				return side * value
+		tacticMoves = None
+		if self.tactics:
+			value, tacticMoves = self.findTactics(board, depth, side)
+			if value is not None:
+				return side * value
+
+		#start considering moves from the middle of the board outwards (after the stored best move)
+		columnOrder = self.removeMirroredMoves(board, self.getMoveOrder(board, depth, tableMove, side))
+		if tacticMoves is not None:
+			columnOrder = [col for col in columnOrder if col in tacticMoves]
+
+		piece = "X" if side == 1 else "O"
+		bestMove = None
+		bestEval = float('-inf')
+		# the number of moves searched so far (columnOrder can include full columns, which are skipped)
+		searched = 0
+		for col in columnOrder:
+			if board.addPiece(col, piece):
+				searched += 1
+				if bestMove is None:
+					eval = -self.negamax(board, depth - 1, -beta, -alpha, -side)
+				else:
+					eval = -self.negamax(board, depth - 1, -alpha - 1, -alpha, -side)
+					if alpha < eval < beta:
+						eval = -self.negamax(board, depth - 1, -beta, -alpha, -side)
+				board.removePiece(col)
+				if eval > bestEval:
+					bestEval = eval
+					bestMove = col
+				alpha = max(alpha, eval)
+				if beta <= alpha:
+					self.numPruned += 1
+					if self.moveOrdering == "dynamic":
+						self.recordCutoff(board, col, depth, side)
+					if stats is not None:
+						stats.recordCutoff(searched - 1)
+					break
+
+		# Store the result from X's point of view
+		if table is not None:
+			if bestEval <= originalAlpha:
+				flag = transposition.UPPER if side == 1 else transposition.LOWER
+			elif bestEval >= originalBeta:
+				flag = transposition.LOWER if side == 1 else transposition.UPPER
+			else:
+				flag = transposition.EXACT
+			table.store(key, depth, side * bestEval, flag, self.mirrorTableMove(board, bestMove))
+		return bestEval
 
 
 	# This method gets the best move utilising minimax without alpha-beta pruning. It should return the column that your next piece should be placed in.
 	def getMove(self, gameBoard):
+		self.stopPondering()
+		if self.stats is None:
+			return self.findMove(gameBoard)
+		self.stats.startMove(self)
+		move = self.findMove(gameBoard)
+		self.stats.endMove(self, move)
+		return move
+
+
+	# This method gets the best move utilising minimax with alpha-beta pruning. It should return the column that your next piece should be placed in.
+	def getMoveAlphaBeta(self, gameBoard):
+		ponderMove = self.finishPondering(gameBoard)
+		if ponderMove is not None:
+			if self.stats is not None:
+				self.stats.endMove(self, ponderMove, pondered=True)
+			return ponderMove
+		if self.stats is None:
+			return self.findMoveAlphaBeta(gameBoard)
+		self.stats.startMove(self)
+		move = self.findMoveAlphaBeta(gameBoard)
+		self.stats.endMove(self, move)
+		return move
+
+
+	# This method finds the move for getMove(), which records statistics about the search around it if there is a stats object
+	def findMove(self, gameBoard):
+		storedMove = self.getStoredMove(gameBoard)
+		if storedMove is not None:
+			return storedMove
+		gameBoard = self.prepareBoard(gameBoard)
+		if self.timeLimit is not None:
+			return self.iterativeDeepening(gameBoard, self.searchRoot)
+		return self.searchRoot(gameBoard, self.depth, None)[0]
+
+
+	# This method finds the move for getMoveAlphaBeta(), in the same way as findMove()
+	def findMoveAlphaBeta(self, gameBoard):
+		storedMove = self.getStoredMove(gameBoard)
+		if storedMove is not None:
+			return storedMove
+		if self.searchMode == "pvs":
+			return self.getMovePVS(gameBoard)
+		if self.searchMode == "solve":
+			return self.getMoveSolve(gameBoard)
+		if self.workers > 1:
+			return self.getMoveParallel(gameBoard)
+		gameBoard = self.prepareBoard(gameBoard)
+		if self.transpositionTable is not None:
+			self.transpositionTable.newSearch()
+		if self.moveOrdering == "dynamic":
+			self.resetMoveOrdering(gameBoard)
+		if self.timeLimit is not None:
+			return self.iterativeDeepening(gameBoard, self.searchRootAlphaBeta)
+		return self.searchRootAlphaBeta(gameBoard, self.depth, None)[0]
+
+
+	# This method searches each possible move with minimax to the given depth, and returns the best move and its evaluation.
+	# The firstMove argument is not used, as without pruning the order in which moves are searched makes no difference.
+	def searchRoot(self, gameBoard, depth, firstMove):
+		if self.stats is not None:
+			self.stats.startSearch(depth)
 		maxPlayer = (self.name == 'X') # True if this player is the maximising player (X)
 		bestMove = None
 		bestEval = float('-inf')
 
 		# For each possible move, get the evaluation of the board and return the best move (maximum value move)
-		for col in range(gameBoard.numColumns):
+		for col in self.removeMirroredMoves(gameBoard, range(gameBoard.numColumns)):
 			if gameBoard.addPiece(col, self.name):
-				eval = self.minimax(gameBoard, self.depth, not(maxPlayer))  # 6 is the depth
+				eval = self.minimax(gameBoard, depth, not(maxPlayer))
 				gameBoard.removePiece(col)
 				if eval > bestEval:
 					bestEval = eval
 					bestMove = col
-		return bestMove
+		return bestMove, bestEval
 
 
-	# This method gets the best move utilising minimax with alpha-beta pruning. It should return the column that your next piece should be placed in.
-	def getMoveAlphaBeta(self, gameBoard):
+	# This method searches each possible move with minimax with alpha-beta pruning to the given depth, and returns the best
+	# move and its evaluation. If firstMove is given (e.g., the best move from a shallower search) it is searched first.
+	def searchRootAlphaBeta(self, gameBoard, depth, firstMove):
+		if self.stats is not None:
+			self.stats.startSearch(depth)
 		maxPlayer = (self.name == 'X')
 		bestMove = None
 
 		#start considering moves from the middle of the board outwards
 		columnOrder = self.getColumnOrder(gameBoard)
+		if firstMove is not None:
+			columnOrder.remove(firstMove)
+			columnOrder.insert(0, firstMove)
+		columnOrder = self.removeMirroredMoves(gameBoard, columnOrder)
 		# For each possible move, get the evaluation of the board and return the best move (maximum value move)
 		if maxPlayer:
 			bestEval = float('-inf')
 			for col in columnOrder:
 				if gameBoard.addPiece(col, self.name):
-					eval = self.minimaxAlphaBeta(gameBoard, self.depth, float('-inf'), float('inf'), not(maxPlayer))
+					eval = self.minimaxAlphaBeta(gameBoard, depth, float('-inf'), float('inf'), not(maxPlayer))
 					gameBoard.removePiece(col)
 					if eval > bestEval:
 						bestEval = eval
@@ -189,12 +815,468 @@ class Player:
 			bestEval = float('inf')
 			for col in columnOrder:
 				if gameBoard.addPiece(col, self.name):
-					eval = self.minimaxAlphaBeta(gameBoard, self.depth, float('-inf'), float('inf'), not(maxPlayer))
+					eval = self.minimaxAlphaBeta(gameBoard, depth, float('-inf'), float('inf'), not(maxPlayer))
 					gameBoard.removePiece(col)
 					if eval < bestEval:
 						bestEval = eval
 						bestMove = col
+		return bestMove, bestEval
+
+
+	# This method repeatedly calls searchRoot (one of the methods above) with depth 0, 1, 2, ... until the time limit runs
+	# out or the search reaches the end of the game, and returns the best move of the deepest search that finished.
+	# Each search is given the best move of the previous one to search first. A search that runs out of time is
+	# abandoned (by raising SearchTimeout), and as it works on its own copy of the board, the board is left unchanged.
+	def iterativeDeepening(self, gameBoard, searchRoot, timeLimit=None):
+		self.deadline = time.time() + (timeLimit if timeLimit is not None else self.timeLimit)
+		self.lastSearchDepth = None
+		bestMove = None
+
+		# the root search places one piece, so a depth of (number of empty spaces - 1) reaches the end of the game
+		emptySpaces = gameBoard.numRows * gameBoard.numColumns - sum(gameBoard.colFills)
+		try:
+			for depth in range(emptySpaces):
+				bestMove = searchRoot(gameBoard.copy(), depth, bestMove)[0]
+				self.lastSearchDepth = depth
+		except SearchTimeout:
+			pass
+		finally:
+			self.deadline = None
+
+		# if not even the shallowest search finished, play the first legal move from the middle outwards
+		if bestMove is None:
+			for col in self.getColumnOrder(gameBoard):
+				if gameBoard.colFills[col] < gameBoard.numRows:
+					return col
 		return bestMove
-	
-	
-	
\ No newline at end of file
+
+
+	# This method gets the best move utilising negamax with principal variation search (see negamax()).
+	# The search is repeated with depth 0, 1, ..., self.depth (or, with a time limit, until the time runs out), with the best
+	# move of each search searched first in the next. Each search after the first uses an aspiration window: it expects the
+	# value to be within aspirationWindow of the previous value, which prunes more, and only if the value turns out to be
+	# outside the window is the search repeated with the window opened up on that side.
+	def getMovePVS(self, gameBoard):
+		storedMove = self.getStoredMove(gameBoard)
+		if storedMove is not None:
+			return storedMove
+		gameBoard = self.prepareBoard(gameBoard)
+		if self.transpositionTable is not None:
+			self.transpositionTable.newSearch()
+		if self.moveOrdering == "dynamic":
+			self.resetMoveOrdering(gameBoard)
+
+		# the root search places one piece, so a depth of (number of empty spaces - 1) reaches the end of the game
+		emptySpaces = gameBoard.numRows * gameBoard.numColumns - sum(gameBoard.colFills)
+		maxDepth = min(self.depth, emptySpaces - 1)
+		if self.timeLimit is not None:
+			self.deadline = time.time() + self.timeLimit
+			maxDepth = emptySpaces - 1
+
+		self.lastSearchDepth = None
+		bestMove = None
+		bestEval = None
+		try:
+			for depth in range(maxDepth + 1):
+				if bestEval is None:
+					alpha = float('-inf')
+					beta = float('inf')
+				else:
+					alpha = bestEval - self.aspirationWindow
+					beta = bestEval + self.aspirationWindow
+
+				while True:
+					move, eval = self.searchRootPVS(gameBoard.copy(), depth, bestMove, alpha, beta)
+					if eval <= alpha:
+						alpha = float('-inf')
+					elif eval >= beta:
+						beta = float('inf')
+					else:
+						break
+				bestMove = move
+				bestEval = eval
+				self.lastSearchDepth = depth
+		except SearchTimeout:
+			pass
+		finally:
+			self.deadline = None
+
+		# if not even the shallowest search finished, play the first legal move from the middle outwards
+		if bestMove is None:
+			for col in self.getColumnOrder(gameBoard):
+				if gameBoard.colFills[col] < gameBoard.numRows:
+					return col
+		return bestMove
+
+
+	# This method searches each possible move with negamax to the given depth within the window (alpha, beta), and returns
+	# the best move and its value from this player's point of view. Unlike searchRootAlphaBeta(), the window is carried from
+	# one move to the next, so after the first move the others only need to be shown to be no better.
+	def searchRootPVS(self, gameBoard, depth, firstMove, alpha, beta):
+		if self.stats is not None:
+			self.stats.startSearch(depth)
+		side = 1 if self.name == "X" else -1
+
+		#start considering moves from the middle of the board outwards
+		columnOrder = self.getColumnOrder(gameBoard)
+		if firstMove is not None:
+			columnOrder.remove(firstMove)
+			columnOrder.insert(0, firstMove)
+		columnOrder = self.removeMirroredMoves(gameBoard, columnOrder)
+
+		bestMove = None
+		bestEval = float('-inf')
+		for col in columnOrder:
+			if gameBoard.addPiece(col, self.name):
+				if bestMove is None or alpha == float('-inf'):
+					eval = -self.negamax(gameBoard, depth, -beta, -alpha, -side)
+				else:
+					eval = -self.negamax(gameBoard, depth, -alpha - 1, -alpha, -side)
+					if alpha < eval < beta:
+						eval = -self.negamax(gameBoard, depth, -beta, -alpha, -side)
+				gameBoard.removePiece(col)
+				if eval > bestEval:
+					bestEval = eval
+					bestMove = col
+				alpha = max(alpha, eval)
+				if beta <= alpha:
+					self.numPruned += 1
+					break
+		return bestMove, bestEval
+
+
+	# This method gets the best move utilising minimax with alpha-beta pruning, with the moves at the root searched in
+	# parallel by a pool of worker processes (see searchRootParallel()). With a time limit, the parallel search is
+	# repeated with increasing depth, as in iterativeDeepening(), and the workers are given the same deadline.
+	def getMoveParallel(self, gameBoard):
+		gameBoard = self.prepareBoard(gameBoard)
+		if self.transpositionTable is not None:
+			self.transpositionTable.newSearch()
+		if self.moveOrdering == "dynamic":
+			self.resetMoveOrdering(gameBoard)
+
+		if self.pool is None:
+			self.sharedBound = mp.Value('d', 0.0)
+			self.pool = mp.Pool(self.workers, initializer=initParallelWorker, initargs=(self.sharedBound,))
+		if self.timeLimit is not None:
+			return self.iterativeDeepening(gameBoard, self.searchRootParallel)
+		return self.searchRootParallel(gameBoard, self.depth, None)[0]
+
+
+	# This method searches each possible move to the given depth, with the moves shared between the worker processes,
+	# and returns the best move and its evaluation. If firstMove is given it is searched first. Workers share the best
+	# value found so far (the alpha bound for X, or the beta bound for O) through shared memory, and each root move is
+	# searched with a window that only has to show the move is no better than that, much as the later moves are pruned
+	# in a sequential search. The bound is read again before each reply to the root move is searched (see
+	# searchRootMoveShared()), so a better move found by another worker prunes the rest of the search. The numbers of
+	# nodes expanded and pruned by the workers are added to this player's counts.
+	#
+	# With youngerBrothersWait, the first (middle) move is searched here before the others are given to the workers,
+	# so they all start with a good bound, rather than all starting with an infinite window.
+	#
+	# The move returned is the same as searchRootAlphaBeta() chooses: a move is only shown to be worse if its value is
+	# strictly less than the best value found, so every move with the best value gets its exact value, and ties are
+	# broken by the same middle-outwards order. (This relies on values being integers.) If the deadline passes in any
+	# worker, SearchTimeout is raised once every worker has stopped.
+	def searchRootParallel(self, gameBoard, depth, firstMove):
+		maxPlayer = (self.name == 'X')
+		self.sharedBound.value = float('-inf') if maxPlayer else float('inf')
+
+		columnOrder = self.getColumnOrder(gameBoard)
+		if firstMove is not None:
+			columnOrder.remove(firstMove)
+			columnOrder.insert(0, firstMove)
+		columnOrder = [col for col in columnOrder if gameBoard.colFills[col] < gameBoard.numRows]
+		columnOrder = self.removeMirroredMoves(gameBoard, columnOrder)
+		results = list()
+		if self.stats is not None:
+			self.stats.startSearch(depth)
+		if self.youngerBrothersWait:
+			firstMove = columnOrder.pop(0)
+			gameBoard.addPiece(firstMove, self.name)
+			try:
+				eval = self.minimaxAlphaBeta(gameBoard, depth, float('-inf'), float('inf'), not(maxPlayer))
+			finally:
+				gameBoard.removePiece(firstMove)
+			self.sharedBound.value = eval
+			results.append((firstMove, eval, True, True, 0, 0))
+
+		# the workers are given a copy of the board without the evaluator, which they attach themselves
+		workerBoard = gameBoard.copy()
+		workerBoard.setEvaluator(None)
+		settings = (self.name, self.boardClass, self.transpositionSize, self.evaluator, self.moveOrdering, self.tactics,
+			self.tablebasePath)
+		tasks = [((mp.current_process().pid, id(self)), settings, workerBoard, col, depth, self.deadline)
+			for col in columnOrder]
+		results.extend(self.pool.map(searchRootMoveInWorker, tasks))
+
+		# choose the first move, in the middle-outwards order, with the best exact value
+		bestMove = None
+		bestEval = None
+		timedOut = False
+		for col, eval, exact, finished, expanded, pruned in results:
+			self.numExpanded += expanded
+			self.numPruned += pruned
+			if not finished:
+				timedOut = True
+			elif exact and (bestEval is None or (eval > bestEval if maxPlayer else eval < bestEval)):
+				bestEval = eval
+				bestMove = col
+		if timedOut:
+			raise SearchTimeout()
+		return bestMove, bestEval
+
+
+	# This method is run in a worker process to search a single root move to the given depth for searchRootParallel().
+	# The window is set so that the value is exact if the move could be the best (or as good as the best) move found so
+	# far, and only an upper bound (for X; a lower bound for O) otherwise. The opponent's replies are searched here
+	# rather than by minimaxAlphaBeta(), so that the shared bound can be read again before each of them. It returns
+	# the move, its value, whether the value is exact, whether the search finished before the deadline, and the numbers
+	# of nodes expanded and pruned.
+	def searchRootMoveShared(self, gameBoard, col, depth, sharedBound):
+		numExpanded = self.numExpanded
+		numPruned = self.numPruned
+		gameBoard = self.prepareBoard(gameBoard)
+		maxPlayer = (self.name == 'X')
+		side = 1 if maxPlayer else -1
+
+		gameBoard.addPiece(col, self.name)
+		try:
+			if depth == 0 or gameBoard.checkFull() or gameBoard.checkWin():
+				eval = self.evaluateWithDepth(gameBoard, depth)
+				exact = True
+			else:
+				self.numExpanded += 1
+				# the best value for the opponent so far, and the bound it has to beat for this move to be no better
+				# than the best found by any worker (bound - 1 for X, or bound + 1 for O)
+				eval = None
+				limit = None
+				replies = self.removeMirroredMoves(gameBoard, self.getMoveOrder(gameBoard, depth, None, -side))
+				for reply in replies:
+					if gameBoard.addPiece(reply, self.opponent):
+						limit = sharedBound.value - side
+						if maxPlayer:
+							value = self.minimaxAlphaBeta(gameBoard, depth - 1, limit,
+								float('inf') if eval is None else eval, True)
+						else:
+							value = self.minimaxAlphaBeta(gameBoard, depth - 1, float('-inf') if eval is None else eval,
+								limit, False)
+						gameBoard.removePiece(reply)
+						if eval is None or side * value < side * eval:
+							eval = value
+						if side * eval <= side * limit:
+							self.numPruned += 1
+							break
+				# the bound only ever improves, so if the value beats the last bound it was exact for every reply
+				exact = side * eval > side * limit
+		except SearchTimeout:
+			return (col, None, False, False, self.numExpanded - numExpanded, self.numPruned - numPruned)
+		finally:
+			self.deadline = None
+
+		# share the new best value with the other workers
+		if exact:
+			with sharedBound.get_lock():
+				if (eval > sharedBound.value) if maxPlayer else (eval < sharedBound.value):
+					sharedBound.value = eval
+		return (col, eval, exact, True, self.numExpanded - numExpanded, self.numPruned - numPruned)
+
+
+	# This method gets the best move by solving the position exactly (see solver.py), so depth and the evaluator are not
+	# used. Of the moves with the best result it plays the quickest win or the slowest loss. The result of the position for
+	# this player, the number of moves to the end of the game and the number of nodes searched are stored in
+	# lastSolveResult, and the nodes are also added to numExpanded.
+	# Without a time limit the solve runs until it finishes, which is only practical on the smaller boards or late in a
+	# game on 6x7 (see solver.py for timings). With a time limit the solver gets half of it, and if the position is not
+	# solved by then, lastSolveResult is (None, None, nodes) and the move is found by an alpha-beta search with iterative
+	# deepening in the rest of the time.
+	def getMoveSolve(self, gameBoard):
+		if self.solver is None or (self.solver.numRows, self.solver.numColumns, self.solver.winNum) != \
+				(gameBoard.numRows, gameBoard.numColumns, gameBoard.winNum):
+			tableSize = self.transpositionSize if self.transpositionSize > 0 else 2**22
+			self.solver = solver.Solver(gameBoard.numRows, gameBoard.numColumns, gameBoard.winNum, tableSize)
+
+		start = time.time()
+		self.solver.numNodes = 0
+		self.solver.setLimits(timeLimit=self.timeLimit / 2 if self.timeLimit is not None else None)
+		try:
+			bestMove, score = self.solver.bestMove(gameBoard, self.name)
+		except solver.SolveLimitReached:
+			bestMove = None
+		finally:
+			self.solver.setLimits()
+		self.numExpanded += self.solver.numNodes
+		if bestMove is not None:
+			numPieces = sum(gameBoard.colFills)
+			self.lastSolveResult = self.solver.describeScore(score, numPieces) + (self.solver.numNodes,)
+			self.lastSearchDepth = None
+			return bestMove
+
+		self.lastSolveResult = (None, None, self.solver.numNodes)
+		gameBoard = self.prepareBoard(gameBoard)
+		if self.transpositionTable is not None:
+			self.transpositionTable.newSearch()
+		if self.moveOrdering == "dynamic":
+			self.resetMoveOrdering(gameBoard)
+		return self.iterativeDeepening(gameBoard, self.searchRootAlphaBeta, self.timeLimit - (time.time() - start))
+
+
+	# This method is called (e.g., by game.Game) with the board after every move of the game. If pondering is on and
+	# the last move was this player's, it predicts the opponent's reply, and searches the position after that reply in a
+	# background thread, as getMoveAlphaBeta() would, until the opponent moves. If the opponent then plays the predicted
+	# reply, getMoveAlphaBeta() carries on with that search rather than starting again (see finishPondering()), and
+	# either way the transposition table keeps what was found. The thread only runs while this player is waiting, so it
+	# shares the transposition table and move ordering with the rest of the search without any locking.
+	# Pondering helps most against a person (see humanPlayer.py), as waiting for input leaves the processor free. The
+	# thread runs in the same process as the game, so against another engine in that process it takes processor time
+	# (the GIL) from the opponent's search, which is why game.Game only calls this when it is created with ponder=True.
+	def startPondering(self, gameBoard):
+		if gameBoard.checkWin() or gameBoard.checkFull():
+			self.stopPondering()
+			return
+		# after the opponent's move, the search carries on until getMoveAlphaBeta() is called
+		if gameBoard.lastPlay[2] != self.name:
+			return
+		self.stopPondering()
+		if not self.ponder or self.searchMode == "solve" or self.workers > 1:
+			return
+
+		gameBoard = self.prepareBoard(gameBoard.copy())
+		gameBoard.addPiece(self.predictReply(gameBoard), self.opponent)
+		if gameBoard.checkWin() or gameBoard.checkFull() or self.getStoredMove(gameBoard) is not None:
+			return
+
+		if self.transpositionTable is not None:
+			self.transpositionTable.newSearch()
+		if self.moveOrdering == "dynamic":
+			self.resetMoveOrdering(gameBoard)
+		self.ponderKey = (gameBoard.hash, tuple(gameBoard.colFills))
+		self.ponderResult = None
+		# the pondering search is recorded as the search for the next move, which is thrown away if the prediction misses
+		if self.stats is not None:
+			self.stats.startMove(self)
+		# the thread stops when the deadline passes, so it starts with no deadline at all
+		self.deadline = float('inf')
+		self.ponderStart = time.time()
+		self.ponderEnd = None
+		self.ponderThread = threading.Thread(target=self.ponderSearch, args=(gameBoard,), daemon=True)
+		self.ponderThread.start()
+
+
+	# This method returns the opponent's predicted reply on the board (with the opponent to move): the best move stored in
+	# the transposition table by the search for this player's last move, or else the first move in the dynamic order,
+	# which puts immediate wins and blocks first
+	def predictReply(self, gameBoard):
+		if self.transpositionTable is not None:
+			entry = self.transpositionTable.probe(self.getTableKey(gameBoard, self.opponent == "X"))
+			if entry is not None:
+				move = self.mirrorTableMove(gameBoard, entry[transposition.MOVE])
+				if move is not None and gameBoard.colFills[move] < gameBoard.numRows:
+					return move
+		return self.orderMovesDynamic(gameBoard, 1, None, 1 if self.opponent == "X" else -1)[0]
+
+
+	# This method runs in the pondering thread. With a time limit it deepens the search until it is stopped, and with a
+	# fixed depth it makes the same search as getMoveAlphaBeta(). ponderResult is updated as each search finishes.
+	def ponderSearch(self, gameBoard):
+		emptySpaces = gameBoard.numRows * gameBoard.numColumns - sum(gameBoard.colFills)
+		try:
+			if self.timeLimit is None and self.searchMode != "pvs":
+				self.ponderResult = (self.searchRootAlphaBeta(gameBoard, self.depth, None)[0], self.depth)
+				return
+			maxDepth = emptySpaces - 1 if self.timeLimit is not None else min(self.depth, emptySpaces - 1)
+			bestMove = None
+			for depth in range(maxDepth + 1):
+				if self.searchMode == "pvs":
+					bestMove = self.searchRootPVS(gameBoard.copy(), depth, bestMove, float('-inf'), float('inf'))[0]
+				else:
+					bestMove = self.searchRootAlphaBeta(gameBoard.copy(), depth, bestMove)[0]
+				self.ponderResult = (bestMove, depth)
+		except SearchTimeout:
+			pass
+		finally:
+			self.ponderEnd = time.time()
+
+
+	# This method is called when it is this player's move. If the opponent played the predicted reply, the pondering
+	# search carries on and its move is returned: with a fixed depth the search carries on until it finishes, and with a
+	# time limit the time spent pondering counts towards the limit, so if the opponent took longer than timeLimit the
+	# move is returned at once. Otherwise the search is stopped and None is returned, so the move is searched as usual.
+	def finishPondering(self, gameBoard):
+		if self.ponderThread is None:
+			return None
+		if (gameBoard.hash, tuple(gameBoard.colFills)) != self.ponderKey:
+			self.numPonderMisses += 1
+			self.stopPondering()
+			return None
+
+		self.numPonderHits += 1
+		if self.timeLimit is not None:
+			self.deadline = self.ponderStart + self.timeLimit
+		self.ponderThread.join()
+		self.ponderThread = None
+		self.deadline = None
+		if self.ponderResult is None:
+			return None
+		move, depth = self.ponderResult
+		self.lastSearchDepth = depth
+		return move
+
+
+	# This method stops the pondering thread, if there is one, and waits for it to finish
+	def stopPondering(self):
+		if self.ponderThread is None:
+			return
+		# the search checks the deadline every 1024 nodes, and one that has passed stops it
+		self.deadline = 0
+		self.ponderThread.join()
+		self.ponderThread = None
+		self.deadline = None
+
+
+	# This method shuts down the pool of worker processes used by getMoveParallel(), if there is one, and stops pondering
+	def close(self):
+		self.stopPondering()
+		if self.pool is not None:
+			self.pool.close()
+			self.pool.join()
+			self.pool = None
+			self.sharedBound = None
+
+
+	# A Player is copied to other processes (e.g., by testPlay.py) without its pool of worker processes or its opening
+	# book and tablebase, which are mapped again when they are needed
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["pool"] = None
+		state["sharedBound"] = None
+		state["book"] = None
+		state["tablebase"] = None
+		state["solver"] = None
+		state["ponderThread"] = None
+		return state
+
+
+# The shared bound, and the Players searching for each parallel search, in a worker process of getMoveParallel()
+workerBound = None
+workerPlayers = dict()
+
+# This function is run when each worker process of getMoveParallel() starts, to receive the shared bound
+def initParallelWorker(sharedBound):
+	global workerBound
+	workerBound = sharedBound
+
+
+# This function searches one root move in a worker process. Each worker keeps one Player for each Player in the main
+# process that it works for, so the worker's transposition table and move ordering last for the whole game. The
+# search stops at the main process's deadline (None if it has no time limit).
+def searchRootMoveInWorker(task):
+	owner, settings, gameBoard, col, depth, deadline = task
+	searcher = workerPlayers.get(owner)
+	if searcher is None:
+		name, boardClass, transpositionSize, evaluator, moveOrdering, tactics, tablebasePath = settings
+		searcher = Player(name, boardClass=boardClass, transpositionSize=transpositionSize, evaluator=evaluator,
+			moveOrdering=moveOrdering, tactics=tactics, tablebasePath=tablebasePath)
+		workerPlayers[owner] = searcher
+	searcher.deadline = deadline
+	return searcher.searchRootMoveShared(gameBoard, col, depth, workerBound)
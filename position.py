@@ -0,0 +1,171 @@
+import board
+
+# This file holds the ways a position or a game is saved, so that it can be stored, shared and loaded again without
+# pickling a whole board:
+#
+#     move strings    the columns played, in order, one character each: 0-9 and then a-z for columns 10 to 35, with
+#                     '.' for a turn lost to an illegal move, e.g., "3342" for X in 3, O in 3, X in 4 and O in 2
+#     position codes  the position packed into an integer by Board.encode() (or BitBoard.encode()), with one code for
+#                     each position however it was reached, and packed into codeSize() bytes by toBytes()
+#     game records    one game per line of a text file, as "rows columns winNum result moves", where result is the
+#                     value returned by game.Game.playGame() (1 if the first player won, -1 if the second player won
+#                     and 0 for a draw) and moves is the move string, or '-' if no moves were played. Lines starting
+#                     with '#' are comments. game.Game.playGame() appends the record of the game to a file if it is
+#                     given one.
+
+MOVE_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+PASS = "."
+
+
+# This function returns the move string for a list of columns, where None stands for a lost turn
+def movesToString(moves):
+	return "".join(PASS if move is None else MOVE_DIGITS[move] for move in moves)
+
+
+# This function returns the list of columns in a move string, with None for a lost turn
+def stringToMoves(text):
+	moves = list()
+	for digit in text:
+		if digit == PASS:
+			moves.append(None)
+			continue
+		move = MOVE_DIGITS.find(digit.lower())
+		if move < 0:
+			raise ValueError("invalid move %r in move string" % digit)
+		moves.append(move)
+	return moves
+
+
+# This function returns the board (of the given class) after playing the moves, which are a move string or a list of
+# columns, with X moving first. It raises ValueError if a move is not legal or is played after the game has ended.
+def boardFromMoves(rows, columns, winNum, moves, boardClass=board.Board):
+	if isinstance(moves, str):
+		moves = stringToMoves(moves)
+	gameBoard = boardClass(rows, columns, winNum)
+	name = "X"
+	for i, move in enumerate(moves):
+		if move is not None:
+			if gameBoard.checkWin():
+				raise ValueError("move %d is played after the game has been won" % (i + 1))
+			if move < 0 or move >= columns or not gameBoard.addPiece(move, name):
+				raise ValueError("move %d (column %d) is not legal" % (i + 1, move))
+		name = "O" if name == "X" else "X"
+	return gameBoard
+
+
+# This function returns a list of moves that reaches the position on the board from the empty board, e.g., to save a
+# position whose moves were not kept. Pieces are taken off the tops of the columns in turn (the last play first), and
+# any order that takes off each player's pieces in turn without getting stuck gives the position, so this searches for
+# one depth first. It raises ValueError if the position cannot be reached in a game.
+def movesFromBoard(gameBoard):
+	heights = list(gameBoard.colFills)
+	pieces = [[str(gameBoard.checkSpace(row, column)) for row in range(gameBoard.numRows)]
+		for column in range(gameBoard.numColumns)]
+	numX = sum(column.count("X") for column in pieces)
+	numO = sum(column.count("O") for column in pieces)
+	if numX - numO not in (0, 1):
+		raise ValueError("the numbers of pieces cannot be reached in a game")
+
+	# In a won position the winning move must be taken off first, so that the game did not end earlier. It may be any
+	# top piece of the winner that leaves no complete line when taken off.
+	lastPlayer = "X" if numX > numO else "O"
+	first = None
+	if gameBoard.checkWin():
+		work = board.Board.fromBoard(gameBoard)
+		first = list()
+		for column in range(gameBoard.numColumns):
+			if heights[column] > 0 and pieces[column][heights[column] - 1] == lastPlayer:
+				work.removePiece(column)
+				if max(work.getLineCounts(lastPlayer)) < gameBoard.winNum:
+					first.append(column)
+				work.addPiece(column, lastPlayer)
+
+	moves = list()
+	failed = set()
+
+	def takeOff(name):
+		if sum(heights) == 0:
+			return True
+		state = tuple(heights)
+		if state in failed:
+			return False
+		order = range(gameBoard.numColumns) if first is None or moves else first
+		for column in order:
+			if heights[column] > 0 and pieces[column][heights[column] - 1] == name:
+				heights[column] -= 1
+				moves.append(column)
+				if takeOff("O" if name == "X" else "X"):
+					return True
+				moves.pop()
+				heights[column] += 1
+		failed.add(state)
+		return False
+
+	if not takeOff(lastPlayer):
+		raise ValueError("the position cannot be reached in a game")
+	moves.reverse()
+	return moves
+
+
+# This function returns the number of bytes used to pack a position code for the board size
+def codeSize(rows, columns):
+	return (columns * (rows + 1) + 7) // 8
+
+
+# This function returns the position on the board packed into codeSize() bytes
+def toBytes(gameBoard):
+	return gameBoard.encode().to_bytes(codeSize(gameBoard.numRows, gameBoard.numColumns), "little")
+
+
+# This function returns the board (of the given class) for a position code
+def decode(rows, columns, winNum, code, boardClass=board.Board):
+	gameBoard = board.Board.fromCode(rows, columns, winNum, code)
+	if boardClass is not board.Board:
+		gameBoard = boardClass.fromBoard(gameBoard)
+	return gameBoard
+
+
+# This function returns the board (of the given class) for a position packed by toBytes()
+def fromBytes(rows, columns, winNum, data, boardClass=board.Board):
+	if len(data) != codeSize(rows, columns):
+		raise ValueError("expected %d bytes for a %dx%d board" % (codeSize(rows, columns), rows, columns))
+	return decode(rows, columns, winNum, int.from_bytes(data, "little"), boardClass)
+
+
+# This function returns the code of the mirror image of the position with the given code, by reversing the order of
+# the columns
+def mirrorCode(code, rows, columns):
+	height = rows + 1
+	columnMask = (1 << height) - 1
+	mirrored = 0
+	for column in range(columns):
+		mirrored |= ((code >> (column * height)) & columnMask) << ((columns - 1 - column) * height)
+	return mirrored
+
+
+# This function returns the canonical code of the position on the board: the smaller of its code and the code of its
+# mirror image, so a position and its mirror image share a code (e.g., as a key for cached results)
+def canonicalCode(gameBoard):
+	code = gameBoard.encode()
+	return min(code, mirrorCode(code, gameBoard.numRows, gameBoard.numColumns))
+
+
+# This function appends the record of a game to a file
+def writeRecord(path, rows, columns, winNum, result, moves):
+	with open(path, "a") as file:
+		file.write("%d %d %d %d %s\n" % (rows, columns, winNum, result, movesToString(moves) or "-"))
+
+
+# This function reads the game records in a file, and returns a list of (rows, columns, winNum, result, moves) tuples,
+# where moves is a list of columns (with None for a lost turn)
+def readRecords(path):
+	records = list()
+	with open(path) as file:
+		for line in file:
+			line = line.strip()
+			if line == "" or line.startswith("#"):
+				continue
+			rows, columns, winNum, result, moves = line.split()
+			moves = [] if moves == "-" else stringToMoves(moves)
+			records.append((int(rows), int(columns), int(winNum), int(result), moves))
+	return records
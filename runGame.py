@@ -3,6 +3,9 @@ import game
 import player
 import randomPlayer
 import humanPlayer
+import evaluation
+import mctsPlayer
+import ntuple
 # Note that you can comment out the following if you don't want to seed the random player differently each run
 from datetime import datetime
 
@@ -22,6 +25,24 @@ p1 = humanPlayer.humanPlayer("X")
 seed = datetime.now().timestamp()
 #p2 = randomPlayer.RandomPlayer("O", seed)
 p2 = player.Player("O", depth=7)
+# Instead of a fixed depth, player 2 can be given a time limit (in seconds) for each move
+# p2 = player.Player("O", timeLimit=2, transpositionSize=2**20)
+# Player 2 can also keep searching while you think about your move, so it usually replies at once (the game must
+# then be created with ponder=True, e.g., game.Game(p1, p2, 6, 7, 4, ponder=True))
+# p2 = player.Player("O", depth=9, transpositionSize=2**20, moveOrdering="dynamic", ponder=True)
+# Player 2 can also score the positions where its search stops with a heuristic, which needs much less depth
+# p2 = player.Player("O", depth=3, evaluator=evaluation.HeuristicEvaluator(6, 7, 4))
+# or with an evaluator learnt by self-play and saved to a file (see ntuple.py)
+# p2 = player.Player("O", depth=3, evaluator=ntuple.load("ntuple674.bin"))
+# Player 2 can also play perfectly by solving each position exactly (practical on the smaller boards below)
+# p2 = player.Player("O", searchMode="solve")
+# On 6x7, the early positions cannot be solved in a reasonable time, so give it a time limit, and it falls back to an
+# alpha-beta search when a position is not solved in half of it
+# p2 = player.Player("O", searchMode="solve", timeLimit=4, transpositionSize=2**20)
+# or from a tablebase built in advance with buildTablebase.py (practical up to 5 rows, 6 columns and 3 in a line)
+# p2 = player.Player("O", tablebasePath="tb453.bin")
+# Player 2 can also use Monte Carlo Tree Search, with a budget of playouts (or a time limit) for each move
+# p2 = mctsPlayer.MCTSPlayer("O", playouts=5000)
 # Instead of randomly seeding, you can comment out the following line to seed the random player and
 # test with a consistent opponent
 # p2 = randomPlayer.RandomPlayer("O", 42)
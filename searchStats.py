@@ -0,0 +1,183 @@
+import time
+
+# Statistics about the searches made by a player.Player, collected move by move. A Player created with a SearchStats
+# (the stats argument) records one MoveStats for every move it chooses:
+#
+#     moveNumber          the number of the move among the moves this player has chosen (from 1)
+#     move                the column chosen
+#     depth               the depth searched (the deepest finished search with iterative deepening)
+#     nodes, pruned       the numbers of nodes expanded and cutoffs made (the change in numExpanded and numPruned)
+#     time                the time taken to choose the move, in seconds
+#     nodesPerSecond      nodes / time
+#     nodesPerPly         nodesPerPly[k] is the number of nodes expanded k moves below the root (nodesPerPly[0] = 0,
+#                         as the root itself is not counted), over all the searches made for the move
+#     cutoffsByIndex      cutoffsByIndex[i] is the number of cutoffs made by the ith move searched at a node
+#     firstCutoffRate     the fraction of cutoffs made by the first move searched (the better the move ordering, the
+#                         closer this is to 1)
+#     branchingFactor     the effective branching factor b of the deepest search, i.e., a tree of that depth where
+#                         every node has b children has the same number of nodes
+#     ttHits, ttMisses, ttStores
+#                         the changes in the transposition table's counters
+#     pondered            True if the move was found by pondering (see player.Player.startPondering()), i.e., by a
+#                         search started while the opponent was choosing their move; time is then the time that search
+#                         ran for, and the other statistics also cover it
+#
+# If a callback is given, it is called with each MoveStats as soon as the move has been chosen.
+#
+# Counting nodes by ply and cutoffs by index costs a little time at every node, so a Player without a SearchStats
+# only checks that its stats attribute is None. The nodes searched by the worker processes of a parallel search are
+# included in nodes, but not in nodesPerPly or cutoffsByIndex.
+
+
+# The statistics of the search for a single move
+class MoveStats:
+
+	def __init__(self):
+		self.moveNumber = 0
+		self.move = None
+		self.depth = None
+		self.nodes = 0
+		self.pruned = 0
+		self.time = 0.0
+		self.nodesPerSecond = 0.0
+		self.nodesPerPly = list()
+		self.cutoffsByIndex = list()
+		self.firstCutoffRate = None
+		self.branchingFactor = None
+		self.ttHits = 0
+		self.ttMisses = 0
+		self.ttStores = 0
+		self.pondered = False
+
+
+	def __repr__(self):
+		return "MoveStats(move %d: column %s, depth %s, %d nodes, %.3fs)" % (self.moveNumber, self.move, self.depth,
+			self.nodes, self.time)
+
+
+# This function returns the effective branching factor of a search that expanded the given number of nodes to the given
+# depth, i.e., the b for which b + b^2 + ... + b^depth = nodes, found by bisection
+def effectiveBranchingFactor(nodes, depth):
+	if depth <= 0 or nodes <= 0:
+		return None
+	low = 0.0
+	high = max(1.0, float(nodes))
+	for i in range(60):
+		middle = (low + high) / 2
+		total = 0.0
+		power = 1.0
+		for ply in range(depth):
+			power *= middle
+			total += power
+		if total < nodes:
+			low = middle
+		else:
+			high = middle
+	return (low + high) / 2
+
+
+class SearchStats:
+
+	def __init__(self, callback=None):
+		self.callback = callback
+		# the MoveStats of every move chosen so far
+		self.moves = list()
+
+		# The node counts of the search in progress, indexed by the depth remaining (as passed to minimax()), and the depth
+		# remaining one ply below the root of that search
+		self.nodeCounts = list()
+		self.rootDepth = 0
+		# the total nodes of the searches made for the move in progress, by the depth passed to startSearch()
+		self.searchNodes = dict()
+		self.current = None
+		self.startValues = None
+
+
+	# This method is called by the Player before it starts choosing a move
+	def startMove(self, player):
+		self.current = MoveStats()
+		self.current.moveNumber = len(self.moves) + 1
+		self.nodeCounts = list()
+		self.searchNodes = dict()
+		self.startValues = (time.time(), player.numExpanded, player.numPruned, player.numTTHits, player.numTTMisses,
+			player.numTTStores)
+
+
+	# This method is called by the root of every search with the depth it passes to the searches of its moves. The nodes
+	# counted in the previous search (e.g., the previous iteration of iterative deepening) are added to nodesPerPly.
+	def startSearch(self, depth):
+		self.finishSearch()
+		self.rootDepth = depth
+		self.nodeCounts = [0] * (depth + 1)
+
+
+	# This method adds the node counts of the last search to nodesPerPly and searchNodes
+	def finishSearch(self):
+		if self.nodeCounts:
+			self.searchNodes[self.rootDepth] = self.searchNodes.get(self.rootDepth, 0) + sum(self.nodeCounts)
+		nodesPerPly = self.current.nodesPerPly
+		for depth, count in enumerate(self.nodeCounts):
+			ply = self.rootDepth + 1 - depth
+			while len(nodesPerPly) <= ply:
+				nodesPerPly.append(0)
+			nodesPerPly[ply] += count
+		self.nodeCounts = list()
+
+
+	# This method records a cutoff made by the move at the given position in the order moves were searched at the node
+	def recordCutoff(self, index):
+		cutoffs = self.current.cutoffsByIndex
+		while len(cutoffs) <= index:
+			cutoffs.append(0)
+		cutoffs[index] += 1
+
+
+	# This method is called by the Player when it has chosen its move, and returns the MoveStats of the move. If the move
+	# was found by pondering, the search ended at player.ponderEnd rather than now.
+	def endMove(self, player, move, pondered=False):
+		self.finishSearch()
+		start, numExpanded, numPruned, numTTHits, numTTMisses, numTTStores = self.startValues
+		stats = self.current
+		stats.move = move
+		stats.depth = player.lastSearchDepth if player.timeLimit is not None else player.depth
+		stats.pondered = pondered
+		stats.time = (player.ponderEnd if pondered else time.time()) - start
+		stats.nodes = player.numExpanded - numExpanded
+		stats.pruned = player.numPruned - numPruned
+		stats.nodesPerSecond = stats.nodes / stats.time if stats.time > 0 else 0.0
+		stats.ttHits = player.numTTHits - numTTHits
+		stats.ttMisses = player.numTTMisses - numTTMisses
+		stats.ttStores = player.numTTStores - numTTStores
+
+		totalCutoffs = sum(stats.cutoffsByIndex)
+		if totalCutoffs > 0:
+			stats.firstCutoffRate = stats.cutoffsByIndex[0] / totalCutoffs
+		# a search given depth searches depth + 1 plies, as the root places one piece before calling minimax()
+		if self.searchNodes:
+			depth = stats.depth if stats.depth in self.searchNodes else max(self.searchNodes)
+			stats.branchingFactor = effectiveBranchingFactor(self.searchNodes[depth], depth + 1)
+
+		self.moves.append(stats)
+		self.current = None
+		if self.callback is not None:
+			self.callback(stats)
+		return stats
+
+
+	# This method returns totals over all the moves recorded: the number of moves, nodes and cutoffs, the total time,
+	# the mean nodes per second, and the overall first-move cutoff rate
+	def summary(self):
+		numMoves = len(self.moves)
+		nodes = sum(stats.nodes for stats in self.moves)
+		totalTime = sum(stats.time for stats in self.moves)
+		cutoffs = sum(sum(stats.cutoffsByIndex) for stats in self.moves)
+		firstCutoffs = sum(stats.cutoffsByIndex[0] for stats in self.moves if stats.cutoffsByIndex)
+		return {
+			"moves": numMoves,
+			"nodes": nodes,
+			"cutoffs": cutoffs,
+			"time": totalTime,
+			"meanMoveTime": totalTime / numMoves if numMoves > 0 else 0.0,
+			"nodesPerSecond": nodes / totalTime if totalTime > 0 else 0.0,
+			"firstCutoffRate": firstCutoffs / cutoffs if cutoffs > 0 else None,
+		}
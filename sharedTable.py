@@ -0,0 +1,152 @@
+import os
+from multiprocessing import shared_memory
+
+# A transposition table held in shared memory, so that several processes (e.g., the pool of workers in testPlay.py) can
+# all probe it and store into it, and a position searched by one process does not have to be searched again by another.
+# It has the same methods as transposition.TranspositionTable, so a Player can use it in place of its own table (see the
+# transpositionTable argument of player.Player), but it should only be shared by players that value positions the same
+# way (i.e., with the same evaluator).
+#
+# Each entry is packed into two 64-bit words: the data word holds the fields of the entry (see packData()), and the
+# check word holds the key XOR-ed with the data word. There are no locks. If two processes write the same slot at the
+# same time, a reader may see the check word of one entry with the data word of the other, but then the check word XOR
+# the data word is not the key of either, so the entry is treated as missing rather than being used.
+#
+# The entries are in buckets of two slots. When an entry is stored, it replaces the entry in the first slot if it was
+# searched at least as deeply as that entry (or is for the same position), and otherwise replaces the entry in the
+# second slot. So the first slot keeps the deepest (most costly) results, and the second always has room for new ones.
+# Entries are not aged, as the processes' searches are not in step; an entry is always valid for its position, so an
+# old entry is only a waste of its slot.
+#
+# Every process counts its own probes that found an entry (hits) or not (misses), and the entries it stored, like
+# TranspositionTable, and also the hits on entries stored by another process (sharedHits). Each process using the
+# table needs its own owner number (0 to 255) for sharedHits to be counted correctly.
+
+# the size of an entry (a check word and a data word) in bytes
+ENTRY_BYTES = 16
+
+# the bits of the data word: value (32 bits, offset so it is not negative), depth (8), flag (2), move (8, with NO_MOVE
+# for no move), owner (8), and a bit that is always set so that an empty slot never matches
+VALUE_OFFSET = 2**31
+NO_MOVE = 255
+USED = 1 << 63
+WORD_MASK = 2**64 - 1
+
+
+# This function packs the fields of an entry into a data word
+def packData(depth, value, flag, move, owner):
+	value = max(-VALUE_OFFSET, min(VALUE_OFFSET - 1, int(value)))
+	move = NO_MOVE if move is None else move
+	return USED | (owner << 50) | (move << 42) | (flag << 40) | (min(depth, 255) << 32) | (value + VALUE_OFFSET)
+
+
+# This function returns the (depth, value, flag, move, owner) of a data word
+def unpackData(data):
+	move = (data >> 42) & 0xFF
+	return ((data >> 32) & 0xFF, (data & 0xFFFFFFFF) - VALUE_OFFSET, (data >> 40) & 0x3, None if move == NO_MOVE else move,
+		(data >> 50) & 0xFF)
+
+
+class SharedTranspositionTable:
+
+	# The size is the number of entries the table can hold, rounded up to a power of 2 (at least 2). If name is None, new
+	# shared memory is created (and this process should call unlink() when the table is no longer needed); otherwise the
+	# table in the shared memory with that name (see name) is used. The owner number is recorded with each entry stored.
+	def __init__(self, size=2**20, name=None, owner=0):
+		self.size = 2
+		while self.size < size:
+			self.size = self.size * 2
+		self.bucketMask = self.size // 2 - 1
+		self.owner = owner & 0xFF
+
+		if name is None:
+			self.memory = shared_memory.SharedMemory(create=True, size=self.size * ENTRY_BYTES)
+			self.memory.buf[:] = bytes(self.size * ENTRY_BYTES)
+			self.created = True
+		else:
+			self.memory = shared_memory.SharedMemory(name=name)
+			self.created = False
+		self.name = self.memory.name
+		self.words = self.memory.buf.cast('Q')
+
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
+		self.sharedHits = 0
+
+
+	# The table has no ages (see above), so there is nothing to do at the start of a search
+	def newSearch(self):
+		pass
+
+
+	# Return the entry for the given key as a tuple indexed like a TranspositionTable entry (see transposition.py), or
+	# None if the position is not in the table
+	def probe(self, key):
+		key &= WORD_MASK
+		words = self.words
+		index = (key & self.bucketMask) * 4
+		for slot in (index, index + 2):
+			data = words[slot + 1]
+			if data and words[slot] ^ data == key:
+				depth, value, flag, move, owner = unpackData(data)
+				self.hits += 1
+				if owner != self.owner:
+					self.sharedHits += 1
+				return (key, depth, value, flag, move, 0)
+		self.misses += 1
+		return None
+
+
+	# Store the result of a search in the first slot of its bucket if it was searched at least as deeply as the entry
+	# there, or if that entry is for the same position, and in the second slot otherwise
+	def store(self, key, depth, value, flag, move):
+		key &= WORD_MASK
+		words = self.words
+		index = (key & self.bucketMask) * 4
+		data = words[index + 1]
+		if data and words[index] ^ data != key and depth < (data >> 32) & 0xFF:
+			index += 2
+		data = packData(depth, value, flag, move, self.owner)
+		words[index] = key ^ data
+		words[index + 1] = data
+		self.stores += 1
+
+
+	# Empty the table (for every process using it) and reset this process's counters
+	def clear(self):
+		self.memory.buf[:] = bytes(self.size * ENTRY_BYTES)
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
+		self.sharedHits = 0
+
+
+	# This method stops this process using the shared memory
+	def close(self):
+		if getattr(self, "words", None) is not None:
+			self.words.release()
+			self.words = None
+			self.memory.close()
+
+
+	# The view of the memory must be released before the memory itself can be closed
+	def __del__(self):
+		self.close()
+
+
+	# This method removes the shared memory, once every process has finished with it (only the creator should call this)
+	def unlink(self):
+		self.close()
+		if self.created:
+			self.memory.unlink()
+
+
+	# A table sent to another process (e.g., inside a pickled Player) is attached there to the same shared memory, with
+	# an owner number from that process's id (which may clash with another process's, see above)
+	def __getstate__(self):
+		return {"name": self.name, "size": self.size}
+
+
+	def __setstate__(self, state):
+		self.__init__(state["size"], state["name"], os.getpid())
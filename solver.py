@@ -0,0 +1,292 @@
+import transposition
+import time
+
+# The Solver works out the game-theoretic value of a position, i.e., the result when both players play perfectly, rather
+# than the value of a depth-limited search. It uses the same bit layout as bitboard.BitBoard (one column of numRows + 1
+# bits per column), but keeps the position as the pieces of the player to move (current) and all of the pieces (mask),
+# so that the two players are handled by the same code.
+#
+# Scores are from the point of view of the player to move. If a player wins with the piece that makes numPieces pieces on
+# the board, the winner scores (numRows * numColumns + 1 - numPieces) and the loser scores the negative of that. So a
+# quicker win scores more, a slower loss scores more, and a draw scores 0. The score therefore also gives the distance
+# (number of moves) to the end of the game.
+#
+# The search is negamax with alpha-beta pruning, made practical on the smaller boards, and on the full 6x7 board once
+# enough pieces have been played, by:
+#   - checking for immediate wins, and only playing forced blocks, before searching any move
+#   - never playing directly beneath a space where the opponent would win, as the opponent could then win there
+#   - narrowing the window to the best and worst scores still possible given the number of pieces on the board
+#   - searching moves that create the most new threats first, then from the middle outwards
+#   - a transposition table, keyed by the position or its mirror image (whichever is smaller), so positions and their
+#     mirror images share entries, and only searching one of each pair of mirrored moves in symmetric positions
+#   - finding the exact score with a series of null-window searches, which prune far more than full-window searches
+#
+# Even so, this is pure Python (about 20000 nodes per second), and the time taken grows quickly with the number of empty
+# spaces. Solving the empty board takes about 0.1s on 4x5 and 5x6 with 3 in a line, 4s on 4x5 with 4 in a line and 45s
+# on 5x5 with 4 in a line. On the full 6x7 board with 4 in a line, positions from games took up to about 0.5s with 24
+# pieces, 15s with 20 and 90s with 16, while positions early in the game (e.g., after the 7 moves 4444443) do not finish
+# in minutes, and the empty board is far out of reach. So solve() and bestMove() can be given a budget of nodes or time
+# (see setLimits()): when it runs out, solve() reports the result as unknown and bestMove() raises SolveLimitReached. (A
+# tablebase, see tablebase.py, or an opening book gives the results of early positions on the smaller boards instead.)
+
+
+# This exception is raised by the search when the budget set by setLimits() runs out
+class SolveLimitReached(Exception):
+	pass
+
+
+class Solver:
+
+	def __init__(self, rows, columns, winNum, tableSize=2**22):
+		self.numRows = rows
+		self.numColumns = columns
+		self.winNum = winNum
+		self.colHeight = rows + 1
+		self.numCells = rows * columns
+
+		# the bit of the bottom space of each column, all the bottom spaces, all the spaces on the board, and each column
+		self.bottomBits = [1 << (column * self.colHeight) for column in range(columns)]
+		self.bottomMask = sum(self.bottomBits)
+		self.columnMasks = [((1 << rows) - 1) << (column * self.colHeight) for column in range(columns)]
+		self.boardMask = sum(self.columnMasks)
+
+		# the columns in the order they are searched (from the middle outwards)
+		self.columnOrder = sorted(range(columns), key=lambda column: abs(2 * column - (columns - 1)))
+
+		# For a line in direction d with the empty space at position j (0 <= j < winNum), the shifts (i - j) * d for every
+		# other position i. A space completes a line for a player if the player has a piece at every one of these shifts.
+		self.threatShifts = list()
+		for direction in (1, self.colHeight, self.colHeight - 1, self.colHeight + 1):
+			for j in range(winNum):
+				self.threatShifts.append([(i - j) * direction for i in range(winNum) if i != j])
+
+		self.transpositionTable = transposition.TranspositionTable(tableSize)
+		self.numNodes = 0
+
+		# The budget of the search (see setLimits()): the most nodes it may search, the time by which it must finish,
+		# and the node count at which the limits are next checked
+		self.maxNodes = None
+		self.deadline = None
+		self.nextCheck = float('inf')
+
+
+	# This method sets the budget for the following searches: at most maxNodes nodes, and timeLimit seconds from now
+	# (None for no limit). The limits are checked every 1024 nodes, so the search stops soon after either is reached.
+	def setLimits(self, maxNodes=None, timeLimit=None):
+		self.maxNodes = maxNodes
+		self.deadline = time.time() + timeLimit if timeLimit is not None else None
+		self.nextCheck = self.numNodes + 1024 if maxNodes is not None or timeLimit is not None else float('inf')
+
+
+	# This method raises SolveLimitReached if the budget has run out, and otherwise sets when to check it next
+	def checkLimits(self):
+		if self.maxNodes is not None and self.numNodes >= self.maxNodes:
+			raise SolveLimitReached()
+		if self.deadline is not None and time.time() > self.deadline:
+			raise SolveLimitReached()
+		self.nextCheck = self.numNodes + 1024
+
+
+	# This method returns the spaces (as a mask) that would complete a line for the player whose pieces are given by
+	# pieces, among the spaces not already filled (given by mask)
+	def winningSpaces(self, pieces, mask):
+		result = 0
+		for shifts in self.threatShifts:
+			spaces = self.boardMask
+			for shift in shifts:
+				if shift > 0:
+					spaces &= pieces >> shift
+				else:
+					spaces &= pieces << -shift
+				if not spaces:
+					break
+			result |= spaces
+		return result & self.boardMask & ~mask
+
+
+	# This method returns the mirror image of a mask (column c swapped with column numColumns - 1 - c)
+	def mirror(self, bits):
+		result = 0
+		lastColumn = self.numColumns - 1
+		for column in range(self.numColumns):
+			columnBits = (bits >> (column * self.colHeight)) & self.columnMasks[0]
+			result |= columnBits << ((lastColumn - column) * self.colHeight)
+		return result
+
+
+	# This method returns the score of the position within the window (alpha, beta). If the score is outside the window,
+	# the result is only a bound on it: at most alpha if the search fails low, and at least beta if it fails high.
+	def negamax(self, current, mask, numPieces, alpha, beta):
+		self.numNodes += 1
+		if self.numNodes >= self.nextCheck:
+			self.checkLimits()
+		opponent = current ^ mask
+		possible = (mask + self.bottomMask) & self.boardMask
+
+		# if the player to move can win immediately, that is the best possible score
+		if self.winningSpaces(current, mask) & possible:
+			return self.numCells - numPieces
+
+		# if the opponent can win in more than one place, the player to move loses on the opponent's next move, and if the
+		# opponent can win in one place the player to move has to block it
+		opponentWins = self.winningSpaces(opponent, mask)
+		forced = possible & opponentWins
+		if forced:
+			if forced & (forced - 1):
+				return -(self.numCells - numPieces - 1)
+			possible = forced
+
+		# moves directly beneath a space where the opponent would win let the opponent win next move
+		possible &= ~(opponentWins >> 1)
+		if not possible:
+			return -(self.numCells - numPieces - 1)
+
+		# the board fills up after this move (with no win)
+		if numPieces >= self.numCells - 2:
+			return 0
+
+		# The opponent cannot win on their next move, so the worst possible score is losing two moves later, and the player
+		# to move cannot win this move, so the best possible score is winning two moves later.
+		lowest = -(self.numCells - numPieces - 3)
+		if alpha < lowest:
+			alpha = lowest
+			if alpha >= beta:
+				return alpha
+		highest = self.numCells - numPieces - 2
+		if beta > highest:
+			beta = highest
+			if alpha >= beta:
+				return beta
+
+		# positions and their mirror images have the same score, so they share one entry in the transposition table
+		key = current + mask
+		mirrorKey = self.mirror(current) + self.mirror(mask)
+		tableKey = min(key, mirrorKey)
+		table = self.transpositionTable
+		entry = table.probe(tableKey)
+		if entry is not None:
+			value = entry[transposition.VALUE]
+			if entry[transposition.FLAG] == transposition.LOWER:
+				if alpha < value:
+					alpha = value
+					if alpha >= beta:
+						return alpha
+			elif beta > value:
+				beta = value
+				if alpha >= beta:
+					return beta
+
+		# order the moves by the number of spaces where the move leaves the player to move able to win
+		symmetric = key == mirrorKey
+		moves = list()
+		for column in self.columnOrder:
+			if symmetric and column > self.numColumns - 1 - column:
+				continue
+			move = possible & self.columnMasks[column]
+			if move:
+				threats = self.winningSpaces(current | move, mask | move)
+				moves.append((-bin(threats).count("1"), len(moves), move))
+		moves.sort()
+
+		for threats, index, move in moves:
+			# the piece is added to the player to move, and the pieces are swapped so the opponent is to move
+			value = -self.negamax(opponent, mask | move, numPieces + 1, -beta, -alpha)
+			if value >= beta:
+				table.store(tableKey, 0, value, transposition.LOWER, None)
+				return value
+			if value > alpha:
+				alpha = value
+
+		# no move reached beta, so alpha is an upper bound on the score (and is exact if a move raised it, but with the
+		# null windows used by solvePosition() the upper bound is all that is needed)
+		table.store(tableKey, 0, alpha, transposition.UPPER, None)
+		return alpha
+
+
+	# This method returns the exact score of the position, using null-window searches that each halve the range the score
+	# could be in (searching first either side of 0, as draws and quick results are the most common)
+	def solvePosition(self, current, mask, numPieces):
+		if self.winningSpaces(current, mask) & ((mask + self.bottomMask) & self.boardMask):
+			return self.numCells - numPieces
+		if numPieces >= self.numCells:
+			return 0
+
+		lowest = -(self.numCells - numPieces)
+		highest = self.numCells - numPieces
+		while lowest < highest:
+			middle = lowest + (highest - lowest) // 2
+			if middle <= 0 and lowest // 2 < middle:
+				middle = lowest // 2
+			elif middle >= 0 and highest // 2 > middle:
+				middle = highest // 2
+			value = self.negamax(current, mask, numPieces, middle, middle + 1)
+			if value <= middle:
+				highest = value
+			else:
+				lowest = value
+		return lowest
+
+
+	# This method returns the masks (current, mask) and number of pieces for the position on a board (e.g., a board.Board
+	# or bitboard.BitBoard), with player the name of the player to move
+	def fromBoard(self, gameBoard, player):
+		current = 0
+		mask = 0
+		numPieces = 0
+		for column in range(gameBoard.numColumns):
+			for row in range(gameBoard.colFills[column]):
+				bit = 1 << (column * self.colHeight + row)
+				mask |= bit
+				numPieces += 1
+				if str(gameBoard.checkSpace(row, column)) == player:
+					current |= bit
+		return current, mask, numPieces
+
+
+	# This method solves the position on a board for the player to move (player), and returns (result, distance, nodes):
+	# result is 1 if the player to move wins, 0 for a draw and -1 if they lose; distance is the number of moves until the
+	# game ends with perfect play; and nodes is the number of positions searched. If the budget given by maxNodes and
+	# timeLimit (see setLimits()) runs out first, the result is unknown, and (None, None, nodes) is returned.
+	def solve(self, gameBoard, player, maxNodes=None, timeLimit=None):
+		self.numNodes = 0
+		if gameBoard.checkWin():
+			return -1, 0, 0
+
+		current, mask, numPieces = self.fromBoard(gameBoard, player)
+		self.setLimits(maxNodes, timeLimit)
+		try:
+			score = self.solvePosition(current, mask, numPieces)
+		except SolveLimitReached:
+			return None, None, self.numNodes
+		finally:
+			self.setLimits()
+		return self.describeScore(score, numPieces) + (self.numNodes,)
+
+
+	# This method converts a score for a position with numPieces pieces into (result, distance)
+	def describeScore(self, score, numPieces):
+		if score > 0:
+			return 1, self.numCells + 1 - score - numPieces
+		if score < 0:
+			return -1, self.numCells + 1 + score - numPieces
+		return 0, self.numCells - numPieces
+
+
+	# This method returns the best move for the player to move (player) on the board, and its score. Moves with the same
+	# score are chosen from the middle outwards. It raises SolveLimitReached if the budget set by setLimits() runs out.
+	def bestMove(self, gameBoard, player):
+		current, mask, numPieces = self.fromBoard(gameBoard, player)
+		possible = (mask + self.bottomMask) & self.boardMask
+		bestColumn = None
+		bestScore = None
+		for column in self.columnOrder:
+			move = possible & self.columnMasks[column]
+			if not move:
+				continue
+			if self.winningSpaces(current, mask) & move:
+				return column, self.numCells - numPieces
+			score = -self.solvePosition(current ^ mask, mask | move, numPieces + 1)
+			if bestScore is None or score > bestScore:
+				bestColumn = column
+				bestScore = score
+		return bestColumn, bestScore
@@ -0,0 +1,115 @@
+import position
+import mmap
+import struct
+
+# A tablebase holds the exact result of every position that can be reached in a game on a small board (or every such
+# position with at least a given number of pieces), worked out in advance by retrograde analysis (see
+# buildTablebase.py), so that a Player using it can play those positions perfectly without searching them.
+#
+# The result of a position is from the point of view of the player to move: 1 if they win, 0 for a draw and -1 if they
+# lose, with the distance (the number of moves until the game ends, with the winner winning as quickly and the loser
+# losing as slowly as they can), as returned by solver.Solver.solve(). These are packed into one byte, with the result
+# (LOSS, DRAW or WIN) in the top two bits and the distance in the others.
+#
+# The tablebase is a binary file made of a header followed by a hash table of fixed-size slots:
+#
+#     header: magic (4 bytes), rows, columns, winNum, minPieces, slot size (1 byte each), number of positions, number
+#             of slots (4 bytes each)
+#     slot: (position code << 8) | result byte, in slot size bytes (little-endian), or 0 for an empty slot
+#
+# The code of a position is its canonical code (see position.canonicalCode()), so a position and its mirror image
+# share a slot, and only positions where the game is not over are stored. A position is stored in the slot given by
+# hashing its code, or if that slot is taken, in the next free slot after it (open addressing with linear probing).
+# The table is never more than LOAD_FACTOR full, so a probe only reads a slot or two, however many positions there
+# are. The file is memory-mapped rather than read, so opening a tablebase is fast whatever its size, and processes
+# using the same tablebase (e.g., a Player's worker processes) share the memory it uses.
+
+MAGIC = b"CTB1"
+HEADER = struct.Struct("<4sBBBBBII")
+LOAD_FACTOR = 0.75
+
+# the result of a position in the top two bits of its byte
+LOSS = 0
+DRAW = 1
+WIN = 2
+DISTANCE_MASK = 0x3F
+
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+WORD_MASK = 2**64 - 1
+
+
+# This function returns the slot where the search for the position with the given code starts, in a table of numSlots
+# slots
+def homeSlot(code, numSlots):
+	return (((code * HASH_MULTIPLIER) & WORD_MASK) * numSlots) >> 64
+
+
+# This function returns the size in bytes of a slot for a board with the given number of rows and columns
+def slotSize(rows, columns):
+	return position.codeSize(rows, columns) + 1
+
+
+# This function packs a result (1, 0 or -1) and distance into a byte
+def packResult(result, distance):
+	return ((result + 1) << 6) | distance
+
+
+# This function returns the (result, distance) packed into a byte
+def unpackResult(byte):
+	return (byte >> 6) - 1, byte & DISTANCE_MASK
+
+
+# This function returns a single number for a result and distance, which is larger the better the position is for
+# the player to move: a quicker win is better than a slower one, and a slower loss better than a quicker one
+def resultScore(result, distance):
+	if result == 0:
+		return 0
+	return result * (DISTANCE_MASK + 1 - distance)
+
+
+# A Tablebase gives access to a tablebase written by buildTablebase.buildTablebase()
+class Tablebase:
+
+	def __init__(self, path):
+		self.path = path
+		with open(path, "rb") as file:
+			self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		(magic, self.numRows, self.numColumns, self.winNum, self.minPieces, self.slotSize, self.numPositions,
+			self.numSlots) = HEADER.unpack_from(self.data, 0)
+		if magic != MAGIC:
+			raise ValueError(path + " is not a tablebase")
+
+		# the number of probes that found the position, and that did not
+		self.hits = 0
+		self.misses = 0
+
+
+	# Return the (result, distance) of the position on the board for the player to move, or None if the position is
+	# not in the tablebase (e.g., the game is over, the board is a different size, or it has fewer than minPieces pieces)
+	def probe(self, gameBoard):
+		if ((gameBoard.numRows, gameBoard.numColumns, gameBoard.winNum) != (self.numRows, self.numColumns, self.winNum)
+				or sum(gameBoard.colFills) < self.minPieces):
+			self.misses += 1
+			return None
+
+		code = position.canonicalCode(gameBoard)
+		data = self.data
+		size = self.slotSize
+		slot = homeSlot(code, self.numSlots)
+		while True:
+			offset = HEADER.size + slot * size
+			word = int.from_bytes(data[offset:offset + size], "little")
+			if word == 0:
+				self.misses += 1
+				return None
+			if word >> 8 == code:
+				self.hits += 1
+				return unpackResult(word & 0xFF)
+			slot += 1
+			if slot == self.numSlots:
+				slot = 0
+
+
+	# Release the memory map
+	def close(self):
+		self.data.close()
@@ -2,14 +2,32 @@ import board
 import game
 import player
 import randomPlayer
-from datetime import datetime
+import searchStats
+import sharedTable
+import tournament
 import csv
 import time
 import itertools
 import multiprocessing as mp
 
 
-def gatherData(isPruning, boardSize):
+# The transposition table shared by every worker process, attached when the worker starts (see initWorker())
+workerTable = None
+
+# This function is run when each worker process starts. It attaches the worker to the shared transposition table, with
+# an owner number from the shared counter, so that every worker's hits on entries stored by other workers are counted.
+def initWorker(tableName, tableSize, ownerCounter):
+    global workerTable
+    if tableName is None:
+        return
+    with ownerCounter.get_lock():
+        ownerCounter.value += 1
+        owner = ownerCounter.value
+    workerTable = sharedTable.SharedTranspositionTable(tableSize, tableName, owner)
+
+# The random player is seeded from the seed of the task (see main()), so the same tasks always play the same games.
+# If shared is True, the player uses the worker's shared transposition table rather than a table of its own.
+def gatherData(isPruning, boardSize, tableSize=0, seed=0, shared=False):
     boardSizeDict = boardSizeDict = { 1: (6,7,4,1),
                       2: (6,7,4,2),
                       3: (6,7,4,3),
@@ -18,8 +36,13 @@ def gatherData(isPruning, boardSize):
                       6: (6,7,4,6),
                       7: (6,7,4,7)}
     
-    seed = datetime.now().timestamp()
-    p1 = player.Player("X", depth=boardSizeDict[boardSize][3])
+    stats = searchStats.SearchStats()
+    if shared:
+        p1 = player.Player("X", depth=boardSizeDict[boardSize][3], transpositionTable=workerTable, stats=stats)
+    else:
+        p1 = player.Player("X", depth=boardSizeDict[boardSize][3], transpositionSize=tableSize, stats=stats)
+    # the shared table's counters run on from the worker's earlier games
+    startCounts = (p1.numTTHits, p1.numTTMisses, p1.numTTStores, getattr(p1.transpositionTable, "sharedHits", 0))
     #p2 = player.Player("O", depth=3)
     p2 = randomPlayer.RandomPlayer("O", seed)
 
@@ -28,7 +51,13 @@ def gatherData(isPruning, boardSize):
     result = g.playGame(isPruning)
     end = time.time()
 
-    return [result, p1.numExpanded, p1.numPruned, isPruning, boardSize, end-start]
+    summary = stats.summary()
+    endCounts = (p1.numTTHits, p1.numTTMisses, p1.numTTStores, getattr(p1.transpositionTable, "sharedHits", 0))
+    hits, misses, stores, sharedHits = [end - start for start, end in zip(startCounts, endCounts)]
+    return [result, p1.numExpanded, p1.numPruned, isPruning, boardSize, end-start,
+            tableSize, hits, misses, stores,
+            summary["moves"], summary["meanMoveTime"], summary["nodesPerSecond"], summary["firstCutoffRate"],
+            shared, sharedHits]
 
 def worker(args):
     return gatherData(*args)
@@ -37,35 +66,67 @@ def print_progress(iteration, total, bar_length=100):
     percent = "{0:.1f}".format(100 * (iteration / float(total)))
     filled_length = int(round(bar_length * iteration / float(total)))
     bar = '#' * filled_length + '-' * (bar_length - filled_length)
-    print(f"\rProgress: |{bar}| {percent}% done", end='\n')
+    print(f"\rProgress: |{bar}| {percent}% done", end='', flush=True)
     if iteration == total: 
         print()
 
 def main():
     isPruningOptions = [True]
     boardSizeOptions = [1,2,3,4,5,6,7]
+    # number of transposition table entries (0 disables the table), and whether the table is shared by all the worker
+    # processes (see sharedTable.py) rather than each game having a table of its own
+    tableOptions = [(0, False), (2**18, False), (2**18, True)]
+    sharedSizes = set(tableSize for tableSize, shared in tableOptions if shared)
+    if len(sharedSizes) > 1:
+        raise ValueError("the shared table options must all have the same size")
 
-    combinations = [(isPruning, boardSize) for isPruning in isPruningOptions for boardSize in boardSizeOptions]
+    combinations = [(isPruning, boardSize, tableSize, shared) for isPruning in isPruningOptions
+                    for boardSize in boardSizeOptions for tableSize, shared in tableOptions]
 
-    #repeat each combination a 1000 times
-    tasks = combinations * 100
+    #repeat each combination a 1000 times, giving every task its own fixed seed
+    tasks = [(isPruning, boardSize, tableSize, tournament.gameSeed(0, i), shared)
+             for i, (isPruning, boardSize, tableSize, shared) in enumerate(combinations * 100)]
     totalTasks = len(tasks)
 
-    #multiprocessing
-    pool = mp.Pool()
-    results = []
-    for i, _ in enumerate(pool.imap_unordered(worker, tasks), 1):
-        print_progress(i, totalTasks)
-        results.append(_)
-
-    pool.close()
-    pool.join() 
+    #multiprocessing, writing each result to the csv as soon as it is known. The shared table (only created if an option
+    #uses it) is removed from shared memory however the run ends, e.g., if a worker fails or the run is interrupted
+    table = sharedTable.SharedTranspositionTable(sharedSizes.pop()) if sharedSizes else None
+    totals = {False: [0, 0, 0], True: [0, 0, 0]}
+    try:
+        pool = mp.Pool(initializer=initWorker, initargs=(table.name if table is not None else None,
+                                                         table.size if table is not None else 0, mp.Value('i', 0)))
+        try:
+            with open('test4depth.csv', 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["result", "numExpanded", "numPruned", "isPruning", "boardSize", "time",
+                                 "tableSize", "numTTHits", "numTTMisses", "numTTStores",
+                                 "numMoves", "meanMoveTime", "nodesPerSecond", "firstCutoffRate",
+                                 "sharedTable", "numTTSharedHits"])
+                for i, row in enumerate(pool.imap_unordered(worker, tasks), 1):
+                    writer.writerow(row)
+                    file.flush()
+                    if row[6] > 0:
+                        counts = totals[row[14]]
+                        counts[0] += row[7]
+                        counts[1] += row[8]
+                        counts[2] += row[15]
+                    print_progress(i, totalTasks)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    finally:
+        if table is not None:
+            table.unlink()
 
-    #write results to csv
-    with open('test4depth.csv', 'w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["result", "numExpanded", "numPruned", "isPruning", "boardSize", "time"])
-        writer.writerows(results)
+    # report how often the table had the position, and (for the shared table) how often another worker had stored it
+    for shared in (False, True):
+        hits, misses, sharedHits = totals[shared]
+        if hits + misses > 0:
+            print("%s tables: hit rate %.3f, hits on entries from other workers %.3f of probes" %
+                  ("shared" if shared else "separate", hits / (hits + misses), sharedHits / (hits + misses)))
         
     
 if __name__ == "__main__":
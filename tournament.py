@@ -0,0 +1,284 @@
+import board
+import game
+import player
+import randomPlayer
+import mctsPlayer
+import evaluation
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import multiprocessing as mp
+
+# This script plays a tournament between players described in a JSON config file, e.g.,
+#
+#     {
+#         "players": {
+#             "random": {"type": "random"},
+#             "ab4": {"type": "player", "depth": 4, "transpositionSize": 65536},
+#             "pvs4": {"type": "player", "depth": 4, "searchMode": "pvs", "evaluator": true},
+#             "mcts": {"type": "mcts", "playouts": 1000}
+#         },
+#         "boards": [[6, 7, 4], [5, 6, 4]],
+#         "format": "round-robin",
+#         "gamesPerPairing": 20,
+#         "seed": 1
+#     }
+#
+# and run with
+#
+#     python tournament.py tournament.json results.csv
+#
+# The "type" of a player is "player" (player.Player, created with the other settings given, where "evaluator": true
+# gives it a HeuristicEvaluator for the board, and "pruning": false makes it use getMove() rather than
+# getMoveAlphaBeta()), "random" (randomPlayer.RandomPlayer) or "mcts" (mctsPlayer.MCTSPlayer). In a "round-robin"
+# every player plays every other player, and in a "gauntlet" the player named by "challenger" plays every other player.
+# Each pairing plays gamesPerPairing games on every board, with the players taking turns to go first.
+#
+# Every game has a fixed id and seed (worked out from the tournament seed and the game id by gameSeed()), so the same
+# config always plays the same games. The games are played by a pool of processes, and each result is written to the
+# CSV file as soon as the game finishes. If the file already holds results (e.g., from a run that was stopped), those
+# games are not played again. The first line of the file holds a hash of the config (see configHash()), and a file
+# written for a different config is not resumed, as its game ids would belong to other games. At the end, the score of
+# every player is reported with a 95% confidence interval, along with an Elo rating.
+
+
+# This function returns the seed for a game, from the seed of the tournament (or test run) and the id of the game
+def gameSeed(seed, gameId):
+	return random.Random("%s,%s" % (seed, gameId)).getrandbits(32)
+
+
+# This function returns the list of games to play, as (gameId, playerX, playerO, (rows, columns, winNum)) tuples
+def scheduleGames(config):
+	names = list(config["players"])
+	if config.get("format", "round-robin") == "gauntlet":
+		challenger = config["challenger"]
+		pairings = [(challenger, name) for name in names if name != challenger]
+	else:
+		pairings = [(names[i], names[j]) for i in range(len(names)) for j in range(i + 1, len(names))]
+
+	games = list()
+	for first, second in pairings:
+		for rows, columns, winNum in config["boards"]:
+			for i in range(config.get("gamesPerPairing", 2)):
+				playerX, playerO = (first, second) if i % 2 == 0 else (second, first)
+				games.append((len(games), playerX, playerO, (rows, columns, winNum)))
+	return games
+
+
+# This function creates a player from its settings in the config, and returns it with whether it uses alpha-beta
+def makePlayer(settings, name, rows, columns, winNum, seed):
+	settings = dict(settings)
+	kind = settings.pop("type", "player")
+	if kind == "random":
+		return randomPlayer.RandomPlayer(name, seed), False
+	if kind == "mcts":
+		return mctsPlayer.MCTSPlayer(name, seed=seed, **settings), False
+	if kind == "player":
+		pruning = settings.pop("pruning", True)
+		if settings.get("evaluator") is True:
+			settings["evaluator"] = evaluation.HeuristicEvaluator(rows, columns, winNum)
+		return player.Player(name, **settings), pruning
+	raise ValueError("unknown player type " + str(kind))
+
+
+# This function plays one game (in a worker process), and returns its row of the results file
+def playScheduledGame(task):
+	gameId, playerX, playerO, (rows, columns, winNum), settingsX, settingsO, seed = task
+	p1, pruning1 = makePlayer(settingsX, "X", rows, columns, winNum, seed)
+	p2, pruning2 = makePlayer(settingsO, "O", rows, columns, winNum, seed + 1)
+
+	g = game.Game(p1, p2, rows, columns, winNum)
+	start = time.time()
+	result = g.playGame(pruning1, oppPruning=pruning2)
+	elapsed = time.time() - start
+	for p in (p1, p2):
+		if hasattr(p, "close"):
+			p.close()
+	return [gameId, playerX, playerO, rows, columns, winNum, seed, result, sum(g.gameBoard.colFills), elapsed]
+
+
+FIELDS = ["gameId", "playerX", "playerO", "rows", "columns", "winNum", "seed", "result", "numMoves", "time"]
+CONFIG_PREFIX = "# config "
+
+
+# This function returns a hash of the config, which is the same for configs that only differ in the order of their keys
+def configHash(config):
+	return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+# This function returns the config hash on the first line of the results file, or None if it has none
+def readConfigHash(path):
+	if not os.path.exists(path):
+		return None
+	with open(path, newline='') as file:
+		line = file.readline().strip()
+	return line[len(CONFIG_PREFIX):] if line.startswith(CONFIG_PREFIX) else None
+
+
+# This function reads the results already in the file, dropping any incomplete row left by a run that was stopped
+# part way through writing it (and the config hash line, which is not a result), and returns them
+def readResults(path):
+	results = list()
+	if not os.path.exists(path):
+		return results
+	with open(path, newline='') as file:
+		text = file.read()
+	# a row without its line ending was cut off part way through
+	if not text.endswith("\n"):
+		text = text[:text.rfind("\n") + 1]
+	for row in csv.reader(text.splitlines()):
+		if len(row) != len(FIELDS) or row[0] == FIELDS[0]:
+			continue
+		try:
+			results.append([int(row[0]), row[1], row[2], int(row[3]), int(row[4]), int(row[5]), int(row[6]),
+				int(row[7]), int(row[8]), float(row[9])])
+		except ValueError:
+			continue
+	return results
+
+
+# This function plays every game in the schedule that is not already in the results file, appending each result to
+# the file as soon as it is known, and returns all the results
+def runTournament(config, path, workers=None, progress=False):
+	schedule = scheduleGames(config)
+	results = readResults(path)
+	done = set(result[0] for result in results)
+	digest = configHash(config)
+	if results and readConfigHash(path) != digest:
+		raise ValueError(path + " holds results for a different config, so it cannot be resumed")
+
+	# rewrite the file with only the complete results, so new rows are not appended to an incomplete one. The new file
+	# replaces the old one in a single step, so the results are not lost if the process is stopped while writing it.
+	temporaryPath = path + ".tmp"
+	with open(temporaryPath, "w", newline='') as file:
+		file.write(CONFIG_PREFIX + digest + "\n")
+		writer = csv.writer(file)
+		writer.writerow(FIELDS)
+		writer.writerows(results)
+	os.replace(temporaryPath, path)
+
+	seed = config.get("seed", 0)
+	tasks = [(gameId, playerX, playerO, boardSpec, config["players"][playerX], config["players"][playerO],
+		gameSeed(seed, gameId)) for gameId, playerX, playerO, boardSpec in schedule if gameId not in done]
+
+	if tasks:
+		pool = mp.Pool(workers)
+		try:
+			with open(path, "a", newline='') as file:
+				writer = csv.writer(file)
+				for i, row in enumerate(pool.imap_unordered(playScheduledGame, tasks), 1):
+					writer.writerow(row)
+					file.flush()
+					results.append(row)
+					if progress:
+						print("\rPlayed %d of %d games" % (i, len(tasks)), end='', flush=True)
+		finally:
+			pool.close()
+			pool.join()
+		if progress:
+			print()
+	return results
+
+
+# This function returns each player's results from the games: a dictionary from name to [wins, draws, losses]
+def countResults(results):
+	counts = dict()
+	for row in results:
+		playerX, playerO, result = row[1], row[2], row[7]
+		for name in (playerX, playerO):
+			counts.setdefault(name, [0, 0, 0])
+		if result == 0:
+			counts[playerX][1] += 1
+			counts[playerO][1] += 1
+		else:
+			winner, loser = (playerX, playerO) if result == 1 else (playerO, playerX)
+			counts[winner][0] += 1
+			counts[loser][2] += 1
+	return counts
+
+
+# This function returns a player's score (a win counts 1 and a draw 1/2) as a fraction of the games played, with the
+# lower and upper ends of its 95% confidence interval, from the normal approximation
+def scoreInterval(wins, draws, losses):
+	games = wins + draws + losses
+	if games == 0:
+		return None, None, None
+	score = (wins + 0.5 * draws) / games
+	variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+	margin = 1.96 * math.sqrt(variance / games)
+	return score, max(0.0, score - margin), min(1.0, score + margin)
+
+
+# This function returns the Elo rating of every player that best fits the results (the maximum likelihood ratings, with
+# a draw counting as half a win), with the mean rating 0. Each player also gets one draw against a player rated 0, so
+# that a player who won (or lost) every game still gets a finite rating.
+def eloRatings(results, iterations=200):
+	games = dict()
+	for row in results:
+		playerX, playerO, result = row[1], row[2], row[7]
+		score = 1.0 if result == 1 else 0.5 if result == 0 else 0.0
+		games.setdefault(playerX, list()).append((playerO, score))
+		games.setdefault(playerO, list()).append((playerX, 1.0 - score))
+
+	scale = 400 / math.log(10)
+	ratings = dict((name, 0.0) for name in games)
+	for iteration in range(iterations):
+		for name, played in games.items():
+			# a Newton step on the log likelihood of the player's results, including the draw against a player rated 0
+			actual = 0.5
+			expected = 1 / (1 + 10 ** (-ratings[name] / 400))
+			variance = expected * (1 - expected)
+			for opponent, score in played:
+				e = 1 / (1 + 10 ** ((ratings[opponent] - ratings[name]) / 400))
+				actual += score
+				expected += e
+				variance += e * (1 - e)
+			ratings[name] += scale * (actual - expected) / max(variance, 1e-9)
+
+	if ratings:
+		mean = sum(ratings.values()) / len(ratings)
+		for name in ratings:
+			ratings[name] -= mean
+	return ratings
+
+
+# This function prints the standings of the tournament
+def printReport(results):
+	counts = countResults(results)
+	ratings = eloRatings(results)
+	print("%-20s %6s %6s %6s %6s %8s %17s %8s" % ("player", "games", "wins", "draws", "losses", "score", "95% interval",
+		"Elo"))
+	for name in sorted(counts, key=lambda name: -ratings[name]):
+		wins, draws, losses = counts[name]
+		score, low, high = scoreInterval(wins, draws, losses)
+		print("%-20s %6d %6d %6d %6d %8.3f    [%.3f, %.3f] %8.0f" % (name, wins + draws + losses, wins, draws, losses,
+			score, low, high, ratings[name]))
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Play a tournament between Connect players.")
+	parser.add_argument("config", help="the JSON file describing the players, boards and format")
+	parser.add_argument("output", help="the CSV file the results are written to (and resumed from)")
+	parser.add_argument("--workers", type=int, default=None, help="the number of processes (by default one per CPU)")
+	parser.add_argument("--report-only", action="store_true", help="only report the results already in the file")
+	args = parser.parse_args()
+
+	with open(args.config) as file:
+		config = json.load(file)
+	if args.report_only:
+		results = readResults(args.output)
+	else:
+		try:
+			results = runTournament(config, args.output, args.workers, progress=True)
+		except ValueError as error:
+			parser.error(str(error))
+	printReport(results)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,71 @@
+# The type of value stored in a transposition table entry. An EXACT value is the true minimax value of the
+# position, a LOWER bound means the true value is at least the stored value (the search failed high), and an
+# UPPER bound means the true value is at most the stored value (the search failed low).
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Positions of the fields in an entry tuple
+KEY = 0
+DEPTH = 1
+VALUE = 2
+FLAG = 3
+MOVE = 4
+AGE = 5
+
+# A TranspositionTable remembers the results of searching positions, so that a position reached again (through a
+# different order of moves, or in a later search of the same game) does not have to be searched from scratch.
+#
+# The table has a fixed number of slots, and each position hash maps to exactly one slot. Each slot holds a single
+# entry (key, depth, value, flag, move, age). When two positions compete for a slot, the new entry replaces the old
+# one if the old entry is from an earlier search (its age is older), or if the new entry was searched at least as deeply.
+class TranspositionTable:
+
+	# The size is the number of entries the table can hold, rounded up to a power of 2
+	def __init__(self, size=2**20):
+		self.size = 1
+		while self.size < size:
+			self.size = self.size * 2
+		self.indexMask = self.size - 1
+		self.entries = [None] * self.size
+
+		# the age is increased at the start of every search (see newSearch())
+		self.age = 0
+
+		# track how many probes found an entry (hits) or not (misses), and how many entries were stored
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
+
+
+	# This method should be called at the start of each search, so that entries from older searches are replaced first
+	def newSearch(self):
+		self.age = self.age + 1
+
+
+	# Return the entry for the given key, or None if the position is not in the table
+	def probe(self, key):
+		entry = self.entries[key & self.indexMask]
+		if entry is not None and entry[KEY] == key:
+			self.hits += 1
+			return entry
+		self.misses += 1
+		return None
+
+
+	# Store the result of a search, if the replacement policy allows it
+	def store(self, key, depth, value, flag, move):
+		index = key & self.indexMask
+		entry = self.entries[index]
+		if entry is None or entry[AGE] != self.age or depth >= entry[DEPTH]:
+			self.entries[index] = (key, depth, value, flag, move, self.age)
+			self.stores += 1
+
+
+	# Empty the table and reset its counters
+	def clear(self):
+		self.entries = [None] * self.size
+		self.age = 0
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
@@ -0,0 +1,65 @@
+import random
+
+# Zobrist hashing gives every (player, space) pair a random 64-bit key. The hash of a position is the XOR of
+# the keys of all the pieces on the board, so adding or removing a piece only needs a single XOR, and the same
+# position always has the same hash however it was reached.
+#
+# The keys are generated from a fixed seed, so that hashes are the same in every process and every run, and
+# can be stored in files or shared between processes.
+#
+# A position and its mirror image (column c swapped with column columns - 1 - c) are equally good for both players.
+# Boards also keep the hash of the mirror image of their position (the mirror hash), which is the XOR of the keys of
+# the mirrored space of every piece, so the two can share one entry in a table by using the smaller of the two hashes
+# (the canonical hash). A position with the same hash as its mirror image is symmetric.
+class ZobristKeys:
+
+	def __init__(self, rows, columns):
+		self.numRows = rows
+		self.numColumns = columns
+
+		# pieceKeys maps a player's name to a list holding a key for every space, indexed by row * columns + column
+		self.pieceKeys = dict()
+		for player in ("X", "O"):
+			self.getPieceKeys(player)
+
+		# mirrorPieceKeys is the same as pieceKeys, but holds the key of the mirrored space for every space
+		self.mirrorPieceKeys = dict()
+
+		# sideKey is XOR-ed into a hash to distinguish the two players being the next to move
+		self.sideKey = random.Random("%d,%d,side" % (rows, columns)).getrandbits(64)
+
+
+	# Return the keys for the given player, creating them the first time a player is seen
+	def getPieceKeys(self, player):
+		keys = self.pieceKeys.get(player)
+		if keys is None:
+			generator = random.Random("%d,%d,%s" % (self.numRows, self.numColumns, player))
+			keys = [generator.getrandbits(64) for i in range(self.numRows * self.numColumns)]
+			self.pieceKeys[player] = keys
+		return keys
+
+
+	# Return the keys for the given player to use for the mirror hash, i.e., the key of the mirrored space for every space
+	def getMirrorPieceKeys(self, player):
+		keys = self.mirrorPieceKeys.get(player)
+		if keys is None:
+			pieceKeys = self.getPieceKeys(player)
+			keys = list()
+			for row in range(self.numRows):
+				for column in range(self.numColumns):
+					keys.append(pieceKeys[row * self.numColumns + self.numColumns - 1 - column])
+			self.mirrorPieceKeys[player] = keys
+		return keys
+
+
+# ZobristKeys that have already been built, keyed by (rows, columns)
+zobristTables = dict()
+
+# Return the ZobristKeys for a board with the given number of rows and columns
+def getZobristKeys(rows, columns):
+	key = (rows, columns)
+	keys = zobristTables.get(key)
+	if keys is None:
+		keys = ZobristKeys(rows, columns)
+		zobristTables[key] = keys
+	return keys